@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+段落压缩基准 - 对比开启/关闭段落压缩时的提示词大小和延迟
+
+默认只测量本地流水线（检索 + 上下文构建）的耗时和上下文token数，并检查问题
+所问的SDK接口是否仍保留在压缩后的上下文中；加 --live 时使用 config.py 中的
+API密钥实际调用模型，测量端到端延迟。
+
+用法:
+    python benchmarks/bench_compression.py --chunks 2000 --queries 100
+    python benchmarks/bench_compression.py --queries 10 --live
+"""
+
+import sys
+import os
+import time
+import random
+import logging
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from config import RAG_CONFIG
+from rag_engine import RAGEngine
+from context_packer import estimate_tokens
+
+FUNCTIONS = [
+    ("kdk_system_get_version", "获取操作系统版本号"),
+    ("kdk_system_get_architecture", "获取系统架构"),
+    ("kdk_system_get_hostName", "获取主机名"),
+    ("kdk_hw_get_cpu_info", "获取CPU型号和核心数"),
+    ("kdk_disk_get_size", "获取磁盘容量"),
+    ("kdk_net_get_ipaddr", "获取网卡IP地址"),
+    ("kdk_package_list", "列出已安装的软件包"),
+    ("kdk_time_get_zone", "获取当前时区"),
+]
+WORDS = [
+    "系统", "内核", "网络", "配置", "安装", "服务", "用户", "权限", "硬件", "内存",
+    "进程", "日志", "安全", "桌面", "应用", "参数", "结构体", "库文件", "开发", "示例",
+    "线程", "释放", "缓冲区", "错误码", "回调", "初始化", "依赖", "模块", "字符串", "路径",
+]
+
+def make_chunk(rng: random.Random) -> str:
+    """
+    生成一个包含多个接口说明的合成文档块
+    """
+    sentences = []
+    for name, desc in rng.sample(FUNCTIONS, 3):
+        sentences.append(f"{name} 函数用于{desc}。")
+        sentences.append(f"原型为 extern char *{name}(void);\n")
+        sentences.extend("".join(rng.choices(WORDS, k=rng.randint(6, 12))) + "。" for _ in range(3))
+    rng.shuffle(sentences)
+    return "".join(sentences)
+
+def percentile(values, pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def run(engine: RAGEngine, queries, compress: bool, live: bool):
+    """
+    以指定配置执行查询，返回上下文token数、耗时(ms)和接口保留率
+    """
+    RAG_CONFIG['compress_context'] = compress
+    tokens, local_ms, total_ms, kept = [], [], [], 0
+    for name, question in queries:
+        start = time.perf_counter()
+        docs = engine._retrieve(question)
+        context = engine._build_context(docs, question=question)
+        local_ms.append((time.perf_counter() - start) * 1000)
+        tokens.append(estimate_tokens(context))
+        kept += name in context
+        
+        if live:
+            engine.ai_model.generate_answer(question, context)
+            total_ms.append((time.perf_counter() - start) * 1000)
+    return tokens, local_ms, total_ms, kept
+
+def main():
+    parser = argparse.ArgumentParser(description='段落压缩前后的提示词大小与延迟基准')
+    parser.add_argument('--chunks', type=int, default=2000)
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--live', action='store_true', help='实际调用模型测量端到端延迟')
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    rng = random.Random(11)
+    
+    # 索引和查询缓存都放在临时目录，不读写 ./data 下的正式数据
+    with tempfile.TemporaryDirectory() as db_dir:
+        engine = RAGEngine(db_path=os.path.join(db_dir, 'bench'),
+                           cache_path=os.path.join(db_dir, 'query_cache.json'))
+        engine.vector_store.add_documents(
+            [{'content': make_chunk(rng), 'chunk_id': i, 'source_file': 'synthetic'}
+             for i in range(args.chunks)]
+        )
+        
+        queries = []
+        for _ in range(args.queries):
+            name, _ = rng.choice(FUNCTIONS)
+            queries.append((name, f"{name} 怎么用？"))
+        
+        original = RAG_CONFIG.get('compress_context', False)
+        try:
+            results = {mode: run(engine, queries, mode, args.live) for mode in (False, True)}
+        finally:
+            RAG_CONFIG['compress_context'] = original
+    
+    print(f"\n== {args.chunks} 个文档块, {args.queries} 个问题 ==")
+    for mode, (tokens, local_ms, total_ms, kept) in results.items():
+        label = '压缩' if mode else '不压缩'
+        line = (f"{label:>4}: 上下文 平均{sum(tokens) / len(tokens):.0f} tokens, "
+                f"本地 p50={percentile(local_ms, 50):.2f}ms p99={percentile(local_ms, 99):.2f}ms, "
+                f"接口保留 {kept}/{len(queries)}")
+        if total_ms:
+            line += f", 端到端 p50={percentile(total_ms, 50):.0f}ms p99={percentile(total_ms, 99):.0f}ms"
+        print(line)
+    
+    before = sum(results[False][0])
+    after = sum(results[True][0])
+    print(f"提示词缩减: {(1 - after / before) * 100:.1f}%" if before else "无上下文")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+索引全流程基准 - 在合成SDK文档语料上测量文档处理、建索引、存储、加载和检索
+
+按 --sizes 指定的文档块规模生成中英文混合的SDK风格Markdown文档（含 kdk_* 接口、
+C 和 Python 代码片段），依次测量：
+    DocumentProcessor 处理吞吐（文件/秒、文档块/秒、MB/秒）
+    VectorStore.add_documents 耗时及保存耗时
+    索引的磁盘占用，以及在新进程中加载索引的耗时和增加的常驻内存
+    VectorStore.search 延迟 P50/P95/P99
+
+结果以JSON输出，可保存后用 --baseline 与其他版本的结果逐项对比。
+
+用法:
+    python benchmarks/bench_index.py --sizes 1000 10000 100000 --output result.json
+    python benchmarks/bench_index.py --sizes 10000 --baseline result.json
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from config import VECTOR_CONFIG, RAG_CONFIG, PERFORMANCE_CONFIG
+from document_processor import DocumentProcessor
+from vector_store import VectorStore, tokenize_chinese
+from metrics import resident_memory
+
+MODULES = ["system", "hw", "disk", "net", "package", "time", "power", "usb",
+           "printer", "bios", "accounts", "runinfo"]
+VERBS = [("get", "获取"), ("set", "设置"), ("list", "列出"), ("free", "释放"),
+         ("open", "打开"), ("close", "关闭"), ("query", "查询")]
+OBJECTS = [("version", "版本号"), ("info", "详细信息"), ("name", "名称"), ("size", "容量"),
+           ("status", "状态"), ("config", "配置"), ("path", "路径"), ("id", "标识"),
+           ("count", "数量"), ("list", "列表")]
+ZH_WORDS = [
+    "系统", "内核", "网络", "配置", "安装", "服务", "用户", "权限", "硬件", "内存",
+    "进程", "日志", "安全", "桌面", "应用", "参数", "结构体", "库文件", "开发", "示例",
+    "线程", "缓冲区", "错误码", "回调", "初始化", "依赖", "模块", "字符串", "调用", "返回值",
+]
+EN_WORDS = [
+    "the", "function", "returns", "pointer", "buffer", "caller", "must", "release", "string",
+    "module", "error", "code", "thread", "safe", "value", "structure", "device", "system",
+    "interface", "library", "call", "before", "after", "using", "memory", "handle",
+]
+
+# 小节的最小长度(字符)：两个小节合计超过分块大小，处理后每个小节单独成为一个文档块
+MIN_SECTION_CHARS = 320
+
+def make_symbol(rng: random.Random):
+    """
+    随机生成一个SDK接口，返回 (名称, 模块, 中文说明, 英文说明)
+    """
+    module = rng.choice(MODULES)
+    verb, verb_zh = rng.choice(VERBS)
+    obj, obj_zh = rng.choice(OBJECTS)
+    return f"kdk_{module}_{verb}_{obj}", module, f"{verb_zh}{module}模块的{obj_zh}", f"{verb}s the {obj} of the {module} module"
+
+def zh_sentence(rng: random.Random) -> str:
+    return "".join(rng.choices(ZH_WORDS, k=rng.randint(6, 14))) + "。"
+
+def en_sentence(rng: random.Random) -> str:
+    words = rng.choices(EN_WORDS, k=rng.randint(6, 10))
+    return " ".join(words).capitalize() + ". "
+
+def make_section(rng: random.Random) -> str:
+    """
+    生成一个接口说明小节，长度在 MIN_SECTION_CHARS 到默认分块大小之间
+    """
+    name, module, desc_zh, desc_en = make_symbol(rng)
+    kind = rng.random()
+    lines = [f"### {name}", ""]
+    if kind < 0.4:
+        lines.append(f"{name} 函数用于{desc_zh}。" + "".join(zh_sentence(rng) for _ in range(rng.randint(3, 6))))
+        lines.append(f"原型为 extern char *{name}(const char *arg); 返回值需要调用 kdk_{module}_free_info 释放。")
+    elif kind < 0.7:
+        lines.append(f"The {name}() function {desc_en}. " + "".join(en_sentence(rng) for _ in range(rng.randint(1, 3))))
+        lines.append(f"See also kdk_{module}_get_info and kdk_{module}_free_info.")
+    elif kind < 0.9:
+        lines.append(f"{name} {desc_zh}，示例代码如下：")
+        lines.extend([
+            "",
+            "```c",
+            f"#include <kysdk/kysdk-{module}/libky{module}.h>",
+            f"extern char *{name}(const char *arg);",
+            f"char *ret = {name}(NULL);",
+            "if (ret) {",
+            "    printf(\"%s\\n\", ret);",
+            "    free(ret);",
+            "}",
+            "```"
+        ])
+    else:
+        lines.append(f"Python 绑定通过 D-Bus 调用 {name}。" + zh_sentence(rng))
+        lines.extend([
+            "",
+            "```python",
+            f"from kysdk import {module}",
+            f"value = {module}.{name}()",
+            "print(value)",
+            "```"
+        ])
+    
+    section = "\n".join(lines)
+    while len(section) < MIN_SECTION_CHARS:
+        section += "\n" + (en_sentence(rng) if 0.4 <= kind < 0.7 else zh_sentence(rng))
+    return section
+
+def generate_corpus(directory: str, chunks: int, sections_per_file: int, seed: int = 42):
+    """
+    在目录中生成约 chunks 个文档块的Markdown文件，返回 (文件列表, 总字节数)
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    file_paths, total_bytes = [], 0
+    for index in range(0, chunks, sections_per_file):
+        count = min(sections_per_file, chunks - index)
+        module = rng.choice(MODULES)
+        text = f"# libky{module} 开发指南 {index // sections_per_file}\n\n" + \
+            "\n\n".join(make_section(rng) for _ in range(count)) + "\n"
+        path = os.path.join(directory, f"sdk_{index // sections_per_file:05d}.md")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        file_paths.append(path)
+        total_bytes += len(text.encode('utf-8'))
+    return file_paths, total_bytes
+
+def make_queries(count: int, seed: int = 7):
+    """
+    生成接口名、中文和英文三类查询
+    """
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        name, module, desc_zh, desc_en = make_symbol(rng)
+        queries.append(rng.choice([
+            f"{name} 怎么用",
+            f"如何{desc_zh}",
+            f"Which function {desc_en}?"
+        ]))
+    return queries
+
+def percentile(values, pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def mb(size: float) -> float:
+    return round(size / 1024 / 1024, 2)
+
+def measure_load(db_path: str) -> dict:
+    """
+    在新进程中加载索引，测量加载耗时、增加的常驻内存和首次检索耗时
+    """
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--load-only', db_path],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def load_only(db_path: str):
+    """
+    --load-only 的子进程入口：先完成分词器初始化，再只测量索引本身
+    """
+    tokenize_chinese("预热分词词典")
+    rss_before = resident_memory() or 0
+    start = time.perf_counter()
+    store = VectorStore(db_path)
+    load_seconds = time.perf_counter() - start
+    rss_after = resident_memory() or 0
+    
+    # 首次检索包含惰性构建倒排索引等一次性开销
+    start = time.perf_counter()
+    store.search(make_queries(1)[0], top_k=RAG_CONFIG.get('top_k', 5))
+    first_search = time.perf_counter() - start
+    
+    print(json.dumps({
+        'documents': len(store.documents),
+        'seconds': round(load_seconds, 4),
+        'rss_delta_mb': mb(rss_after - rss_before),
+        'first_search_ms': round(first_search * 1000, 2)
+    }))
+
+def run_size(size: int, work_dir: str, args) -> dict:
+    """
+    对一个规模完整执行一轮测量
+    """
+    corpus_dir = os.path.join(work_dir, f"corpus_{size}")
+    db_path = os.path.join(work_dir, f"index_{size}")
+    file_paths, corpus_bytes = generate_corpus(corpus_dir, size, args.sections_per_file)
+    
+    # 文档处理（与 RAGEngine.add_documents 相同，按文件并行解析）
+    processor = DocumentProcessor()
+    per_file = []
+    start = time.perf_counter()
+    for file_path, chunks, error in processor.iter_process_files(file_paths, args.workers):
+        if error is not None:
+            raise error
+        per_file.append(chunks)
+    process_seconds = time.perf_counter() - start
+    chunk_count = sum(len(chunks) for chunks in per_file)
+    
+    # 建索引：逐文件写入，最后统一保存
+    rss_before = resident_memory() or 0
+    store = VectorStore(db_path)
+    start = time.perf_counter()
+    for chunks in per_file:
+        store.add_documents(chunks, save=False)
+    add_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    store.save()
+    save_seconds = time.perf_counter() - start
+    rss_after = resident_memory() or 0
+    
+    # 检索延迟
+    queries = make_queries(args.queries)
+    top_k = RAG_CONFIG.get('top_k', 5)
+    store.search(queries[0], top_k=top_k)  # 预热
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        store.search(query, top_k=top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    
+    disk_bytes = store.disk_usage()
+    del store
+    
+    return {
+        'size': size,
+        'chunks': chunk_count,
+        'files': len(file_paths),
+        'corpus_mb': mb(corpus_bytes),
+        'processing': {
+            'workers': min(args.workers or PERFORMANCE_CONFIG.get('max_concurrent_processes', 4), len(file_paths)),
+            'seconds': round(process_seconds, 3),
+            'files_per_s': round(len(file_paths) / process_seconds, 1),
+            'chunks_per_s': round(chunk_count / process_seconds, 1),
+            'mb_per_s': round(corpus_bytes / 1024 / 1024 / process_seconds, 3)
+        },
+        'indexing': {
+            'add_seconds': round(add_seconds, 3),
+            'save_seconds': round(save_seconds, 3),
+            'chunks_per_s': round(chunk_count / add_seconds, 1),
+            'rss_delta_mb': mb(rss_after - rss_before)
+        },
+        'disk_mb': mb(disk_bytes),
+        'load': measure_load(db_path),
+        'search': {
+            'queries': len(queries),
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'mean_ms': round(sum(latencies) / len(latencies), 3)
+        }
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ''
+
+def flatten(data: dict, prefix: str = '') -> dict:
+    items = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            items.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)):
+            items[prefix + key] = value
+    return items
+
+def compare(report: dict, baseline: dict):
+    """
+    将本次结果与基线逐项对比，输出到标准错误
+    """
+    base_results = {result['size']: result for result in baseline.get('results', [])}
+    print(f"与基线 {baseline.get('git_commit') or '?'} 对比：", file=sys.stderr)
+    for result in report['results']:
+        base = base_results.get(result['size'])
+        if base is None:
+            continue
+        print(f"== {result['size']} 个文档块 ==", file=sys.stderr)
+        old = flatten(base)
+        for key, value in flatten(result).items():
+            if key in old and old[key]:
+                change = (value - old[key]) / old[key] * 100
+                print(f"  {key:28s} {old[key]:>12} -> {value:<12} ({change:+.1f}%)", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description='文档处理、建索引、加载和检索全流程基准')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='文档块规模')
+    parser.add_argument('--queries', type=int, default=500, help='检索延迟测量的查询数')
+    parser.add_argument('--sections-per-file', type=int, default=100, help='每个合成文档的接口小节数')
+    parser.add_argument('--workers', type=int, help='文档处理进程数，默认取 max_concurrent_processes')
+    parser.add_argument('--output', type=str, help='结果JSON文件，默认写到标准输出')
+    parser.add_argument('--baseline', type=str, help='与之对比的历史结果JSON文件')
+    parser.add_argument('--work-dir', type=str, help='语料和索引目录，默认使用临时目录并在结束后删除')
+    parser.add_argument('--load-only', type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger('jieba').setLevel(logging.WARNING)
+    
+    if args.load_only:
+        load_only(args.load_only)
+        return 0
+    
+    # 分词词典只加载一次，不计入各项测量
+    tokenize_chinese("预热分词词典")
+    
+    report = {
+        'benchmark': 'index',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'chunk_size': VECTOR_CONFIG.get('chunk_size', 500),
+            'chunk_overlap': VECTOR_CONFIG.get('chunk_overlap', 50),
+            'hash_features': VECTOR_CONFIG.get('hash_features', 2 ** 18),
+            'search_mode': VECTOR_CONFIG.get('search_mode', 'inverted'),
+            'top_k': RAG_CONFIG.get('top_k', 5)
+        },
+        'results': []
+    }
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_dir = args.work_dir or tmp_dir
+        for size in args.sizes:
+            print(f"测量 {size} 个文档块...", file=sys.stderr)
+            report['results'].append(run_size(size, work_dir, args))
+    
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            compare(report, json.load(f))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
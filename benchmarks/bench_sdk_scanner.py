@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SDK接口提取基准 - 对比单遍扫描器与原先的多次 re.findall 实现
+
+先在回归语料上逐块校验两种实现的输出一致（按类别比较符号集合），
+再分别测量每MB文本的处理耗时。
+
+用法:
+    python benchmarks/bench_sdk_scanner.py --chunks 2000 --fuzz 20000
+"""
+
+import sys
+import os
+import re
+import time
+import random
+import logging
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from document_processor import SDKInterfaceScanner
+
+def legacy_extract(content: str):
+    """
+    原先的实现：15个未预编译的正则分别 findall 后用 set 去重
+    """
+    interfaces = {
+        'c_interfaces': [],
+        'dbus_interfaces': [],
+        'python_interfaces': [],
+        'api_calls': [],
+        'data_structures': []
+    }
+    groups = {
+        'c_interfaces': [
+            r'extern\s+[\w\s\*]+\s+(\w+)\s*\([^)]*\);',
+            r'[\w\s\*]+\s+(kdk_\w+)\s*\([^)]*\)',
+            r'typedef\s+struct\s+(\w+)',
+            r'#define\s+(\w+)\s+',
+        ],
+        'dbus_interfaces': [
+            r'(\w+)\s*\([^)]*\)\s*↦\s*\([^)]*\)',
+            r'interface\s+([\w\.]+)',
+            r'method\s+(\w+)',
+        ],
+        'python_interfaces': [
+            r'def\s+(\w+)\s*\([^)]*\)',
+            r'class\s+(\w+)',
+            r'import\s+([\w\.]+)',
+        ],
+        'api_calls': [
+            r'(\w+)\s*\(',
+            r'\.(\w+)\s*\(',
+        ],
+        'data_structures': [
+            r'struct\s+(\w+)',
+            r'enum\s+(\w+)',
+            r'typedef\s+\w+\s+(\w+)',
+        ],
+    }
+    for key, patterns in groups.items():
+        for pattern in patterns:
+            interfaces[key].extend(re.findall(pattern, content, re.MULTILINE))
+    for key in interfaces:
+        interfaces[key] = list(set(interfaces[key]))
+    return interfaces
+
+SNIPPETS = [
+    "extern int kdk_system_get_word(void);",
+    "extern char *kdk_system_get_version(bool verbose);",
+    "extern unsigned long long kdk_disk_get_size (const char *name);",
+    "char* ret = kdk_system_get_architecture();",
+    "调用 kdk_hw_get_cpu_info(cpu) 获取CPU信息，返回值需要 free(ret);",
+    "x kdk_a(y kdk_b(z)) kdk_c (w)",
+    "typedef struct _kdk_cpu_info { int cores; } kdk_cpu_info;",
+    "typedef unsigned int kdk_uint32;",
+    "typedef int (*kdk_callback)(void *data);",
+    "#define KDK_MAX_LEN 256\n#define  KDK_VERSION  \"2.5\"",
+    "GetSystemVersion(s name) ↦ (s version)",
+    "interface com.kylin.kysdk.SystemInfo\nmethod GetHostName",
+    "def get_system_info(self, detail=False):\n    return self.helper.query(detail)",
+    "class SystemInfo(object):\n    pass\nsubclass Foo",
+    "import kysdk.sysinfo\nfrom os import path",
+    "struct struct x; enum kdk_status { OK }; destruct y",
+    "obj.method(a).another ( b ) ; 函数调用(参数)",
+    "struct kdk_disk_info *info = kdk_disk_get_info(\"/dev/sda\");",
+    "  kdk_leading_call() at start",
+    "classmethod  foo\ntypedef  struct  bar",
+    "*kdk_ptr_call(x) (kdk_paren_call(y)) kdk_unclosed(",
+    "x kdk_(void) y kdk_ (z)",
+]
+
+WORDS = ["系统", "版本", "接口", "获取", "返回", "参数", "说明", "示例", "函数", "麒麟",
+         "the", "function", "returns", "value", "struct", "enum", "def", "class", "import",
+         "method", "interface", "extern", "typedef", "kdk_", "kdk_fn", "kdk_get_x", "#define", "obj.call"]
+PUNCT = ["(", ")", ";", "*", ",", "，", "。", ".", "↦", "\n", " ", "  ", "\t", "#", "{", "}"]
+
+def make_chunk(rng: random.Random) -> str:
+    """
+    生成一个SDK文档风格的文本块
+    """
+    parts = []
+    while sum(len(p) for p in parts) < 500:
+        if rng.random() < 0.3:
+            parts.append(rng.choice(SNIPPETS))
+        else:
+            parts.append("".join(rng.choices(WORDS, k=rng.randint(3, 12))))
+        parts.append(rng.choice(["\n", " ", "。", "；"]))
+    return "".join(parts)
+
+def make_fuzz(rng: random.Random) -> str:
+    """
+    生成由关键字、标识符和标点随机拼接的模糊测试文本
+    """
+    return "".join(rng.choice(WORDS) if rng.random() < 0.5 else rng.choice(PUNCT)
+                   for _ in range(rng.randint(5, 60)))
+
+def check(corpus, scanner: SDKInterfaceScanner) -> int:
+    """
+    校验两种实现的输出，返回不一致的块数
+    """
+    mismatches = 0
+    for text in corpus:
+        expected = {k: set(v) for k, v in legacy_extract(text).items()}
+        actual = {k: set(v) for k, v in scanner.scan(text).items()}
+        if expected != actual:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"不一致: {text!r}\n  期望: {expected}\n  实际: {actual}")
+    return mismatches
+
+def measure(func, corpus, repeat: int) -> float:
+    """
+    返回每MB文本的处理耗时(秒)
+    """
+    size_mb = sum(len(text.encode('utf-8')) for text in corpus) / 1024 / 1024
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in corpus:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    return best / size_mb
+
+def main():
+    parser = argparse.ArgumentParser(description='SDK接口提取单遍扫描器基准')
+    parser.add_argument('--chunks', type=int, default=2000, help='SDK风格文本块数量')
+    parser.add_argument('--fuzz', type=int, default=20000, help='模糊测试文本数量')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    rng = random.Random(2024)
+    scanner = SDKInterfaceScanner()
+
+    corpus = SNIPPETS + [make_chunk(rng) for _ in range(args.chunks)]
+    fuzz = [make_fuzz(rng) for _ in range(args.fuzz)]
+
+    mismatches = check(corpus + fuzz, scanner)
+    print(f"回归校验: {len(corpus) + len(fuzz) - mismatches}/{len(corpus) + len(fuzz)} 一致")
+
+    legacy = measure(legacy_extract, corpus, args.repeat)
+    scanned = measure(scanner.scan, corpus, args.repeat)
+    print(f"多次findall: {legacy:.3f} s/MB")
+    print(f"单遍扫描器:  {scanned:.3f} s/MB")
+    print(f"加速比: {legacy / scanned:.1f}x")
+
+    return 1 if mismatches else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+检索性能基准 - 对比倒排索引与全量扫描两种检索路径
+
+用法:
+    python benchmarks/bench_search.py --sizes 10000 100000 --queries 200
+"""
+
+import sys
+import os
+import time
+import random
+import logging
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from vector_store import VectorStore
+
+WORDS = [
+    "系统", "版本", "内核", "网络", "配置", "安装", "软件包", "服务", "用户", "权限",
+    "硬件", "磁盘", "内存", "进程", "日志", "安全", "桌面", "应用", "接口", "调用",
+    "获取", "设置", "返回", "参数", "结构体", "函数", "库文件", "开发", "文档", "示例",
+]
+IDENTIFIERS = [
+    "kdk_system_get_version", "kdk_system_get_architecture", "kdk_system_get_hostName",
+    "kdk_hw_get_cpu_info", "kdk_disk_get_size", "kdk_net_get_ipaddr", "kdk_package_list",
+]
+
+def make_chunk(rng: random.Random) -> str:
+    """
+    生成一个合成文档块
+    """
+    words = rng.choices(WORDS, k=rng.randint(40, 80))
+    words.insert(rng.randrange(len(words)), rng.choice(IDENTIFIERS) + "()")
+    return "".join(words)
+
+def build_store(size: int, db_dir: str, seed: int = 42) -> VectorStore:
+    """
+    构建指定规模的向量存储
+    """
+    rng = random.Random(seed)
+    store = VectorStore(os.path.join(db_dir, f"bench_{size}"))
+    docs = [{'content': make_chunk(rng), 'chunk_id': i, 'source_file': 'synthetic'}
+            for i in range(size)]
+    store.add_documents(docs)
+    return store
+
+def time_queries(store: VectorStore, queries, top_k: int, mode: str):
+    """
+    以指定检索方式执行查询并返回每次耗时(ms)和结果
+    """
+    store.search_mode = mode
+    store.search(queries[0], top_k=top_k)  # 预热（倒排索引惰性构建）
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(store.search(query, top_k=top_k))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, results
+
+def percentile(values, pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def main():
+    parser = argparse.ArgumentParser(description='倒排索引 vs 全量扫描检索基准')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--top-k', type=int, default=5)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    rng = random.Random(7)
+    queries = [rng.choice(IDENTIFIERS) + " " + "".join(rng.choices(WORDS, k=3))
+               for _ in range(args.queries)]
+    
+    with tempfile.TemporaryDirectory() as db_dir:
+        for size in args.sizes:
+            start = time.perf_counter()
+            store = build_store(size, db_dir)
+            build_time = time.perf_counter() - start
+            
+            print(f"\n== {size} 个文档块 (构建 {build_time:.1f}s, nnz={sum(segment.vectors.nnz for segment in store.segments)}) ==")
+            stats = {}
+            for mode in ('dense', 'inverted'):
+                latencies, results = time_queries(store, queries, args.top_k, mode)
+                stats[mode] = results
+                print(f"{mode:>9}: p50={percentile(latencies, 50):.2f}ms "
+                      f"p99={percentile(latencies, 99):.2f}ms "
+                      f"mean={sum(latencies) / len(latencies):.2f}ms")
+            
+            same = sum(
+                [d['chunk_id'] for d in a] == [d['chunk_id'] for d in b]
+                for a, b in zip(stats['dense'], stats['inverted'])
+            )
+            print(f"结果一致: {same}/{len(queries)}")
+
+if __name__ == '__main__':
+    main()
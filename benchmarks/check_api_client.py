@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+API客户端校验 - 用本地模拟服务检查 SiliconFlowAPI 的流式解析、重试和截止时间
+
+模拟服务按预先排入的脚本逐块发送响应（HTTP/1.1 分块传输，每块立即刷新），
+客户端使用真实的 SiliconFlowAPI，只把 endpoint 指向模拟服务。检查项：
+    流式输出顺序    各片段按发送顺序逐个产出，第一个片段在响应结束前到达
+    UTF-8跨块       多字节字符和 data: 行被拆在两个网络分块之间时能正确拼接解码
+    [DONE]结束      收到 [DONE] 后停止产出；注释行、其他字段和无法解析的行被跳过
+    Retry-After     503/429 按 Retry-After（秒数或HTTP日期）等待后重试
+    指数退避        无 Retry-After 时按指数退避重试，次数不超过 max_retries
+    不可重试错误    4xx（429除外）不重试
+    截止时间        响应过慢、流式响应中途停顿、Retry-After 超出截止时间时按时返回错误
+    流式重试        流式请求在收到响应前遇到503会重试
+    流式限流许可    流式请求读取响应体期间占用限流许可，读完或提前关闭后归还
+    对冲计时        同步和异步接口在本地限流排队期间不计对冲时间、不发对冲，记录的延迟不含排队
+    连接复用        连续请求复用同一个keep-alive连接
+
+用法:
+    python benchmarks/check_api_client.py
+"""
+
+import sys
+import os
+import json
+import asyncio
+import time
+import queue
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from email.utils import formatdate
+
+from ai_models import SiliconFlowAPI, AsyncSiliconFlowAPI, API_ERROR_ANSWER, DEFAULT_MODEL
+from hedging import HedgePolicy
+from rate_limiter import AdaptiveLimiter
+
+SSE_HEADERS = {'Content-Type': 'text/event-stream'}
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        mock = self.server.mock
+        mock.record(self.client_address, payload)
+        
+        try:
+            script = mock.scripts.get_nowait()
+        except queue.Empty:
+            script = [('status', 500, JSON_HEADERS), ('chunk', b'{"error": "no script"}')]
+        
+        try:
+            for action in script:
+                if action[0] == 'status':
+                    self.send_response(action[1])
+                    for name, value in action[2].items():
+                        self.send_header(name, value)
+                    self.send_header('Transfer-Encoding', 'chunked')
+                    self.end_headers()
+                elif action[0] == 'chunk':
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(action[1]), action[1]))
+                    self.wfile.flush()
+                elif action[0] == 'sleep':
+                    time.sleep(action[1])
+            self.wfile.write(b'0\r\n\r\n')
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端已断开（超时或提前关闭流）
+            self.close_connection = True
+    
+    def log_message(self, format, *args):
+        pass
+
+class MockServer:
+    """
+    模拟的聊天完成服务
+    
+    每个POST请求按顺序取出一个脚本，脚本为动作列表：
+        ('status', 状态码, 响应头)   发送状态行和响应头
+        ('chunk', 字节串)           发送一个分块并立即刷新
+        ('sleep', 秒)               等待
+    脚本执行完后发送结束分块；没有脚本时返回500。
+    """
+    
+    def __init__(self):
+        self.scripts: 'queue.Queue[List[Tuple]]' = queue.Queue()
+        self.requests: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+    
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_port}/v1/chat/completions"
+    
+    def start(self):
+        self.thread.start()
+    
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+    
+    def reset(self):
+        while not self.scripts.empty():
+            self.scripts.get_nowait()
+        with self._lock:
+            self.requests = []
+    
+    def push(self, *scripts: List[Tuple]):
+        for script in scripts:
+            self.scripts.put(script)
+    
+    def record(self, client_address: Tuple[str, int], payload: Dict[str, Any]):
+        with self._lock:
+            self.requests.append({'time': time.monotonic(), 'client': client_address, 'payload': payload})
+
+def sse_event(data: Any) -> bytes:
+    """
+    一个SSE data 事件
+    """
+    text = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False)
+    return f"data: {text}\n\n".encode('utf-8')
+
+def delta(text: str) -> Dict[str, Any]:
+    return {'choices': [{'index': 0, 'delta': {'content': text}}]}
+
+OK_BODY = {'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': '好的'}}]}
+MESSAGES = [{'role': 'user', 'content': '你好'}]
+
+def json_response(body: Dict[str, Any], status: int = 200, headers: Optional[Dict[str, str]] = None,
+                  delay: float = 0.0) -> List[Tuple]:
+    """
+    返回JSON响应的脚本，delay 为发送响应头之前的等待时间
+    """
+    script = [('sleep', delay)] if delay else []
+    return script + [('status', status, dict(JSON_HEADERS, **(headers or {}))),
+                     ('chunk', json.dumps(body).encode('utf-8'))]
+
+def make_client(server: MockServer, **settings) -> SiliconFlowAPI:
+    """
+    指向模拟服务的客户端，关闭对冲和限流，使请求顺序确定；settings 覆盖重试参数等属性
+    """
+    api = SiliconFlowAPI(api_key='test-key', hedge_policy=HedgePolicy({'enabled': False}),
+                         rate_limiter=AdaptiveLimiter({'enabled': False}))
+    api.endpoint = server.url
+    for name, value in settings.items():
+        setattr(api, name, value)
+    return api
+
+def request_gaps(server: MockServer) -> List[float]:
+    """
+    相邻两次请求到达模拟服务的时间间隔(秒)
+    """
+    times = [request['time'] for request in server.requests]
+    return [later - earlier for earlier, later in zip(times, times[1:])]
+
+def expect(condition: bool, message: str):
+    if not condition:
+        raise AssertionError(message)
+
+def check_stream_order(server: MockServer):
+    texts = ['银河', '麒麟', '操作系统', ' SDK ', '开发指南。']
+    script = [('status', 200, SSE_HEADERS)]
+    for text in texts:
+        script += [('chunk', sse_event(delta(text))), ('sleep', 0.05)]
+    script += [('sleep', 0.5), ('chunk', sse_event('[DONE]'))]
+    server.push(script)
+    
+    api = make_client(server)
+    start = time.monotonic()
+    received, first = [], None
+    for text in api.generate_answer_stream('麒麟系统是什么'):
+        if first is None:
+            first = time.monotonic() - start
+        received.append(text)
+    total = time.monotonic() - start
+    
+    expect(received == texts, f"片段顺序不符: {received}")
+    expect(server.requests[-1]['payload'].get('stream') is True, "请求未设置 stream=True")
+    expect(first < 0.4 < total, f"第一个片段未在响应结束前到达: 首片段 {first:.2f}s，总计 {total:.2f}s")
+
+def check_utf8_split(server: MockServer):
+    first = sse_event(delta('麒麟系统'))
+    # 切在“麒”的三个字节中间
+    cut = first.index('麒'.encode('utf-8')) + 1
+    second = sse_event(delta('版本号'))
+    server.push([
+        ('status', 200, SSE_HEADERS),
+        ('chunk', first[:cut]), ('sleep', 0.05), ('chunk', first[cut:]),
+        # 切在 "data:" 前缀中间
+        ('chunk', second[:2]), ('sleep', 0.05), ('chunk', second[2:]),
+        ('chunk', sse_event('[DONE]'))
+    ])
+    
+    received = list(make_client(server).generate_answer_stream('版本'))
+    expect(received == ['麒麟系统', '版本号'], f"跨块解码结果不符: {received}")
+
+def check_done(server: MockServer):
+    server.push([
+        ('status', 200, SSE_HEADERS),
+        ('chunk', b': keep-alive\n\n'),
+        ('chunk', sse_event(delta('甲'))),
+        ('chunk', b'event: ping\nid: 1\n\n'),
+        ('chunk', b'data: not-json\n\n'),
+        ('chunk', sse_event({'choices': [{'index': 0, 'delta': {}}]})),
+        ('chunk', sse_event(delta('乙'))),
+        ('chunk', sse_event('[DONE]')),
+        ('chunk', sse_event(delta('不应产出')))
+    ])
+    
+    received = list(make_client(server).generate_answer_stream('测试'))
+    expect(received == ['甲', '乙'], f"[DONE] 前后的产出不符: {received}")
+
+def check_retry_after(server: MockServer):
+    server.push(json_response({'error': 'busy'}, 503, {'Retry-After': '0.3'}),
+                json_response(OK_BODY))
+    
+    result = make_client(server, retry_backoff=0.05).chat_completion(MESSAGES)
+    gaps = request_gaps(server)
+    expect('error' not in result, f"重试后仍失败: {result}")
+    expect(len(server.requests) == 2, f"请求次数应为2，实际 {len(server.requests)}")
+    expect(0.3 <= gaps[0] < 0.55, f"未按 Retry-After 等待: 间隔 {gaps[0]:.2f}s")
+    
+    api = make_client(server)
+    http_date = api._parse_retry_after(formatdate(time.time() + 3, usegmt=True))
+    expect(http_date is not None and 1.5 <= http_date <= 3.0, f"HTTP日期格式解析错误: {http_date}")
+    expect(api._parse_retry_after('-5') == 0.0, "负数秒数应视为0")
+    expect(api._parse_retry_after('soon') is None, "无法解析的值应忽略")
+
+def check_backoff(server: MockServer):
+    server.push(json_response({'error': 'a'}, 500), json_response({'error': 'b'}, 502),
+                json_response(OK_BODY))
+    
+    result = make_client(server, retry_backoff=0.1, retry_backoff_max=1).chat_completion(MESSAGES)
+    gaps = request_gaps(server)
+    expect('error' not in result, f"重试后仍失败: {result}")
+    expect(len(gaps) == 2, f"请求次数应为3，实际 {len(server.requests)}")
+    # 第n次重试前等待 [backoff * 2^n / 2, backoff * 2^n]
+    expect(0.05 <= gaps[0] < 0.25 and 0.1 <= gaps[1] < 0.35, f"退避间隔不符: {gaps}")
+    
+    server.reset()
+    server.push(*[json_response({'error': 'busy'}, 503) for _ in range(4)])
+    result = make_client(server, max_retries=2, retry_backoff=0.01).chat_completion(MESSAGES)
+    expect('error' in result, "重试耗尽后应返回错误")
+    expect(len(server.requests) == 3, f"max_retries=2 时请求次数应为3，实际 {len(server.requests)}")
+
+def check_not_retryable(server: MockServer):
+    server.push(json_response({'error': 'bad request'}, 400), json_response(OK_BODY))
+    
+    result = make_client(server, retry_backoff=0.01).chat_completion(MESSAGES)
+    expect('error' in result, "400 应直接返回错误")
+    expect(len(server.requests) == 1, f"400 不应重试，实际请求 {len(server.requests)} 次")
+
+def check_deadline(server: MockServer):
+    # 响应头迟迟不到
+    server.push(json_response(OK_BODY, delay=2.0))
+    start = time.monotonic()
+    result = make_client(server, retry_backoff=0.01).chat_completion(MESSAGES, timeout=0.5)
+    elapsed = time.monotonic() - start
+    expect('error' in result, "超过截止时间应返回错误")
+    expect(elapsed < 1.0, f"未在截止时间附近返回: {elapsed:.2f}s")
+    
+    # Retry-After 超出截止时间时不再等待
+    server.reset()
+    server.push(json_response({'error': 'busy'}, 503, {'Retry-After': '5'}), json_response(OK_BODY))
+    start = time.monotonic()
+    result = make_client(server).chat_completion(MESSAGES, timeout=1.0)
+    elapsed = time.monotonic() - start
+    expect('error' in result and len(server.requests) == 1, f"不应等待超出截止时间的重试: {result}")
+    expect(elapsed < 0.5, f"等待了超出截止时间的 Retry-After: {elapsed:.2f}s")
+    
+    # 流式响应开始后中途停顿
+    server.reset()
+    server.push([('status', 200, SSE_HEADERS), ('chunk', sse_event(delta('甲'))), ('sleep', 2.0),
+                 ('chunk', sse_event(delta('乙'))), ('chunk', sse_event('[DONE]'))])
+    api = make_client(server)
+    api.timeout = 0.5
+    start = time.monotonic()
+    received = list(api.generate_answer_stream('测试'))
+    elapsed = time.monotonic() - start
+    expect(received[:1] == ['甲'] and len(received) == 2 and received[1].startswith(API_ERROR_ANSWER),
+           f"流式响应超时的产出不符: {received}")
+    expect(elapsed < 1.0, f"流式响应未在截止时间附近中止: {elapsed:.2f}s")
+
+def check_stream_retry(server: MockServer):
+    server.push(json_response({'error': 'busy'}, 503, {'Retry-After': '0'}),
+                [('status', 200, SSE_HEADERS), ('chunk', sse_event(delta('重试成功'))),
+                 ('chunk', sse_event('[DONE]'))])
+    
+    received = list(make_client(server, retry_backoff=0.01).generate_answer_stream('测试'))
+    expect(received == ['重试成功'], f"流式重试的产出不符: {received}")
+    expect(len(server.requests) == 2, f"请求次数应为2，实际 {len(server.requests)}")
+
+def check_stream_permit(server: MockServer):
+    stream = [('status', 200, SSE_HEADERS), ('chunk', sse_event(delta('甲'))), ('sleep', 0.2),
+              ('chunk', sse_event(delta('乙'))), ('chunk', sse_event('[DONE]'))]
+    server.push(stream, stream)
+    
+    limiter = AdaptiveLimiter({'requests_per_second': 0})
+    api = make_client(server, rate_limiter=limiter)
+    for close_early in (False, True):
+        events = api.generate_answer_stream('测试')
+        expect(next(events) == '甲', "未收到第一个片段")
+        in_flight = limiter.get_stats()['in_flight']
+        expect(in_flight == 1, f"读取响应体期间应占用1个许可，实际 {in_flight}")
+        if close_early:
+            events.close()
+        else:
+            expect(list(events) == ['乙'], "剩余片段不符")
+        in_flight = limiter.get_stats()['in_flight']
+        expect(in_flight == 0, f"流式请求{'关闭' if close_early else '结束'}后许可未归还: {in_flight}")
+
+def check_hedge_clock(server: MockServer):
+    # 主请求先在限流队列中等待0.5秒（超过0.2秒的对冲阈值），发出后0.1秒返回
+    queued, response_delay = 0.5, 0.1
+    
+    def setup():
+        server.reset()
+        server.push(json_response(OK_BODY, delay=response_delay), json_response(OK_BODY, delay=response_delay))
+        limiter = AdaptiveLimiter({'requests_per_second': 0, 'initial_concurrency': 1, 'max_concurrency': 1})
+        policy = HedgePolicy({'enabled': True, 'min_samples': 1, 'min_delay': 0.2, 'window': 1, 'max_burst': 5})
+        policy.record(DEFAULT_MODEL, 0.2)
+        # 占住唯一的并发名额，稍后归还
+        limiter.acquire()
+        threading.Timer(queued, lambda: limiter.release(0.0, None)).start()
+        return limiter, policy
+    
+    def verify(label: str, result: Dict[str, Any], policy: HedgePolicy):
+        expect('error' not in result, f"{label}请求失败: {result}")
+        stats = policy.get_stats()
+        expect(stats['hedges'] == 0 and len(server.requests) == 1,
+               f"{label}在本地排队期间发出了对冲: hedges={stats['hedges']}，请求数 {len(server.requests)}")
+        recorded = stats['thresholds'][DEFAULT_MODEL]
+        expect(recorded < queued, f"{label}记录的首字节延迟包含了排队时间: {recorded:.2f}s")
+    
+    limiter, policy = setup()
+    result = make_client(server, rate_limiter=limiter, hedge_policy=policy).chat_completion(MESSAGES)
+    verify('同步接口', result, policy)
+    
+    limiter, policy = setup()
+    api = AsyncSiliconFlowAPI(api_key='test-key', hedge_policy=policy, rate_limiter=limiter)
+    api.endpoint = server.url
+    
+    async def run() -> Dict[str, Any]:
+        try:
+            return await api.achat_completion(MESSAGES)
+        finally:
+            await api.aclose()
+    verify('异步接口', asyncio.run(run()), policy)
+
+def check_keep_alive(server: MockServer):
+    server.push(json_response(OK_BODY), json_response(OK_BODY))
+    
+    api = make_client(server)
+    for _ in range(2):
+        expect('error' not in api.chat_completion(MESSAGES), "请求失败")
+    clients = [request['client'] for request in server.requests]
+    expect(clients[0] == clients[1], f"连续请求未复用连接: {clients}")
+
+CHECKS = [
+    ('流式输出顺序', check_stream_order),
+    ('UTF-8跨块', check_utf8_split),
+    ('[DONE]结束', check_done),
+    ('Retry-After', check_retry_after),
+    ('指数退避', check_backoff),
+    ('不可重试错误', check_not_retryable),
+    ('截止时间', check_deadline),
+    ('流式重试', check_stream_retry),
+    ('流式限流许可', check_stream_permit),
+    ('对冲计时', check_hedge_clock),
+    ('连接复用', check_keep_alive),
+]
+
+def main():
+    parser = argparse.ArgumentParser(description='用本地模拟服务校验API客户端')
+    parser.add_argument('-k', '--only', help='只运行名称包含该字符串的检查项')
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.CRITICAL)
+    server = MockServer()
+    server.start()
+    
+    failures = 0
+    try:
+        for name, check in CHECKS:
+            if args.only and args.only not in name:
+                continue
+            server.reset()
+            try:
+                check(server)
+                print(f"{name}: 通过")
+            except AssertionError as e:
+                failures += 1
+                print(f"{name}: 失败 - {e}")
+    finally:
+        server.stop()
+    
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+语义缓存校验 - 检查相近问题复用回答、含义相反的问题不复用
+
+每个用例先缓存一个问题，再用另一个问题查询（检索到的首个文档块相同），检查是否命中：
+    应命中的改写    在配置的阈值 PERFORMANCE_CONFIG['semantic_cache_threshold'] 下命中
+    含义相反的问题  阈值降为0时仍不命中，即只靠相反操作词/否定词判断排除，不依赖阈值
+另检查知识库版本：检索之后、写入缓存之前知识库发生变化(invalidate)时，旧版本的回答
+不写入缓存，之后的相近问题不会命中。
+
+用法:
+    python benchmarks/check_semantic_cache.py
+"""
+
+import sys
+import os
+import logging
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from semantic_cache import SemanticCache, canonical_question
+from vector_store import IncrementalTfidfVectorizer
+from config import PERFORMANCE_CONFIG
+
+# (已缓存的问题, 新问题, 是否应命中)
+CASES = [
+    ('怎么查看系统版本', '系统版本怎么看', True),
+    ('如何开启防火墙', '怎样开启防火墙', True),
+    ('怎么安装软件包', '如何装软件包', True),
+    ('开启防火墙', '关闭防火墙', False),
+    ('如何开启防火墙', '如何关闭防火墙', False),
+    ('怎么安装软件包', '怎么卸载软件包', False),
+    ('如何启用蓝牙', '如何禁用蓝牙', False),
+    ('如何启动网络服务', '如何停止网络服务', False),
+    ('如何开启防火墙', '为什么无法开启防火墙', False)
+]
+
+DOCS = [{'source_file': 'guide.md', 'chunk_id': 0}]
+RESULT = {'answer': '缓存的回答', 'relevant_docs': DOCS}
+
+def make_vectorizer() -> IncrementalTfidfVectorizer:
+    """
+    用全部用例问题拟合IDF（与服务中共用知识库向量化器的效果相近）
+    """
+    vectorizer = IncrementalTfidfVectorizer()
+    questions = [question for case in CASES for question in case[:2]]
+    vectorizer.partial_fit([canonical_question(question) for question in questions])
+    return vectorizer
+
+def check_generation(vectorizer: IncrementalTfidfVectorizer, threshold: float) -> int:
+    """
+    模拟查询进行中导入文档：查询按版本0检索，导入完成后缓存失效到版本1，查询随后写入回答
+    
+    Returns:
+        失败的检查项数
+    """
+    cache = SemanticCache(vectorizer.transform, threshold=threshold, generation=0)
+    stale_miss = cache.lookup('怎么查看系统版本', False, DOCS, 0) is None
+    cache.invalidate(1)
+    cache.add('怎么查看系统版本', False, RESULT, 0)
+    stale_rejected = cache.lookup('系统版本怎么看', False, DOCS, 1) is None and not cache.get_stats()['size']
+    
+    cache.add('怎么查看系统版本', False, RESULT, 1)
+    current_hit = cache.lookup('系统版本怎么看', False, DOCS, 1) is not None
+    old_query_miss = cache.lookup('系统版本怎么看', False, DOCS, 0) is None
+    
+    failures = 0
+    for name, ok in (('检索时未命中', stale_miss), ('失效后不写入旧版本的回答', stale_rejected),
+                     ('新版本的回答可命中', current_hit), ('旧版本的查询不命中新版本条目', old_query_miss)):
+        print(f"知识库版本 - {name}: {'通过' if ok else '失败'}")
+        failures += not ok
+    return failures
+
+def main():
+    logging.basicConfig(level=logging.CRITICAL)
+    vectorizer = make_vectorizer()
+    threshold = PERFORMANCE_CONFIG.get('semantic_cache_threshold', 0.85)
+    
+    failures = 0
+    for cached_question, question, expected in CASES:
+        # 应命中的用例使用配置的阈值；不应命中的用例关闭阈值，只检查相反词判断
+        cache = SemanticCache(vectorizer.transform, threshold=threshold if expected else 0.0)
+        cache.add(cached_question, False, RESULT, 0)
+        result = cache.lookup(question, False, DOCS, 0)
+        
+        similarity = (vectorizer.transform([canonical_question(cached_question)])
+                      @ vectorizer.transform([canonical_question(question)]).T).toarray()[0, 0]
+        hit = result is not None
+        status = '通过' if hit == expected else '失败'
+        if hit != expected:
+            failures += 1
+        print(f"{cached_question} -> {question}: 相似度 {similarity:.2f}，"
+              f"{'命中' if hit else '未命中'}（预期{'命中' if expected else '不命中'}）{status}")
+    
+    failures += check_generation(vectorizer, threshold)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -18,6 +18,7 @@ SILICONFLOW_API_ENDPOINT = "https://api.siliconflow.cn/v1/chat/completions"
 # 文档路径配置
 DOCUMENT_PATH = "./docs"
 VECTOR_DB_PATH = "./data/vector_db"
+QUERY_CACHE_PATH = "./data/query_cache.json"
 
 # 检测系统架构
 ARCH = platform.machine().lower()
@@ -85,6 +86,7 @@ GUI_CONFIG = {
 LOG_CONFIG = {
     "level": "INFO",
     "file": "./logs/app.log",
+    "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
     "max_size": 10 * 1024 * 1024,  # 10MB
     "backup_count": 5
 }
@@ -93,18 +95,95 @@ LOG_CONFIG = {
 VECTOR_CONFIG = {
     "chunk_size": 500,
     "chunk_overlap": 50,
-    "embedding_model": "text-embedding-ada-002"
+    "embedding_model": "text-embedding-ada-002",
+    "hash_features": 2 ** 18,  # 增量索引的哈希特征维度
+    "rebalance_growth": 2.0,  # 文档数增长到上次重平衡的该倍数时重新计算IDF权重
+    "search_mode": "inverted",  # 检索方式: inverted(倒排索引) / dense(全量扫描)
+    "max_segments": 8  # 索引磁盘分段数上限，超过后保存时合并
 }
 
 # RAG配置
 RAG_CONFIG = {
     "top_k": 5,
     "similarity_threshold": 0.7,
-    "max_context_length": 2000,
+    "max_context_tokens": 2000,  # 送入提示词的上下文token预算
+    "dedupe_threshold": 0.9,  # 文档块间相似度达到该值时视为重复，只保留排名靠前的
+    "compress_context": False,  # 生成前只保留文档块中与问题相关的句子
+    "compress_top_sentences": 3,  # 每个文档块保留的最相关句子数
+    "compress_neighbors": 1,  # 同时保留的前后相邻句数
+    "symbol_lookup": True,  # 问题中出现SDK符号时优先返回其定义所在文档块
+    "latency_budget": None,  # 查询延迟预算(秒)，超出时返回本地抽取式回答；None表示不限
+    "extractive_sentences": 5,  # 抽取式回答摘录的句子数
     "temperature": 0.7,
     "max_tokens": 1000
 }
 
+# 模型路由配置
+MODEL_ROUTER_CONFIG = {
+    # 默认关闭：开启后简单问题会路由到较小的模型，回答质量可能低于72B，需先用实际问题评估再开启
+    "enabled": False,
+    # 候选模型，按从小到大排列
+    "models": [
+        "Qwen/Qwen2.5-7B-Instruct",
+        "Qwen/Qwen2.5-14B-Instruct",
+        "Qwen/Qwen2.5-32B-Instruct",
+        "Qwen/Qwen2.5-72B-Instruct"
+    ],
+    "default_model": "Qwen/Qwen2.5-72B-Instruct",  # 路由关闭时使用的模型
+    "latency_slo": 10.0,  # 生成延迟SLO(秒)，模型近期P90超过该值时降级到更小的模型
+    "max_error_rate": 0.3,  # 模型近期错误率超过该值时降级
+    "min_samples": 5,  # 判断是否降级所需的最少调用次数
+    "window": 50,  # 每个模型保留的调用记录数
+    "history_seconds": 300,  # 调用记录有效期(秒)，过期后被降级的模型重新参与路由
+    "confident_similarity": 0.6,  # 最高相似度达到该值视为检索置信度高
+    "long_question_tokens": 60,  # 问题token数达到该值视为长问题
+    "large_context_tokens": 1500  # 上下文token数达到该值视为大上下文
+}
+
+# 对冲请求配置（降低API长尾延迟）
+HEDGING_CONFIG = {
+    "enabled": False,
+    "percentile": 90,  # 以该分位的首字节延迟作为对冲阈值
+    "min_samples": 20,  # 样本数达到该值后才开始对冲
+    "min_delay": 0.5,  # 对冲阈值下限(秒)
+    "window": 200,  # 每个模型保留的延迟样本数
+    "max_extra_ratio": 0.1,  # 对冲请求数不超过原请求数的该比例
+    "max_burst": 2,  # 最多积攒的对冲额度
+    "hedge_model": None  # 对冲使用的模型：None为同一模型，"fastest"为近期最快的可用模型，或指定模型名称
+}
+
+# API客户端限流配置（令牌桶 + AIMD自适应并发）
+RATE_LIMIT_CONFIG = {
+    "enabled": True,
+    "requests_per_second": 10.0,  # 令牌桶速率，0表示不限速
+    "burst": 20,  # 令牌桶容量
+    "initial_concurrency": 8,  # 初始并发上限
+    "min_concurrency": 1,
+    "max_concurrency": 32,
+    "latency_target": 10.0,  # 请求耗时不超过该值(秒)时才增大并发上限
+    "backoff_ratio": 0.5,  # 遇到429/503/超时时并发上限乘以该值
+    "decrease_interval": 1.0,  # 两次降低并发上限的最小间隔(秒)
+    "max_queue": 100,  # 最多排队的请求数
+    "max_wait": 30.0  # 排队最长等待时间(秒)
+}
+
+# 运行指标配置
+METRICS_CONFIG = {
+    "enabled": True,
+    "window": 1000,  # 每个延迟直方图保留的最近样本数，用于计算分位数
+    "export_path": None,  # 定期写出Prometheus文本格式指标的文件，如 "./logs/metrics.prom"，None表示不写出
+    "export_interval": 15  # 写出间隔(秒)
+}
+
+# 性能剖析配置（也可用 --profile 启动参数或运行时开关开启）
+PROFILE_CONFIG = {
+    "enabled": False,
+    "output_dir": "./logs/profiles",  # .prof 文件和文本报告的目录
+    "top_functions": 40,  # 报告中列出的函数数
+    "top_allocations": 25,  # 报告中列出的内存分配位置数
+    "tracemalloc_frames": 1  # 每次分配记录的调用栈深度，越大开销越高
+}
+
 # 系统配置
 SYSTEM_CONFIG = {
     "max_file_size": 50 * 1024 * 1024,  # 50MB
@@ -113,17 +192,33 @@ SYSTEM_CONFIG = {
 
 # 安全配置
 SECURITY_CONFIG = {
-    "api_timeout": 30,
-    "max_retries": 3
+    "api_timeout": 30,  # 单次API调用（含重试）的截止时间(秒)
+    "connect_timeout": 5,
+    "max_retries": 3,
+    "retry_backoff": 0.5,  # 指数退避基数(秒)
+    "retry_backoff_max": 8
 }
 
 # 性能配置
 PERFORMANCE_CONFIG = {
     "max_concurrent_processes": 4,
-    "cache_size": 100,
+    "max_concurrent_requests": 16,  # 异步接口同时进行的API请求上限
+    "cache_size": 100,  # 查询结果缓存条目数，0表示不缓存
+    "cache_ttl": 3600,  # 查询结果缓存有效期(秒)
+    "cache_persist": False,  # 是否将查询结果缓存保存到 QUERY_CACHE_PATH
+    "semantic_cache_size": 200,  # 语义缓存条目数，0表示不启用
+    "semantic_cache_threshold": 0.85,  # 语义缓存命中所需的问题相似度
     "batch_size": 32
 }
 
+# HTTP服务配置
+SERVICE_CONFIG = {
+    "host": "127.0.0.1",
+    "port": 8000,
+    "workers": 8,  # 检索和文档导入使用的线程数
+    "admin_token": ""  # /ingest 和 /profile 的访问令牌，为空时这两个接口拒绝所有请求
+}
+
 # 开发配置
 DEV_CONFIG = {
     "debug": False,
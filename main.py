@@ -14,13 +14,15 @@ from pathlib import Path
 # 添加src目录到Python路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from config import LOG_CONFIG, GUI_CONFIG, validate_config
-from gui import KylinQAApp
+from config import LOG_CONFIG, GUI_CONFIG, PERFORMANCE_CONFIG, METRICS_CONFIG, PROFILE_CONFIG, validate_config
 from system_info_helper import KylinSystemInfo
 
-def setup_logging():
+def setup_logging(stream=sys.stdout):
     """
     设置日志配置
+    
+    Args:
+        stream: 控制台日志输出流；命令行模式下标准输出用于结果，日志写到标准错误
     """
     log_dir = Path(LOG_CONFIG['file']).parent
     log_dir.mkdir(parents=True, exist_ok=True)
@@ -30,7 +32,7 @@ def setup_logging():
         format=LOG_CONFIG['format'],
         handlers=[
             logging.FileHandler(LOG_CONFIG['file'], encoding='utf-8'),
-            logging.StreamHandler(sys.stdout)
+            logging.StreamHandler(stream)
         ]
     )
 
@@ -54,19 +56,45 @@ def check_system_compatibility():
         for issue in config_issues:
             logger.warning(f"  - {issue}")
 
+def start_metrics_export():
+    """
+    按配置定期将运行指标以Prometheus文本格式写入文件
+    """
+    path = METRICS_CONFIG.get('export_path')
+    if not path:
+        return
+    from metrics import REGISTRY
+    REGISTRY.start_exporter(path, METRICS_CONFIG.get('export_interval', 15))
+
 def main():
     """
     主函数
     """
     parser = argparse.ArgumentParser(description='银河麒麟智能问答助手')
     parser.add_argument('--debug', action='store_true', help='启用调试模式')
-    parser.add_argument('--no-gui', action='store_true', help='命令行模式（暂未实现）')
+    parser.add_argument('--no-gui', action='store_true', help='命令行批量问答模式')
+    parser.add_argument('--input', type=str, default='-',
+                        help='命令行模式的问题文件(JSONL)，默认从标准输入读取')
+    parser.add_argument('--output', type=str, default='-',
+                        help='命令行模式的结果文件(JSONL)，默认写到标准输出')
+    parser.add_argument('--concurrency', type=int,
+                        default=PERFORMANCE_CONFIG.get('max_concurrent_requests', 16),
+                        help='命令行模式同时处理的问题数')
+    parser.add_argument('--system-info', action='store_true', help='命令行模式回答时包含系统信息')
+    parser.add_argument('--serve', action='store_true', help='HTTP服务模式')
+    parser.add_argument('--host', type=str, help='HTTP服务监听地址')
+    parser.add_argument('--port', type=int, help='HTTP服务监听端口')
     parser.add_argument('--config', type=str, help='指定配置文件路径')
+    parser.add_argument('--profile', action='store_true',
+                        help=f"剖析文档导入和查询，结果写入 {PROFILE_CONFIG.get('output_dir', './logs/profiles')}")
     
     args = parser.parse_args()
+    if args.profile:
+        # 在创建 RAGEngine 之前设置，引擎创建时即开启剖析
+        PROFILE_CONFIG['enabled'] = True
     
     # 设置日志
-    setup_logging()
+    setup_logging(sys.stderr if args.no_gui else sys.stdout)
     logger = logging.getLogger(__name__)
     
     logger.info("="*50)
@@ -81,12 +109,30 @@ def main():
         for directory in ['data', 'logs', 'docs']:
             Path(directory).mkdir(exist_ok=True)
         
+        start_metrics_export()
+        
         if args.no_gui:
-            logger.info("命令行模式暂未实现，请使用图形界面模式")
-            return 1
+            # 命令行模式不导入tkinter
+            from headless import run_headless
+            
+            logger.info(f"命令行批量问答模式，并发数 {args.concurrency}")
+            summary = run_headless(args.input, args.output, args.concurrency, args.system_info)
+            if METRICS_CONFIG.get('export_path'):
+                # 批量任务结束时写出最终的指标
+                from metrics import REGISTRY
+                REGISTRY.write_prometheus(METRICS_CONFIG['export_path'])
+            return 1 if summary['failed'] else 0
+        
+        if args.serve:
+            from api_server import run_server
+            
+            logger.info("启动HTTP服务...")
+            run_server(args.host, args.port)
+            return 0
         
         # 启动GUI应用
         logger.info("启动图形界面...")
+        from gui import KylinQAApp
         app = KylinQAApp()
         app.run()
         
@@ -5,40 +5,120 @@ AI模型接口模块 - 硅基流动API集成
 
 import requests
 import json
+import time
+import random
+import math
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
-from config import SILICONFLOW_API_KEY, SILICONFLOW_API_ENDPOINT, RAG_CONFIG
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Optional, Iterator, Callable
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from config import (SILICONFLOW_API_KEY, SILICONFLOW_API_ENDPOINT, RAG_CONFIG,
+                    SECURITY_CONFIG, PERFORMANCE_CONFIG, HEDGING_CONFIG, RATE_LIMIT_CONFIG)
+from hedging import HedgePolicy
+from rate_limiter import (AdaptiveLimiter, RateLimitExceeded, PRIORITY_INTERACTIVE,
+                          OUTCOME_OK, OUTCOME_OVERLOAD, OUTCOME_ERROR)
+from metrics import REGISTRY
+
+# 可重试的HTTP状态码：限流和服务端临时错误
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# 表示服务端过载、需要降低并发的HTTP状态码
+OVERLOAD_STATUS = {429, 503}
+
+# 每次HTTP请求（含重试和对冲）的运行指标
+API_REQUESTS = REGISTRY.counter('kylin_qa_api_requests_total', 'API请求次数（按结果：ok/overload/error/cancelled）')
+API_REQUEST_SECONDS = REGISTRY.histogram('kylin_qa_api_request_seconds', 'API请求耗时(秒)，流式请求计到响应体读完')
+API_FIRST_BYTE_SECONDS = REGISTRY.histogram('kylin_qa_api_first_byte_seconds', '成功的API请求收到响应头的耗时(秒)')
+
+# 未指定模型时使用的模型
+DEFAULT_MODEL = "Qwen/Qwen2.5-72B-Instruct"
+
+# 调用失败时返回给用户的提示语
+API_ERROR_ANSWER = "抱歉，生成回答时出现错误："
+PARSE_ERROR_ANSWER = "抱歉，无法解析AI回答，请稍后重试。"
+
+def is_error_answer(answer: str) -> bool:
+    """
+    判断回答是否为API调用失败时的提示语（这类回答不应被缓存）
+    """
+    return not answer or API_ERROR_ANSWER in answer or PARSE_ERROR_ANSWER in answer
 
 class SiliconFlowAPI:
     """
     硅基流动API接口类
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, hedge_policy: Optional[HedgePolicy] = None,
+                 rate_limiter: Optional[AdaptiveLimiter] = None):
         self.api_key = api_key or SILICONFLOW_API_KEY
         self.endpoint = SILICONFLOW_API_ENDPOINT
         self.logger = logging.getLogger(__name__)
         
+        # 请求截止时间与重试策略
+        self.timeout = SECURITY_CONFIG.get('api_timeout', 30)
+        self.connect_timeout = SECURITY_CONFIG.get('connect_timeout', 5)
+        self.max_retries = SECURITY_CONFIG.get('max_retries', 3)
+        self.retry_backoff = SECURITY_CONFIG.get('retry_backoff', 0.5)
+        self.retry_backoff_max = SECURITY_CONFIG.get('retry_backoff_max', 8)
+        
+        # 复用连接的会话，避免每次提问都重新建立TCP+TLS连接
+        # 连接数按限流器的最大并发计，另留出对冲副本同时在途的余量
+        self.session = requests.Session()
+        max_concurrency = RATE_LIMIT_CONFIG.get('max_concurrency', 32)
+        hedge_room = max(HEDGING_CONFIG.get('max_burst', 2),
+                         math.ceil(max_concurrency * HEDGING_CONFIG.get('max_extra_ratio', 0.1)))
+        pool_size = max(max_concurrency + hedge_room, 10)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # 对冲请求：主请求和对冲副本在线程池中执行，调用线程等待先返回的一个
+        self.hedge_policy = hedge_policy or HedgePolicy(HEDGING_CONFIG)
+        self._hedge_workers = pool_size * 2
+        self._hedge_executor = None
+        self._hedge_lock = threading.Lock()
+        
+        # 客户端限流：令牌桶 + AIMD自适应并发，同步和异步接口可共用一个
+        self.rate_limiter = rate_limiter or AdaptiveLimiter(RATE_LIMIT_CONFIG)
+        
         if not self.api_key or self.api_key == "YOUR_API_KEY_HERE":
             self.logger.warning("硅基流动API密钥未配置")
     
     def chat_completion(self, messages: List[Dict[str, str]], 
-                       model: str = "Qwen/Qwen2.5-72B-Instruct",
+                       model: str = DEFAULT_MODEL,
                        temperature: float = 0.7,
                        max_tokens: int = 1000,
-                       stream: bool = False) -> Dict[str, Any]:
+                       stream: bool = False,
+                       timeout: Optional[float] = None,
+                       priority: int = PRIORITY_INTERACTIVE) -> Dict[str, Any]:
         """
         调用硅基流动聊天完成API
         
+        限流(429)和服务端错误(5xx)按指数退避重试，遵循 Retry-After；
+        包括重试在内的整个调用不超过 timeout 秒。开启对冲时，超过对冲阈值仍未
+        收到响应（流式为第一个事件）会再发一个副本，使用先成功返回的一个。
+        
         Args:
             messages: 对话消息列表
             model: 模型名称，默认使用Qwen2.5-72B-Instruct
             temperature: 温度参数
             max_tokens: 最大token数
             stream: 是否流式输出
+            timeout: 整个调用的截止时间(秒)，默认 SECURITY_CONFIG['api_timeout']
+            priority: 限流排队优先级，交互请求先于批量请求
             
         Returns:
-            API响应结果
+            API响应结果；stream=True 时返回逐个产出增量事件的生成器
         """
         headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -53,34 +133,322 @@ class SiliconFlowAPI:
             'stream': stream
         }
         
-        try:
-            response = requests.post(
-                self.endpoint,
-                headers=headers,
-                json=payload,
-                timeout=30
+        deadline = time.monotonic() + (timeout or self.timeout)
+        
+        if stream:
+            if not self.hedge_policy.enabled:
+                return self._stream_completion(headers, payload, deadline, priority)
+        
+            first, events = self._hedged(
+                lambda m, on_sent: self._open_stream(headers, dict(payload, model=m), deadline, priority, on_sent),
+                model,
+                failed=lambda opened: opened[0] is None or "error" in opened[0],
+                discard=lambda opened: opened[1].close()
             )
-            response.raise_for_status()
+            return events if first is None else itertools.chain([first], events)
+        
+        if not self.hedge_policy.enabled:
+            return self._complete(headers, payload, deadline, priority)
+        
+        return self._hedged(
+            lambda m, on_sent: self._complete(headers, dict(payload, model=m), deadline, priority, on_sent),
+            model,
+            failed=lambda response: "error" in response,
+            discard=lambda response: None
+        )
+    
+    def _complete(self, headers: Dict[str, str], payload: Dict[str, Any],
+                  deadline: float, priority: int = PRIORITY_INTERACTIVE,
+                  on_sent: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+        """
+        发送一次非流式请求，on_sent 见 _post
+        
+        Returns:
+            API响应结果，失败时为 {"error": ...}
+        """
+        try:
+            response = self._post(headers, payload, deadline, priority=priority, on_sent=on_sent)
             return response.json()
             
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ValueError, RateLimitExceeded) as e:
             self.logger.error(f"硅基流动API调用失败: {e}")
             return {"error": str(e)}
     
-    def generate_answer(self, question: str, context: str = "", 
-                       include_system_info: bool = False,
-                       system_info: str = "") -> str:
+    def _open_stream(self, headers: Dict[str, str], payload: Dict[str, Any],
+                     deadline: float, priority: int = PRIORITY_INTERACTIVE,
+                     on_sent: Optional[Callable[[], None]] = None):
         """
-        生成问答回复
+        发起流式请求并读取第一个事件，on_sent 见 _post
+        
+        Returns:
+            (第一个事件或None, 剩余事件的生成器)
+        """
+        events = self._stream_completion(headers, payload, deadline, priority, on_sent)
+        return next(events, None), events
+    
+    def _get_hedge_executor(self) -> ThreadPoolExecutor:
+        with self._hedge_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=self._hedge_workers, thread_name_prefix='api-hedge'
+                )
+            return self._hedge_executor
+    
+    def _timed_start(self, start: Callable[[str, Callable[[], None]], Any], model: str,
+                     failed: Callable[[Any], bool], dispatched: Optional[threading.Event] = None) -> Any:
+        """
+        执行一次请求，成功时记录首字节延迟
+        
+        延迟从最后一次实际发出请求时算起，不含限流排队和重试前的等待；
+        请求发出时设置 dispatched。
+        """
+        sent = []
+        
+        def on_sent():
+            sent.append(time.monotonic())
+            if dispatched is not None:
+                dispatched.set()
+        
+        outcome = start(model, on_sent)
+        if not failed(outcome) and sent:
+            self.hedge_policy.record(model, time.monotonic() - sent[-1])
+        return outcome
+    
+    def _hedged(self, start: Callable[[str], Any], model: str,
+                failed: Callable[[Any], bool], discard: Callable[[Any], None]) -> Any:
+        """
+        以对冲方式执行请求
+        
+        主请求实际发出（已通过本地限流排队）后超过对冲阈值仍未返回、且额外负载
+        额度允许时，再发一个副本；主请求还在本地排队时不计时、不对冲。
+        取先成功返回的结果，先返回的失败时继续等待另一个。落败的请求若尚未返回，
+        在其返回后由 discard 释放（流式请求会关闭连接，停止生成）。
         
         Args:
-            question: 用户问题
-            context: 相关文档上下文
-            include_system_info: 是否包含系统信息
-            system_info: 系统信息
-            
+            start: 以模型名称和发出时的回调发起请求并返回结果的函数
+            model: 主请求的模型
+            failed: 判断结果是否失败
+            discard: 释放落败请求的结果
+        
         Returns:
-            AI生成的回答
+            胜出请求的结果
+        """
+        policy = self.hedge_policy
+        executor = self._get_hedge_executor()
+        delay = policy.begin(model)
+        
+        dispatched = threading.Event()
+        primary = executor.submit(self._timed_start, start, model, failed, dispatched)
+        futures = {primary: False}
+        if delay is not None:
+            # 对冲计时从主请求发出时开始；未发出就已结束时不再等待
+            primary.add_done_callback(lambda future: dispatched.set())
+            dispatched.wait()
+            done, _ = wait(futures, timeout=delay)
+            hedge_model = None if done else policy.acquire(model, self.get_available_models())
+            if hedge_model:
+                self.logger.info(f"请求 {delay:.2f}秒 未响应，对冲到 {hedge_model}")
+                futures[executor.submit(self._timed_start, start, hedge_model, failed)] = True
+        
+        winner = None
+        pending = set(futures)
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            # 同时完成时成功的优先
+            for future in sorted(done, key=lambda f: failed(f.result())):
+                if winner is None and (not failed(future.result()) or not pending):
+                    winner = future
+                else:
+                    discard(future.result())
+        
+        for future in pending:
+            if not future.cancel():
+                future.add_done_callback(lambda f: discard(f.result()))
+        
+        if len(futures) > 1:
+            policy.finish(hedge_won=futures[winner])
+        return winner.result()
+    
+    def _post(self, headers: Dict[str, str], payload: Dict[str, Any], deadline: float,
+              stream: bool = False, priority: int = PRIORITY_INTERACTIVE,
+              on_sent: Optional[Callable[[], None]] = None) -> requests.Response:
+        """
+        在截止时间内发送请求，对可重试的错误做有上限的指数退避重试
+        
+        每次尝试前向限流器申请许可，收到响应后归还并报告结果；成功的流式请求
+        继续持有许可，由 _stream_completion 在响应体读完或生成器关闭时归还。
+        
+        Args:
+            on_sent: 每次取得限流许可、实际发出请求前调用（用于对冲计时）
+        
+        Returns:
+            状态码正常的响应
+            
+        Raises:
+            requests.exceptions.RequestException: 重试耗尽、遇到不可重试错误或超过截止时间
+            RateLimitExceeded: 本地限流排队已满或等待超时
+        """
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise requests.exceptions.Timeout("请求超过截止时间")
+            
+            self.rate_limiter.acquire(priority, remaining)
+            remaining = deadline - time.monotonic()
+            started = time.monotonic()
+            outcome = OUTCOME_ERROR
+            retry_after = None
+            try:
+                if remaining <= 0:
+                    outcome = None
+                    raise requests.exceptions.Timeout("请求超过截止时间")
+                
+                if on_sent:
+                    on_sent()
+                response = self.session.post(
+                    self.endpoint,
+                    headers=headers,
+                    json=payload,
+                    timeout=(min(self.connect_timeout, remaining), remaining),
+                    stream=stream
+                )
+                if response.status_code not in RETRYABLE_STATUS:
+                    response.raise_for_status()
+                    outcome = OUTCOME_OK
+                    return response
+                
+                if response.status_code in OVERLOAD_STATUS:
+                    outcome = OUTCOME_OVERLOAD
+                retry_after = self._parse_retry_after(response.headers.get('Retry-After'))
+                error = requests.exceptions.HTTPError(
+                    f"{response.status_code} Error: {response.reason}", response=response
+                )
+                response.close()
+                
+            except requests.exceptions.Timeout as e:
+                outcome = OUTCOME_OVERLOAD if outcome else None
+                error = e
+            except requests.exceptions.ConnectionError as e:
+                error = e
+            finally:
+                latency = time.monotonic() - started
+                if outcome == OUTCOME_OK:
+                    API_FIRST_BYTE_SECONDS.observe(latency)
+                if not (stream and outcome == OUTCOME_OK):
+                    self._release(latency, latency, outcome, retry_after)
+            
+            if attempt >= self.max_retries:
+                raise error
+            
+            delay = self._retry_delay(attempt, retry_after)
+            if time.monotonic() + delay >= deadline:
+                raise error
+            
+            attempt += 1
+            self.logger.warning(f"硅基流动API调用失败，{delay:.1f}秒后第{attempt}次重试: {error}")
+            time.sleep(delay)
+    
+    def _release(self, first_byte: float, latency: float, outcome: Optional[str],
+                 retry_after: Optional[float] = None):
+        """
+        归还限流许可并记录请求指标
+        
+        并发上限按首字节延迟调整（与 latency_target 比较，不受回答长度影响），
+        耗时指标记录到最后一个字节。
+        """
+        self.rate_limiter.release(first_byte, outcome, retry_after)
+        API_REQUESTS.inc(outcome=outcome or 'cancelled')
+        API_REQUEST_SECONDS.observe(latency)
+    
+    def _retry_delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        """
+        计算第attempt次重试前的等待时间：指数退避（带抖动），服务端给出 Retry-After 时以其为准
+        """
+        if retry_after is not None:
+            return retry_after
+        backoff = min(self.retry_backoff_max, self.retry_backoff * (2 ** attempt))
+        return random.uniform(backoff / 2, backoff)
+    
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """
+        解析 Retry-After 头（秒数或HTTP日期）
+        """
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError, IndexError):
+            return None
+    
+    def _stream_completion(self, headers: Dict[str, str], payload: Dict[str, Any],
+                           deadline: float, priority: int = PRIORITY_INTERACTIVE,
+                           on_sent: Optional[Callable[[], None]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        以SSE方式调用API，逐个产出解析后的事件
+        
+        只在收到响应前重试；开始产出后超过截止时间即中止。限流许可持有到响应体
+        读完、出错或生成器被关闭（如对冲落败）为止。
+        
+        Yields:
+            API返回的增量事件（含 choices[0].delta），出错时产出一个 {"error": ...}
+        """
+        response = None
+        # 生成器被提前关闭时按取消处理，不调整并发上限
+        outcome = None
+        try:
+            response = self._post(headers, payload, deadline, stream=True, priority=priority, on_sent=on_sent)
+            opened = time.monotonic()
+            with response:
+                # chunk_size=None 按到达的分块读取，避免凑满缓冲区才产出；
+                # SSE未声明字符集时requests会按ISO-8859-1解码，这里按字节读取后自行UTF-8解码
+                for line in response.iter_lines(chunk_size=None):
+                    if time.monotonic() > deadline:
+                        raise requests.exceptions.Timeout("流式响应超过截止时间")
+                    if not line or not line.startswith(b'data:'):
+                        continue
+                    data = line[5:].strip()
+                    if data == b'[DONE]':
+                        break
+                    try:
+                        yield json.loads(data.decode('utf-8'))
+                    except ValueError as e:
+                        self.logger.warning(f"解析流式响应失败: {e}")
+            outcome = OUTCOME_OK
+            
+        except (requests.exceptions.RequestException, RateLimitExceeded) as e:
+            if response is not None:
+                outcome = OUTCOME_OVERLOAD if isinstance(e, requests.exceptions.Timeout) else OUTCOME_ERROR
+            self.logger.error(f"硅基流动API调用失败: {e}")
+            yield {"error": str(e)}
+        finally:
+            if response is not None:
+                first_byte = response.elapsed.total_seconds()
+                self._release(first_byte, first_byte + time.monotonic() - opened, outcome)
+    
+    def _extract_answer(self, response: Dict[str, Any]) -> str:
+        """
+        从API响应中提取回答文本
+        """
+        if "error" in response:
+            return f"{API_ERROR_ANSWER}{response['error']}"
+        
+        try:
+            return response['choices'][0]['message']['content']
+        except (KeyError, IndexError) as e:
+            self.logger.error(f"解析API响应失败: {e}")
+            return PARSE_ERROR_ANSWER
+    
+    def _build_messages(self, question: str, context: str = "",
+                        include_system_info: bool = False,
+                        system_info: str = "") -> List[Dict[str, str]]:
+        """
+        构建问答消息列表
         """
         # 构建系统提示词
         system_prompt = """
@@ -98,26 +466,86 @@ class SiliconFlowAPI:
         if include_system_info and system_info:
             user_message += f"\n\n当前系统信息：\n{system_info}"
         
-        messages = [
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_message}
         ]
+    
+    def generate_answer(self, question: str, context: str = "", 
+                       include_system_info: bool = False,
+                       system_info: str = "",
+                       model: Optional[str] = None,
+                       priority: int = PRIORITY_INTERACTIVE) -> str:
+        """
+        生成问答回复
+        
+        Args:
+            question: 用户问题
+            context: 相关文档上下文
+            include_system_info: 是否包含系统信息
+            system_info: 系统信息
+            model: 模型名称，默认 DEFAULT_MODEL
+            priority: 限流排队优先级
+            
+        Returns:
+            AI生成的回答
+        """
+        messages = self._build_messages(question, context, include_system_info, system_info)
         
         # 调用API
         response = self.chat_completion(
             messages=messages,
+            model=model or DEFAULT_MODEL,
             temperature=RAG_CONFIG.get('temperature', 0.7),
-            max_tokens=RAG_CONFIG.get('max_tokens', 1000)
+            max_tokens=RAG_CONFIG.get('max_tokens', 1000),
+            priority=priority
         )
         
-        if "error" in response:
-            return f"抱歉，生成回答时出现错误：{response['error']}"
+        return self._extract_answer(response)
+    
+    def generate_answer_stream(self, question: str, context: str = "",
+                               include_system_info: bool = False,
+                               system_info: str = "",
+                               model: Optional[str] = None,
+                               priority: int = PRIORITY_INTERACTIVE) -> Iterator[str]:
+        """
+        流式生成问答回复
         
-        try:
-            return response['choices'][0]['message']['content']
-        except (KeyError, IndexError) as e:
-            self.logger.error(f"解析API响应失败: {e}")
-            return "抱歉，无法解析AI回答，请稍后重试。"
+        Args:
+            question: 用户问题
+            context: 相关文档上下文
+            include_system_info: 是否包含系统信息
+            system_info: 系统信息
+            model: 模型名称，默认 DEFAULT_MODEL
+            priority: 限流排队优先级
+            
+        Yields:
+            回答文本片段
+        """
+        messages = self._build_messages(question, context, include_system_info, system_info)
+        
+        events = self.chat_completion(
+            messages=messages,
+            model=model or DEFAULT_MODEL,
+            temperature=RAG_CONFIG.get('temperature', 0.7),
+            max_tokens=RAG_CONFIG.get('max_tokens', 1000),
+            stream=True,
+            priority=priority
+        )
+        
+        for event in events:
+            if "error" in event:
+                yield f"{API_ERROR_ANSWER}{event['error']}"
+                return
+            
+            try:
+                text = event['choices'][0].get('delta', {}).get('content')
+            except (KeyError, IndexError) as e:
+                self.logger.error(f"解析API响应失败: {e}")
+                continue
+            
+            if text:
+                yield text
     
     def get_available_models(self) -> List[str]:
         """
@@ -156,4 +584,268 @@ class SiliconFlowAPI:
             max_tokens=10
         )
         
-        return "error" not in response
\ No newline at end of file
+        return "error" not in response
+    
+    def close(self):
+        """
+        关闭连接池
+        """
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+            self._hedge_executor = None
+        self.session.close()
+
+class AsyncSiliconFlowAPI(SiliconFlowAPI):
+    """
+    硅基流动API异步接口类
+    
+    基于httpx.AsyncClient，通过信号量限制同时进行的请求数，
+    使单个进程可以同时处理大量问题。重试、退避、截止时间和对冲策略与同步接口一致，
+    落败的对冲请求会被直接取消。
+    """
+    
+    def __init__(self, api_key: Optional[str] = None, max_concurrency: Optional[int] = None,
+                 hedge_policy: Optional[HedgePolicy] = None,
+                 rate_limiter: Optional[AdaptiveLimiter] = None):
+        if httpx is None:
+            raise RuntimeError("异步接口需要安装httpx: pip install httpx")
+        
+        super().__init__(api_key, hedge_policy, rate_limiter)
+        self.max_concurrency = max_concurrency or PERFORMANCE_CONFIG.get('max_concurrent_requests', 16)
+        
+        # 客户端和信号量绑定事件循环，在首次调用时创建
+        self._client = None
+        self._semaphore = None
+    
+    def _get_client(self) -> 'httpx.AsyncClient':
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency)
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+    
+    async def achat_completion(self, messages: List[Dict[str, str]],
+                               model: str = DEFAULT_MODEL,
+                               temperature: float = 0.7,
+                               max_tokens: int = 1000,
+                               timeout: Optional[float] = None,
+                               priority: int = PRIORITY_INTERACTIVE) -> Dict[str, Any]:
+        """
+        异步调用硅基流动聊天完成API
+        
+        Args:
+            messages: 对话消息列表
+            model: 模型名称
+            temperature: 温度参数
+            max_tokens: 最大token数
+            timeout: 整个调用（含排队和重试）的截止时间(秒)
+            priority: 限流排队优先级
+            
+        Returns:
+            API响应结果，失败时为 {"error": ...}
+        """
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        
+        payload = {
+            'model': model,
+            'messages': messages,
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+            'stream': False
+        }
+        
+        deadline = time.monotonic() + (timeout or self.timeout)
+        
+        if not self.hedge_policy.enabled:
+            return await self._acomplete(headers, payload, deadline, priority)
+        
+        return await self._ahedged(
+            lambda m, on_sent: self._acomplete(headers, dict(payload, model=m), deadline, priority, on_sent),
+            model
+        )
+    
+    async def _acomplete(self, headers: Dict[str, str], payload: Dict[str, Any],
+                         deadline: float, priority: int = PRIORITY_INTERACTIVE,
+                         on_sent: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+        """
+        发送一次异步请求，成功时记录首字节延迟
+        
+        延迟从最后一次实际发出请求时算起，不含信号量和限流排队；请求发出时调用 on_sent。
+        
+        Returns:
+            API响应结果，失败时为 {"error": ...}
+        """
+        client = self._get_client()
+        sent = []
+        
+        def mark_sent():
+            sent.append(time.monotonic())
+            if on_sent:
+                on_sent()
+        
+        try:
+            async with self._semaphore:
+                response = await self._apost(client, headers, payload, deadline, priority, mark_sent)
+            result = response.json()
+            
+        except (httpx.HTTPError, ValueError, RateLimitExceeded) as e:
+            self.logger.error(f"硅基流动API调用失败: {e}")
+            return {"error": str(e) or type(e).__name__}
+        
+        self.hedge_policy.record(payload['model'], time.monotonic() - sent[-1])
+        return result
+    
+    async def _ahedged(self, start: Callable[[str, Callable[[], None]], Any], model: str) -> Dict[str, Any]:
+        """
+        以对冲方式执行异步请求，取先成功返回的结果并取消另一个
+        
+        对冲计时从主请求取得信号量和限流许可、实际发出时开始，主请求还在本地排队时不对冲。
+        """
+        policy = self.hedge_policy
+        delay = policy.begin(model)
+        
+        dispatched = asyncio.Event()
+        primary = asyncio.ensure_future(start(model, dispatched.set))
+        tasks = {primary: False}
+        winner = None
+        pending = set(tasks)
+        try:
+            if delay is not None:
+                # 未发出就已结束时不再等待
+                primary.add_done_callback(lambda task: dispatched.set())
+                await dispatched.wait()
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                hedge_model = None if done else policy.acquire(model, self.get_available_models())
+                if hedge_model:
+                    self.logger.info(f"请求 {delay:.2f}秒 未响应，对冲到 {hedge_model}")
+                    hedge = asyncio.ensure_future(start(hedge_model, lambda: None))
+                    tasks[hedge] = True
+                    pending.add(hedge)
+            
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # 同时完成时成功的优先
+                for task in sorted(done, key=lambda t: "error" in t.result()):
+                    if winner is None and ("error" not in task.result() or not pending):
+                        winner = task
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        if len(tasks) > 1:
+            policy.finish(hedge_won=tasks[winner])
+        return winner.result()
+    
+    async def _apost(self, client: 'httpx.AsyncClient', headers: Dict[str, str],
+                     payload: Dict[str, Any], deadline: float,
+                     priority: int = PRIORITY_INTERACTIVE,
+                     on_sent: Optional[Callable[[], None]] = None) -> 'httpx.Response':
+        """
+        在截止时间内发送请求，对可重试的错误做有上限的指数退避重试，on_sent 见 _post
+        """
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise httpx.TimeoutException("请求超过截止时间")
+            
+            await self.rate_limiter.aacquire(priority, remaining)
+            remaining = deadline - time.monotonic()
+            started = time.monotonic()
+            # 被取消（如落败的对冲请求）时不调整并发上限
+            outcome = None
+            retry_after = None
+            try:
+                if remaining <= 0:
+                    raise httpx.TimeoutException("请求超过截止时间")
+                
+                if on_sent:
+                    on_sent()
+                response = await client.post(
+                    self.endpoint,
+                    headers=headers,
+                    json=payload,
+                    timeout=httpx.Timeout(remaining, connect=min(self.connect_timeout, remaining))
+                )
+                outcome = OUTCOME_ERROR
+                if response.status_code not in RETRYABLE_STATUS:
+                    response.raise_for_status()
+                    outcome = OUTCOME_OK
+                    return response
+                
+                if response.status_code in OVERLOAD_STATUS:
+                    outcome = OUTCOME_OVERLOAD
+                retry_after = self._parse_retry_after(response.headers.get('Retry-After'))
+                error = httpx.HTTPStatusError(
+                    f"{response.status_code} Error: {response.reason_phrase}",
+                    request=response.request, response=response
+                )
+                
+            except httpx.TimeoutException as e:
+                outcome = OUTCOME_OVERLOAD if remaining > 0 else None
+                error = e
+            except httpx.TransportError as e:
+                outcome = OUTCOME_ERROR
+                error = e
+            finally:
+                latency = time.monotonic() - started
+                if outcome == OUTCOME_OK:
+                    API_FIRST_BYTE_SECONDS.observe(latency)
+                self._release(latency, latency, outcome, retry_after)
+            
+            if attempt >= self.max_retries:
+                raise error
+            
+            delay = self._retry_delay(attempt, retry_after)
+            if time.monotonic() + delay >= deadline:
+                raise error
+            
+            attempt += 1
+            self.logger.warning(f"硅基流动API调用失败，{delay:.1f}秒后第{attempt}次重试: {error}")
+            await asyncio.sleep(delay)
+    
+    async def agenerate_answer(self, question: str, context: str = "",
+                               include_system_info: bool = False,
+                               system_info: str = "",
+                               model: Optional[str] = None,
+                               priority: int = PRIORITY_INTERACTIVE) -> str:
+        """
+        异步生成问答回复
+        
+        Args:
+            question: 用户问题
+            context: 相关文档上下文
+            include_system_info: 是否包含系统信息
+            system_info: 系统信息
+            model: 模型名称，默认 DEFAULT_MODEL
+            priority: 限流排队优先级
+            
+        Returns:
+            AI生成的回答
+        """
+        messages = self._build_messages(question, context, include_system_info, system_info)
+        
+        response = await self.achat_completion(
+            messages=messages,
+            model=model or DEFAULT_MODEL,
+            temperature=RAG_CONFIG.get('temperature', 0.7),
+            max_tokens=RAG_CONFIG.get('max_tokens', 1000),
+            priority=priority
+        )
+        
+        return self._extract_answer(response)
+    
+    async def aclose(self):
+        """
+        关闭异步连接池
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._semaphore = None
+        self.close()
\ No newline at end of file
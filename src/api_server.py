@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP服务模块 - 基于FastAPI对外提供问答服务
+
+服务进程只加载一次索引，所有客户端共享同一个常驻内存的知识库：
+
+    POST /query          问答，返回与 RAGEngine.query 相同格式的结果
+    POST /query/stream   流式问答，以SSE逐个推送 retrieval / token / done 事件
+    POST /ingest         导入服务端文档目录(DOCUMENT_PATH)下的文件或子目录（需管理令牌）
+    GET  /stats          知识库与服务统计信息
+    GET  /metrics        Prometheus文本格式的运行指标
+    POST /profile        开启或关闭性能剖析（需管理令牌）
+
+/ingest 和 /profile 需在请求头中携带 Authorization: Bearer <SERVICE_CONFIG['admin_token']>，
+未配置令牌时一律拒绝。
+"""
+
+import os
+import hmac
+import json
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional
+
+from fastapi import FastAPI, HTTPException, Depends, Header
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from pydantic import BaseModel
+
+from rag_engine import RAGEngine
+from metrics import REGISTRY
+from config import SERVICE_CONFIG, DOCUMENT_PATH
+
+class QueryRequest(BaseModel):
+    question: str
+    include_system_info: bool = False
+    latency_budget: Optional[float] = None
+
+class IngestRequest(BaseModel):
+    paths: List[str] = []
+    directory: Optional[str] = None
+    recursive: bool = True
+
+class ProfileRequest(BaseModel):
+    enabled: bool
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, default=_json_default)
+
+def _jsonable(data: Any) -> Any:
+    """
+    将结果中的numpy标量、元组等转换为JSON可序列化的对象
+    """
+    return json.loads(_dumps(data))
+
+def create_app(rag_engine: Optional[RAGEngine] = None, workers: Optional[int] = None) -> FastAPI:
+    """
+    创建HTTP服务应用
+    
+    Args:
+        rag_engine: 共享的RAG引擎，默认新建（此时加载索引）
+        workers: 检索、上下文构建和导入使用的线程池大小
+    
+    Returns:
+        FastAPI应用
+    """
+    logger = logging.getLogger(__name__)
+    engine = rag_engine or RAGEngine()
+    executor = ThreadPoolExecutor(
+        max_workers=workers or SERVICE_CONFIG.get('workers', 8),
+        thread_name_prefix='kylin-qa'
+    )
+    # 导入会修改索引，同一时间只允许一个导入任务
+    ingest_lock = threading.Lock()
+    admin_token = SERVICE_CONFIG.get('admin_token') or ''
+    document_root = os.path.realpath(DOCUMENT_PATH)
+    
+    def require_admin(authorization: Optional[str] = Header(None)):
+        """
+        校验管理接口的访问令牌
+        """
+        if not admin_token:
+            raise HTTPException(status_code=403, detail='未配置管理令牌，管理接口已禁用')
+        expected = f'Bearer {admin_token}'.encode('utf-8')
+        if not authorization or not hmac.compare_digest(authorization.encode('utf-8'), expected):
+            raise HTTPException(status_code=401, detail='管理令牌无效',
+                                headers={'WWW-Authenticate': 'Bearer'})
+    
+    def within_documents(path: str) -> Optional[str]:
+        """
+        将路径解析为真实路径（相对路径相对于文档目录），不在文档目录下时返回None
+        """
+        resolved = os.path.realpath(os.path.join(document_root, path))
+        if os.path.commonpath([resolved, document_root]) != document_root:
+            return None
+        return resolved
+    
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # RAGEngine.aquery 中的检索在事件循环的默认线程池中执行
+        asyncio.get_event_loop().set_default_executor(executor)
+        stats = engine.get_knowledge_base_stats()
+        logger.info(f"问答服务已启动，知识库文档块数: {stats.get('document_count', 0)}")
+        try:
+            yield
+        finally:
+            await engine.aclose()
+            executor.shutdown(wait=False)
+            logger.info("问答服务已停止")
+    
+    app = FastAPI(title='银河麒麟智能问答助手', lifespan=lifespan)
+    
+    @app.post('/query')
+    async def query(request: QueryRequest) -> Dict[str, Any]:
+        question = request.question.strip()
+        if not question:
+            raise HTTPException(status_code=400, detail='问题不能为空')
+        
+        result = await engine.aquery(question, request.include_system_info, request.latency_budget)
+        return _jsonable(result)
+    
+    @app.post('/query/stream')
+    async def query_stream(request: QueryRequest) -> StreamingResponse:
+        question = request.question.strip()
+        if not question:
+            raise HTTPException(status_code=400, detail='问题不能为空')
+        
+        def events():
+            for event in engine.query_stream(question, request.include_system_info):
+                yield f"event: {event['type']}\ndata: {_dumps(event)}\n\n"
+        
+        return StreamingResponse(events(), media_type='text/event-stream',
+                                 headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    
+    @app.post('/ingest', dependencies=[Depends(require_admin)])
+    async def ingest(request: IngestRequest) -> Dict[str, Any]:
+        if not request.paths and not request.directory:
+            raise HTTPException(status_code=400, detail='需要指定 paths 或 directory')
+        
+        requested = request.paths + ([request.directory] if request.directory else [])
+        outside = [path for path in requested if within_documents(path) is None]
+        if outside:
+            raise HTTPException(status_code=403,
+                                detail=f"只能导入 {DOCUMENT_PATH} 下的文档: {', '.join(outside)}")
+        
+        def run_ingest() -> Dict[str, Any]:
+            with ingest_lock:
+                summary = {'processed': 0, 'failed': {}, 'chunk_count': 0}
+                file_paths = [within_documents(path) for path in request.paths]
+                if request.directory:
+                    # 目录中指向文档目录之外的符号链接不导入
+                    for file_path in engine.document_processor.collect_files(
+                            within_documents(request.directory), request.recursive):
+                        if within_documents(file_path) is None:
+                            summary['failed'][file_path] = '不在文档目录内'
+                        else:
+                            file_paths.append(file_path)
+                
+                batches = [engine.add_documents(file_paths)] if file_paths else []
+                for batch in batches:
+                    summary['processed'] += batch['processed']
+                    summary['failed'].update(batch['failed'])
+                    summary['chunk_count'] += batch['chunk_count']
+                return summary
+        
+        loop = asyncio.get_event_loop()
+        summary = await loop.run_in_executor(executor, run_ingest)
+        return _jsonable(summary)
+    
+    @app.get('/stats')
+    async def stats() -> Dict[str, Any]:
+        return _jsonable(engine.get_knowledge_base_stats())
+    
+    @app.get('/metrics')
+    async def metrics() -> PlainTextResponse:
+        return PlainTextResponse(REGISTRY.to_prometheus(), media_type='text/plain; version=0.0.4')
+    
+    @app.post('/profile', dependencies=[Depends(require_admin)])
+    async def profile(request: ProfileRequest) -> Dict[str, Any]:
+        engine.set_profiling(request.enabled)
+        return engine.profiler.get_stats()
+    
+    return app
+
+def run_server(host: Optional[str] = None, port: Optional[int] = None):
+    """
+    启动HTTP服务（单进程，所有请求共享同一份索引）
+    """
+    import uvicorn
+    
+    uvicorn.run(
+        create_app(),
+        host=host or SERVICE_CONFIG.get('host', '127.0.0.1'),
+        port=port or SERVICE_CONFIG.get('port', 8000),
+        log_config=None
+    )
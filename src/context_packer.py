@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+上下文打包模块 - 在token预算内选择送入提示词的文档块
+"""
+
+import re
+import logging
+import numpy as np
+import scipy.sparse as sp
+from typing import List, Callable, Optional
+
+# 中日韩文字及全角标点按每字1个token估算（偏保守），连续的字母数字按每4个字符1个token，
+# 其余非空白符号各算1个token
+CJK_RANGES = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\u3000-\u303f\uff00-\uffef'
+CJK_PATTERN = re.compile(f'[{CJK_RANGES}]')
+WORD_PATTERN = re.compile(r'[A-Za-z0-9_]+')
+SYMBOL_PATTERN = re.compile(f'[^\\sA-Za-z0-9_{CJK_RANGES}]')
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本的token数（中英文混合）
+    """
+    if not text:
+        return 0
+    cjk = len(CJK_PATTERN.findall(text))
+    words = sum((len(word) + 3) // 4 for word in WORD_PATTERN.findall(text))
+    symbols = len(SYMBOL_PATTERN.findall(text))
+    return cjk + words + symbols
+
+class ContextPacker:
+    """
+    上下文打包器
+    
+    先去掉与排名更靠前的文档块高度重复的块（一次稀疏矩阵乘法得到两两相似度），
+    再以相关度为价值、token数为重量做0/1背包，在预算内选出总相关度最高的组合，
+    最后按原排名输出。
+    """
+    
+    def __init__(self, vectorize: Callable[[List[str]], sp.csr_matrix],
+                 dedupe_threshold: float = 0.9):
+        self.vectorize = vectorize
+        self.dedupe_threshold = dedupe_threshold
+        self.logger = logging.getLogger(__name__)
+    
+    def dedupe(self, texts: List[str]) -> List[int]:
+        """
+        去除重复内容
+        
+        Returns:
+            保留的下标（保持原顺序）
+        """
+        if len(texts) < 2 or self.dedupe_threshold >= 1:
+            return list(range(len(texts)))
+        
+        vectors = self.vectorize(texts)
+        similarity = (vectors @ vectors.T).toarray()
+        
+        kept: List[int] = []
+        for i in range(len(texts)):
+            if kept and similarity[i, kept].max() >= self.dedupe_threshold:
+                continue
+            kept.append(i)
+        return kept
+    
+    @staticmethod
+    def select(values: List[float], weights: List[int], budget: int) -> List[int]:
+        """
+        0/1背包：在总重量不超过 budget 的前提下使总价值最大
+        
+        Returns:
+            选中的下标（升序）
+        """
+        if budget <= 0 or not values:
+            return []
+        
+        best = np.zeros(budget + 1)
+        taken = np.zeros((len(values), budget + 1), dtype=bool)
+        for i, (value, weight) in enumerate(zip(values, weights)):
+            if weight > budget:
+                continue
+            candidate = best[:budget + 1 - weight] + value
+            improved = candidate > best[weight:]
+            taken[i, weight:] = improved
+            best[weight:] = np.where(improved, candidate, best[weight:])
+        
+        selected = []
+        capacity = budget
+        for i in range(len(values) - 1, -1, -1):
+            if taken[i, capacity]:
+                selected.append(i)
+                capacity -= weights[i]
+        return selected[::-1]
+    
+    def pack(self, texts: List[str], relevance: List[float], budget: int,
+             overhead: Optional[List[int]] = None) -> List[int]:
+        """
+        选择在预算内送入上下文的文档块
+        
+        Args:
+            texts: 按排名排列的文档块内容
+            relevance: 各文档块的相关度
+            budget: token预算
+            overhead: 各文档块额外占用的token（标题行等）
+        
+        Returns:
+            选中的下标（保持原排名顺序）
+        """
+        overhead = overhead or [0] * len(texts)
+        candidates = self.dedupe(texts)
+        if len(candidates) < len(texts):
+            self.logger.info(f"上下文去重: 丢弃 {len(texts) - len(candidates)} 个重复文档块")
+        
+        weights = [estimate_tokens(texts[i]) + overhead[i] for i in candidates]
+        # 相关度为0的块也给一个很小的价值，预算充足时仍可入选
+        values = [max(float(relevance[i]), 1e-3) for i in candidates]
+        
+        return [candidates[i] for i in self.select(values, weights, budget)]
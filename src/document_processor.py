@@ -6,7 +6,9 @@
 import os
 import re
 import logging
-from typing import List, Dict, Any, Optional
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 from pathlib import Path
 
 # 导入文档处理库
@@ -24,7 +26,244 @@ except ImportError:
     markdown = None
     BeautifulSoup = None
 
-from config import VECTOR_CONFIG, SUPPORTED_DOC_TYPES
+from config import VECTOR_CONFIG, SUPPORTED_DOC_TYPES, PERFORMANCE_CONFIG
+
+# 工作进程内复用的处理器实例
+_worker_processor = None
+
+def _process_file_in_worker(file_path: str) -> List[Dict[str, Any]]:
+    """
+    进程池工作函数：在子进程中处理单个文件
+    """
+    global _worker_processor
+    if _worker_processor is None:
+        _worker_processor = DocumentProcessor()
+    return _worker_processor.process_file(file_path)
+
+class SDKInterfaceScanner:
+    """
+    SDK接口符号扫描器
+    
+    一次遍历文本中的单词和标点，在关键字和"标识符("处锚定，再用预编译的
+    后续模式就地匹配，对C、DBus、Python、API调用和数据结构符号同时分类。
+    每条规则按各自原始正则 findall 的非重叠语义推进，结果与逐个 findall 相同。
+    """
+    
+    CATEGORIES = ('c_interfaces', 'dbus_interfaces', 'python_interfaces', 'api_calls', 'data_structures')
+    
+    # 单词或分隔符（[\w\s*] 以外的字符），分隔符用于确定 "[\w\s\*]+" 连续段的起点
+    TOKEN_PATTERN = re.compile(r'(\w+)|[^\w\s*]')
+    CALL_TAIL = re.compile(r'\s*\(')
+    DBUS_TAIL = re.compile(r'\s*\([^)]*\)\s*↦\s*\([^)]*\)')
+    
+    # (关键字, 前缀, 类别, 关键字之后的模式)，对应原先的各条 findall 规则
+    KEYWORD_RULES = (
+        ('extern', '', 'c_interfaces', re.compile(r'\s+[\w\s\*]+\s+(\w+)\s*\([^)]*\);')),
+        ('typedef', '', 'c_interfaces', re.compile(r'\s+struct\s+(\w+)')),
+        ('define', '#', 'c_interfaces', re.compile(r'\s+(\w+)\s+')),
+        ('interface', '', 'dbus_interfaces', re.compile(r'\s+([\w\.]+)')),
+        ('method', '', 'dbus_interfaces', re.compile(r'\s+(\w+)')),
+        ('def', '', 'python_interfaces', re.compile(r'\s+(\w+)\s*\([^)]*\)')),
+        ('class', '', 'python_interfaces', re.compile(r'\s+(\w+)')),
+        ('import', '', 'python_interfaces', re.compile(r'\s+([\w\.]+)')),
+        ('struct', '', 'data_structures', re.compile(r'\s+(\w+)')),
+        ('enum', '', 'data_structures', re.compile(r'\s+(\w+)')),
+        ('typedef', '', 'data_structures', re.compile(r'\s+\w+\s+(\w+)')),
+    )
+    
+    def __init__(self):
+        # 关键字之后必须是空白，因此关键字只会出现在单词末尾，按末字符索引规则
+        self.rules_by_last_char: Dict[str, List[Tuple[int, str, str, str, Any]]] = {}
+        for rule_id, (keyword, prefix, category, pattern) in enumerate(self.KEYWORD_RULES):
+            self.rules_by_last_char.setdefault(keyword[-1], []).append(
+                (rule_id, keyword, prefix, category, pattern)
+            )
+    
+    def scan(self, content: str) -> Dict[str, List[str]]:
+        """
+        扫描文本中的SDK接口符号
+        
+        Returns:
+            各类别的符号列表，按首次出现顺序去重
+        """
+        found = {category: {} for category in self.CATEGORIES}
+        last_end = [0] * len(self.KEYWORD_RULES)
+        kdk_end = 0
+        dbus_end = 0
+        has_dbus = '↦' in content
+        run_start = 0
+        
+        for match in self.TOKEN_PATTERN.finditer(content):
+            word = match.group(1)
+            if word is None:
+                run_start = match.end()
+                continue
+            
+            start, end = match.span()
+            
+            # 标识符后紧跟 "("：API调用、DBus方法签名、kdk_函数
+            next_char = content[end:end + 1]
+            call = None
+            if next_char == '(':
+                call = end
+            elif next_char.isspace():
+                tail = self.CALL_TAIL.match(content, end)
+                if tail:
+                    call = tail.end() - 1
+            
+            if call is not None:
+                found['api_calls'][word] = None
+                
+                if has_dbus and start >= dbus_end:
+                    signature = self.DBUS_TAIL.match(content, end)
+                    if signature:
+                        found['dbus_interfaces'][word] = None
+                        dbus_end = signature.end()
+                
+                # 等价于 [\w\s\*]+\s+(kdk_\w+)\s*\([^)]*\)：函数名前须为空白且所在连续段更早开始，
+                # kdk_ 之后至少还有一个字符
+                if (len(word) > 4 and word.startswith('kdk_') and run_start >= kdk_end
+                        and start - run_start >= 2 and content[start - 1].isspace()):
+                    close = content.find(')', call + 1)
+                    if close >= 0:
+                        found['c_interfaces'][word] = None
+                        kdk_end = close + 1
+            
+            # 关键字规则
+            for rule_id, keyword, prefix, category, pattern in self.rules_by_last_char.get(word[-1], ()):
+                if not word.endswith(keyword):
+                    continue
+                keyword_start = end - len(keyword) - len(prefix)
+                if keyword_start < last_end[rule_id]:
+                    continue
+                if prefix and (keyword_start < 0 or content[keyword_start] != prefix):
+                    continue
+                tail = pattern.match(content, end)
+                if tail:
+                    found[category][tail.group(1)] = None
+                    last_end[rule_id] = tail.end()
+        
+        return {category: list(symbols) for category, symbols in found.items()}
+
+class TextChunker:
+    """
+    增量文本分块器
+    
+    文本按页/段落逐段送入，块一旦写满立即产出，内存中只保留当前未满的块。
+    段落之间以空行分隔；超长段落按句子切分，超长句子按固定长度带重叠切分。
+    """
+    
+    # 按句末标点切分句子，保留标点及其后的空白
+    SENTENCE_PATTERN = re.compile(r'[^。！？!?；;]*[。！？!?；;]?\s*')
+    PARAGRAPH_PATTERN = re.compile(r'\n\s*\n')
+    WHITESPACE_PATTERN = re.compile(r'\s+')
+    
+    def __init__(self, source_file: str, file_type: str, chunk_size: int = 500, chunk_overlap: int = 50):
+        self.source_file = source_file
+        self.file_type = file_type
+        self.chunk_size = chunk_size
+        self.chunk_overlap = min(chunk_overlap, chunk_size // 2)
+        
+        self.chunk_id = 0
+        self.offset = 0  # 已处理文本流的长度（段落间计入两个字符的分隔符）
+        self.buffer = ""
+        self.buffer_start = 0
+        self.page_start = None
+        self.page_end = None
+    
+    def feed(self, text: str, page: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        送入一段文本（通常为一页），返回已写满的文档块
+        
+        Args:
+            text: 文本内容
+            page: 文本所在页码（从1开始），非分页文档为None
+        """
+        chunks = []
+        for paragraph in self.PARAGRAPH_PATTERN.split(text):
+            paragraph = self.WHITESPACE_PATTERN.sub(' ', paragraph).strip()
+            if not paragraph:
+                continue
+            
+            if len(paragraph) <= self.chunk_size:
+                chunks.extend(self._add(paragraph, "\n\n", page))
+                continue
+            
+            # 超长段落：按句子逐个加入，句子之间不插入分隔符
+            separator = "\n\n"
+            for sentence in self.SENTENCE_PATTERN.findall(paragraph):
+                if not sentence:
+                    continue
+                if len(sentence) <= self.chunk_size:
+                    chunks.extend(self._add(sentence, separator, page))
+                else:
+                    chunks.extend(self._add_long(sentence, separator, page))
+                separator = ""
+        return chunks
+    
+    def finish(self) -> List[Dict[str, Any]]:
+        """
+        结束输入，返回剩余的文档块
+        """
+        return self._flush()
+    
+    def _add(self, text: str, separator: str, page: Optional[int]) -> List[Dict[str, Any]]:
+        chunks = []
+        if self.offset > 0:
+            self.offset += len(separator)
+        
+        if self.buffer and len(self.buffer) + len(separator) + len(text) > self.chunk_size:
+            chunks = self._flush()
+        
+        if self.buffer:
+            self.buffer += separator + text
+        else:
+            self.buffer = text
+            self.buffer_start = self.offset
+            self.page_start = page
+        self.page_end = page
+        self.offset += len(text)
+        return chunks
+    
+    def _add_long(self, text: str, separator: str, page: Optional[int]) -> List[Dict[str, Any]]:
+        """
+        超过块大小的文本按固定长度带重叠切分为独立的块
+        """
+        if self.offset > 0:
+            self.offset += len(separator)
+        chunks = self._flush()
+        
+        step = self.chunk_size - self.chunk_overlap
+        for start in range(0, len(text), step):
+            piece = text[start:start + self.chunk_size]
+            chunks.append(self._make_chunk(piece, self.offset + start, page, page))
+            if start + self.chunk_size >= len(text):
+                break
+        self.offset += len(text)
+        return chunks
+    
+    def _flush(self) -> List[Dict[str, Any]]:
+        if not self.buffer:
+            return []
+        chunk = self._make_chunk(self.buffer, self.buffer_start, self.page_start, self.page_end)
+        self.buffer = ""
+        return [chunk]
+    
+    def _make_chunk(self, content: str, start_pos: int, page_start: Optional[int],
+                    page_end: Optional[int]) -> Dict[str, Any]:
+        chunk = {
+            'content': content.strip(),
+            'chunk_id': self.chunk_id,
+            'source_file': self.source_file,
+            'file_type': self.file_type,
+            'start_pos': start_pos,
+            'end_pos': start_pos + len(content)
+        }
+        if page_start is not None:
+            chunk['page_start'] = page_start
+            chunk['page_end'] = page_end
+        self.chunk_id += 1
+        return chunk
 
 class DocumentProcessor:
     """
@@ -35,6 +274,7 @@ class DocumentProcessor:
         self.logger = logging.getLogger(__name__)
         self.chunk_size = VECTOR_CONFIG.get('chunk_size', 500)
         self.chunk_overlap = VECTOR_CONFIG.get('chunk_overlap', 50)
+        self.sdk_scanner = SDKInterfaceScanner()
     
     def process_file(self, file_path: str) -> List[Dict[str, Any]]:
         """
@@ -45,54 +285,153 @@ class DocumentProcessor:
             
         Returns:
             文档块列表
-        """
-        try:
-            file_path = Path(file_path)
-            
-            if not file_path.exists():
-                raise FileNotFoundError(f"文件不存在: {file_path}")
-            
-            file_ext = file_path.suffix.lower()
             
-            # 根据文件类型选择处理方法
-            if file_ext == '.pdf':
-                content = self._process_pdf(file_path)
-            elif file_ext == '.md':
-                content = self._process_markdown(file_path)
-            elif file_ext in ['.txt', '.rst']:
-                content = self._process_text(file_path)
-            else:
-                raise ValueError(f"不支持的文件类型: {file_ext}")
-            
-            # 分块处理
-            chunks = self._split_into_chunks(content, str(file_path), file_ext)
+        Raises:
+            FileNotFoundError: 文件不存在
+            ValueError: 不支持的文件类型
+            Exception: 文本提取失败（由调用方记录日志）
+        """
+        chunks = list(self.iter_chunks(file_path))
+        self.logger.info(f"成功处理文件 {file_path}，生成 {len(chunks)} 个文档块")
+        return chunks
+    
+    def iter_chunks(self, file_path: str) -> Iterator[Dict[str, Any]]:
+        """
+        流式处理单个文件，逐个产出文档块
+        
+        PDF逐页提取并送入增量分块器，提取和分块的峰值内存与若干页文本相当，而非整个文档。
+        只有这一步是有界的：process_file 和进程池会把整个文件的文档块收集成列表再返回，
+        写入索引前单个文件的全部文档块仍同时在内存中。
+        
+        Args:
+            file_path: 文件路径
             
-            # 提取SDK接口信息
-            for chunk in chunks:
-                chunk['sdk_interfaces'] = self._extract_sdk_interfaces(chunk['content'])
+        Yields:
+            文档块（已附带SDK接口信息）
+        """
+        file_path = Path(file_path)
+        
+        if not file_path.exists():
+            raise FileNotFoundError(f"文件不存在: {file_path}")
+        
+        file_ext = file_path.suffix.lower()
+        
+        # 根据文件类型选择处理方法
+        if file_ext == '.pdf':
+            pages = self._iter_pdf_pages(file_path)
+        elif file_ext == '.md':
+            pages = [(None, self._process_markdown(file_path))]
+        elif file_ext in ['.txt', '.rst']:
+            pages = [(None, self._process_text(file_path))]
+        else:
+            raise ValueError(f"不支持的文件类型: {file_ext}")
+        
+        chunker = TextChunker(str(file_path), file_ext, self.chunk_size, self.chunk_overlap)
+        
+        for page_number, page_text in pages:
+            for chunk in chunker.feed(page_text, page_number):
+                yield self._annotate_chunk(chunk)
+        
+        for chunk in chunker.finish():
+            yield self._annotate_chunk(chunk)
+    
+    def _annotate_chunk(self, chunk: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        为文档块附加SDK接口信息
+        """
+        chunk['sdk_interfaces'] = self._extract_sdk_interfaces(chunk['content'])
+        return chunk
+    
+    def iter_process_files(self, file_paths: List[str], max_workers: Optional[int] = None
+                           ) -> Iterator[Tuple[str, Optional[List[Dict[str, Any]]], Optional[Exception]]]:
+        """
+        并行处理多个文件，按完成顺序逐个产出结果
+        
+        文件通过进程池分发（进程数默认取 PERFORMANCE_CONFIG['max_concurrent_processes']），
+        单个文件失败不会中断其余文件。每个文件的文档块在工作进程中收集成完整列表后
+        一次性传回，内存占用随单个文件的文档块数增长。
+        
+        Args:
+            file_paths: 文件路径列表
+            max_workers: 最大进程数
             
-            self.logger.info(f"成功处理文件 {file_path}，生成 {len(chunks)} 个文档块")
-            return chunks
+        Yields:
+            (文件路径, 文档块列表, 异常)，成功时异常为None，失败时文档块为None；
+            失败不在此记录日志，由调用方处理
+        """
+        max_workers = max_workers or PERFORMANCE_CONFIG.get('max_concurrent_processes', 4)
+        max_workers = min(max_workers, len(file_paths))
+        
+        # 单文件或单进程时直接在当前进程处理，省去进程池开销
+        if max_workers <= 1:
+            for file_path in file_paths:
+                try:
+                    yield file_path, self.process_file(file_path), None
+                except Exception as e:
+                    yield file_path, None, e
+            return
+        
+        # GUI等多线程进程中fork可能继承被占用的锁，使用spawn启动工作进程
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+            futures = {
+                executor.submit(_process_file_in_worker, file_path): file_path
+                for file_path in file_paths
+            }
+            for future in as_completed(futures):
+                file_path = futures[future]
+                try:
+                    yield file_path, future.result(), None
+                except Exception as e:
+                    yield file_path, None, e
+    
+    def collect_files(self, directory: str, recursive: bool = True) -> List[str]:
+        """
+        收集目录下所有支持的文档文件
+        
+        Args:
+            directory: 目录路径
+            recursive: 是否递归子目录
             
-        except Exception as e:
-            self.logger.error(f"处理文件 {file_path} 失败: {str(e)}")
-            raise
+        Returns:
+            文件路径列表
+        """
+        pattern = '**/*' if recursive else '*'
+        return sorted(
+            str(path) for path in Path(directory).glob(pattern)
+            if path.is_file() and self.validate_file(str(path))
+        )
     
     def _process_pdf(self, file_path: Path) -> str:
         """
         处理PDF文件
         """
-        content = ""
+        return "\n".join(page_text for _, page_text in self._iter_pdf_pages(file_path))
+    
+    def _iter_pdf_pages(self, file_path: Path) -> Iterator[Tuple[int, str]]:
+        """
+        逐页提取PDF文本
+        
+        优先使用pdfplumber，失败时从失败的页开始改用PyPDF2，已产出的页不会重复。
+        
+        Yields:
+            (页码, 页面文本)，页码从1开始
+        """
+        next_page = 0
         
         # 优先使用pdfplumber
         if pdfplumber:
             try:
                 with pdfplumber.open(file_path) as pdf:
-                    for page in pdf.pages:
+                    for index, page in enumerate(pdf.pages):
                         page_text = page.extract_text()
+                        # 释放已解析页面的缓存，避免整本文档常驻内存
+                        if hasattr(page, 'flush_cache'):
+                            page.flush_cache()
+                        next_page = index + 1
                         if page_text:
-                            content += page_text + "\n"
-                return content
+                            yield index + 1, page_text
+                return
             except Exception as e:
                 self.logger.warning(f"pdfplumber处理失败，尝试PyPDF2: {str(e)}")
         
@@ -101,11 +440,13 @@ class DocumentProcessor:
             try:
                 with open(file_path, 'rb') as file:
                     pdf_reader = PyPDF2.PdfReader(file)
-                    for page in pdf_reader.pages:
-                        content += page.extract_text() + "\n"
-                return content
+                    for index in range(next_page, len(pdf_reader.pages)):
+                        page_text = pdf_reader.pages[index].extract_text()
+                        if page_text:
+                            yield index + 1, page_text
+                return
             except Exception as e:
-                self.logger.error(f"PyPDF2处理失败: {str(e)}")
+                self.logger.warning(f"PyPDF2处理失败: {str(e)}")
         
         raise RuntimeError("无法处理PDF文件，请安装pdfplumber或PyPDF2")
     
@@ -113,204 +454,56 @@ class DocumentProcessor:
         """
         处理Markdown文件
         """
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                md_content = file.read()
-            
-            if markdown and BeautifulSoup:
-                # 转换为HTML然后提取纯文本
-                html = markdown.markdown(md_content)
-                soup = BeautifulSoup(html, 'html.parser')
-                return soup.get_text()
-            else:
-                # 简单的Markdown处理
-                # 移除Markdown标记
-                content = re.sub(r'#{1,6}\s+', '', md_content)  # 标题
-                content = re.sub(r'\*\*(.*?)\*\*', r'\1', content)  # 粗体
-                content = re.sub(r'\*(.*?)\*', r'\1', content)  # 斜体
-                content = re.sub(r'`(.*?)`', r'\1', content)  # 行内代码
-                content = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', content)  # 链接
-                return content
-                
-        except Exception as e:
-            self.logger.error(f"处理Markdown文件失败: {str(e)}")
-            raise
+        with open(file_path, 'r', encoding='utf-8') as file:
+            md_content = file.read()
+        
+        if markdown and BeautifulSoup:
+            # 转换为HTML然后提取纯文本
+            html = markdown.markdown(md_content)
+            soup = BeautifulSoup(html, 'html.parser')
+            return soup.get_text()
+        else:
+            # 简单的Markdown处理
+            # 移除Markdown标记
+            content = re.sub(r'#{1,6}\s+', '', md_content)  # 标题
+            content = re.sub(r'\*\*(.*?)\*\*', r'\1', content)  # 粗体
+            content = re.sub(r'\*(.*?)\*', r'\1', content)  # 斜体
+            content = re.sub(r'`(.*?)`', r'\1', content)  # 行内代码
+            content = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', content)  # 链接
+            return content
     
     def _process_text(self, file_path: Path) -> str:
         """
         处理文本文件
         """
-        try:
-            # 尝试不同的编码
-            encodings = ['utf-8', 'gbk', 'gb2312', 'latin-1']
-            
-            for encoding in encodings:
-                try:
-                    with open(file_path, 'r', encoding=encoding) as file:
-                        return file.read()
-                except UnicodeDecodeError:
-                    continue
-            
-            raise UnicodeDecodeError("无法解码文件，尝试了多种编码格式")
-            
-        except Exception as e:
-            self.logger.error(f"处理文本文件失败: {str(e)}")
-            raise
-    
-    def _split_into_chunks(self, content: str, file_path: str, file_type: str) -> List[Dict[str, Any]]:
-        """
-        将内容分割成块
-        """
-        chunks = []
+        # 尝试不同的编码
+        encodings = ['utf-8', 'gbk', 'gb2312', 'latin-1']
         
-        # 清理内容
-        content = self._clean_content(content)
-        
-        if len(content) <= self.chunk_size:
-            # 内容较短，不需要分割
-            chunks.append({
-                'content': content,
-                'chunk_id': 0,
-                'source_file': file_path,
-                'file_type': file_type,
-                'start_pos': 0,
-                'end_pos': len(content)
-            })
-        else:
-            # 按段落分割
-            paragraphs = content.split('\n\n')
-            current_chunk = ""
-            chunk_id = 0
-            start_pos = 0
-            
-            for paragraph in paragraphs:
-                # 检查添加当前段落是否会超过块大小
-                if len(current_chunk) + len(paragraph) + 2 <= self.chunk_size:
-                    if current_chunk:
-                        current_chunk += "\n\n" + paragraph
-                    else:
-                        current_chunk = paragraph
-                else:
-                    # 保存当前块
-                    if current_chunk:
-                        chunks.append({
-                            'content': current_chunk,
-                            'chunk_id': chunk_id,
-                            'source_file': file_path,
-                            'file_type': file_type,
-                            'start_pos': start_pos,
-                            'end_pos': start_pos + len(current_chunk)
-                        })
-                        start_pos += len(current_chunk)
-                        chunk_id += 1
-                    
-                    # 开始新块
-                    current_chunk = paragraph
-            
-            # 保存最后一个块
-            if current_chunk:
-                chunks.append({
-                    'content': current_chunk,
-                    'chunk_id': chunk_id,
-                    'source_file': file_path,
-                    'file_type': file_type,
-                    'start_pos': start_pos,
-                    'end_pos': start_pos + len(current_chunk)
-                })
+        for encoding in encodings:
+            try:
+                with open(file_path, 'r', encoding=encoding) as file:
+                    return file.read()
+            except UnicodeDecodeError:
+                continue
         
-        return chunks
+        raise UnicodeDecodeError("无法解码文件，尝试了多种编码格式")
     
-    def _clean_content(self, content: str) -> str:
+    def _split_into_chunks(self, content: str, file_path: str, file_type: str) -> List[Dict[str, Any]]:
         """
-        清理文本内容
+        将内容分割成块
         """
-        # 移除多余的空白字符
-        content = re.sub(r'\s+', ' ', content)
-        
-        # 移除多余的换行
-        content = re.sub(r'\n\s*\n', '\n\n', content)
-        
-        # 移除首尾空白
-        content = content.strip()
-        
-        return content
+        chunker = TextChunker(file_path, file_type, self.chunk_size, self.chunk_overlap)
+        return chunker.feed(content) + chunker.finish()
     
     def _extract_sdk_interfaces(self, content: str) -> Dict[str, Any]:
         """
         提取SDK接口信息
         """
-        interfaces = {
-            'c_interfaces': [],
-            'dbus_interfaces': [],
-            'python_interfaces': [],
-            'api_calls': [],
-            'data_structures': []
-        }
-        
         try:
-            # C接口模式
-            c_patterns = [
-                r'extern\s+[\w\s\*]+\s+(\w+)\s*\([^)]*\);',  # extern函数声明
-                r'[\w\s\*]+\s+(kdk_\w+)\s*\([^)]*\)',  # kdk开头的函数
-                r'typedef\s+struct\s+(\w+)',  # 结构体定义
-                r'#define\s+(\w+)\s+',  # 宏定义
-            ]
-            
-            for pattern in c_patterns:
-                matches = re.findall(pattern, content, re.MULTILINE)
-                interfaces['c_interfaces'].extend(matches)
-            
-            # DBus接口模式
-            dbus_patterns = [
-                r'(\w+)\s*\([^)]*\)\s*↦\s*\([^)]*\)',  # DBus方法签名
-                r'interface\s+([\w\.]+)',  # 接口名称
-                r'method\s+(\w+)',  # 方法名称
-            ]
-            
-            for pattern in dbus_patterns:
-                matches = re.findall(pattern, content, re.MULTILINE)
-                interfaces['dbus_interfaces'].extend(matches)
-            
-            # Python接口模式
-            python_patterns = [
-                r'def\s+(\w+)\s*\([^)]*\)',  # 函数定义
-                r'class\s+(\w+)',  # 类定义
-                r'import\s+([\w\.]+)',  # 导入模块
-            ]
-            
-            for pattern in python_patterns:
-                matches = re.findall(pattern, content, re.MULTILINE)
-                interfaces['python_interfaces'].extend(matches)
-            
-            # API调用模式
-            api_patterns = [
-                r'(\w+)\s*\(',  # 函数调用
-                r'\.(\w+)\s*\(',  # 方法调用
-            ]
-            
-            for pattern in api_patterns:
-                matches = re.findall(pattern, content)
-                interfaces['api_calls'].extend(matches)
-            
-            # 数据结构模式
-            struct_patterns = [
-                r'struct\s+(\w+)',  # 结构体
-                r'enum\s+(\w+)',  # 枚举
-                r'typedef\s+\w+\s+(\w+)',  # 类型定义
-            ]
-            
-            for pattern in struct_patterns:
-                matches = re.findall(pattern, content)
-                interfaces['data_structures'].extend(matches)
-            
-            # 去重
-            for key in interfaces:
-                interfaces[key] = list(set(interfaces[key]))
-            
+            return self.sdk_scanner.scan(content)
         except Exception as e:
             self.logger.error(f"提取SDK接口信息失败: {str(e)}")
-        
-        return interfaces
+            return {category: [] for category in SDKInterfaceScanner.CATEGORIES}
     
     def get_supported_formats(self) -> List[str]:
         """
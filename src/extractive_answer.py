@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+抽取式回答模块 - AI服务超时或不可用时，从检索结果中摘录最相关的句子作为回答
+"""
+
+import os
+import logging
+import numpy as np
+import scipy.sparse as sp
+from typing import List, Dict, Any, Callable
+
+from passage_compressor import split_sentences
+
+# 降级回答的标注，按降级原因区分
+DEGRADED_NOTICES = {
+    'timeout': "【离线摘要】AI服务未能在规定时间内给出回答，以下内容直接摘录自知识库，仅供参考：",
+    'error': "【离线摘要】AI服务暂时不可用，以下内容直接摘录自知识库，仅供参考："
+}
+NO_MATCH_ANSWER = "【离线摘要】AI服务暂时不可用，知识库中也没有找到与问题相关的内容。"
+
+class ExtractiveAnswerer:
+    """
+    抽取式回答生成器
+    
+    将检索到的文档块切成句子，与问题一起做一次向量化，按与问题的相似度
+    （再以所在文档块的检索相似度加权）选出若干句，按所在文档块的排名和原文顺序
+    输出并注明来源。不调用任何外部服务，耗时在毫秒级。
+    """
+    
+    def __init__(self, vectorize: Callable[[List[str]], sp.csr_matrix], max_sentences: int = 5):
+        self.vectorize = vectorize
+        self.max_sentences = max(1, max_sentences)
+        self.logger = logging.getLogger(__name__)
+    
+    def answer(self, question: str, relevant_docs: List[Dict[str, Any]],
+               reason: str = 'timeout') -> str:
+        """
+        生成抽取式回答
+        
+        Args:
+            question: 用户问题
+            relevant_docs: 检索到的文档块（按排名排列）
+            reason: 降级原因，'timeout' 或 'error'
+        
+        Returns:
+            带降级标注和来源的回答文本
+        """
+        candidates = []
+        for rank, doc in enumerate(relevant_docs):
+            for position, sentence in enumerate(split_sentences(doc.get('content', ''))):
+                sentence = sentence.strip()
+                if sentence:
+                    candidates.append((rank, position, sentence))
+        if not candidates:
+            return NO_MATCH_ANSWER
+        
+        vectors = self.vectorize([question] + [sentence for _, _, sentence in candidates])
+        scores = (vectors[1:] @ vectors[0].T).toarray().ravel()
+        weights = np.array([0.5 + 0.5 * float(relevant_docs[rank].get('similarity', 0))
+                            for rank, _, _ in candidates])
+        scores = scores * weights
+        
+        # 稳定排序：同分时排名靠前的文档块、靠前的句子优先；全部为0时取前几句
+        chosen = []
+        seen = set()
+        has_match = scores.max() > 0
+        for idx in np.argsort(-scores, kind='stable'):
+            if has_match and scores[idx] <= 0:
+                break
+            sentence = candidates[idx][2]
+            if sentence in seen:
+                continue
+            seen.add(sentence)
+            chosen.append(idx)
+            if len(chosen) >= self.max_sentences:
+                break
+        
+        lines = [DEGRADED_NOTICES.get(reason, DEGRADED_NOTICES['error']), ""]
+        for i, idx in enumerate(sorted(chosen, key=lambda j: candidates[j][:2])):
+            rank, _, sentence = candidates[idx]
+            source = os.path.basename(str(relevant_docs[rank].get('source_file', ''))) or '未知来源'
+            lines.append(f"{i + 1}. {sentence}（来源: {source}）")
+        return "\n".join(lines)
@@ -11,6 +11,7 @@ from typing import List
 from pathlib import Path
 
 from rag_engine import RAGEngine
+from metrics import REGISTRY
 from system_info_helper import KylinSystemInfo
 from config import GUI_CONFIG, SUPPORTED_DOC_TYPES
 
@@ -25,6 +26,8 @@ class KylinQAApp:
         # 初始化RAG引擎
         self.rag_engine = RAGEngine()
         self.system_info = KylinSystemInfo()
+        self.question_seq = 0
+        self.last_timings = None
         
         # 创建主窗口
         self.root = tk.Tk()
@@ -107,6 +110,10 @@ class KylinQAApp:
         ttk.Checkbutton(options_frame, text="包含系统信息", 
                        variable=self.include_sysinfo).grid(row=0, column=0)
         
+        self.profiling = tk.BooleanVar(value=self.rag_engine.profiler.enabled)
+        ttk.Checkbutton(options_frame, text="性能剖析", variable=self.profiling,
+                       command=self.toggle_profiling).grid(row=1, column=0, sticky=tk.W)
+        
         # 回答显示区域
         self.answer_text = scrolledtext.ScrolledText(query_frame, 
                                                     font=self.font,
@@ -123,6 +130,7 @@ class KylinQAApp:
         self.status_label.grid(row=0, column=0, sticky=tk.W)
         
         ttk.Button(status_frame, text="系统信息", command=self.show_system_info).grid(row=0, column=1, padx=(5, 0))
+        ttk.Button(status_frame, text="运行诊断", command=self.show_diagnostics).grid(row=0, column=2, padx=(5, 0))
         
         # 更新知识库状态
         self.update_knowledge_base_status()
@@ -143,11 +151,25 @@ class KylinQAApp:
             self.status_label.config(text="正在处理文档...")
             self.root.update()
             
+            total = len(file_paths)
+            finished = [0]
+            
+            def on_progress(file_path, chunk_count, error):
+                finished[0] += 1
+                text = f"正在处理文档 ({finished[0]}/{total})..."
+                self.root.after(0, lambda: self.status_label.config(text=text))
+            
             def process_docs():
                 try:
-                    self.rag_engine.add_documents(list(file_paths))
+                    summary = self.rag_engine.add_documents(list(file_paths), on_progress)
                     self.root.after(0, lambda: self.status_label.config(text="文档添加完成"))
                     self.root.after(0, self.update_knowledge_base_status)
+                    
+                    if summary['failed']:
+                        failed = "\n".join(f"{Path(path).name}: {error}"
+                                           for path, error in summary['failed'].items())
+                        self.root.after(0, lambda: messagebox.showwarning(
+                            "警告", f"{len(summary['failed'])} 个文档处理失败:\n{failed}"))
                 except Exception as e:
                     self.root.after(0, lambda: messagebox.showerror("错误", f"添加文档失败: {str(e)}"))
                     self.root.after(0, lambda: self.status_label.config(text="就绪"))
@@ -168,13 +190,24 @@ class KylinQAApp:
         self.answer_text.insert(tk.END, "正在处理您的问题，请稍候...\n")
         self.root.update()
         
+        # 每次提问分配新的编号，旧问题尚未结束的流式输出不再写入界面
+        self.question_seq += 1
+        seq = self.question_seq
+        self.answer_started = False
+        self.answer_streamed = False
+        include_sysinfo = self.include_sysinfo.get()
+        
         def process_question():
             try:
-                result = self.rag_engine.query(question, self.include_sysinfo.get())
-                
-                # 在主线程中更新UI
-                self.root.after(0, lambda: self.display_answer(result))
-                self.root.after(0, lambda: self.status_label.config(text="就绪"))
+                # 流式获取结果：先返回检索结果，再逐段返回回答
+                for event in self.rag_engine.query_stream(question, include_sysinfo):
+                    if event['type'] == 'retrieval':
+                        self.root.after(0, self.begin_answer, seq, question)
+                        self.root.after(0, lambda: self.status_label.config(text="正在生成回答..."))
+                    elif event['type'] == 'token':
+                        self.root.after(0, self.append_answer_token, seq, event['text'])
+                    elif event['type'] == 'done':
+                        self.root.after(0, self.finish_answer, seq, event['result'])
                 
             except Exception as e:
                 error_msg = f"处理问题时出错: {str(e)}"
@@ -184,10 +217,54 @@ class KylinQAApp:
         
         threading.Thread(target=process_question, daemon=True).start()
     
+    def begin_answer(self, seq, question):
+        """
+        检索完成后显示问题，准备逐段追加回答
+        """
+        if seq != self.question_seq:
+            return
+        
+        self.answer_started = True
+        self._configure_answer_tags()
+        self.answer_text.delete(1.0, tk.END)
+        self.answer_text.insert(tk.END, f"问题: {question}\n\n", "question")
+        self.answer_text.insert(tk.END, "回答:\n", "answer")
+    
+    def append_answer_token(self, seq, text):
+        """
+        追加一段流式回答
+        """
+        if seq != self.question_seq:
+            return
+        
+        self.answer_streamed = True
+        self.answer_text.insert(tk.END, text, "answer")
+        self.answer_text.see(tk.END)
+    
+    def finish_answer(self, seq, result):
+        """
+        流式回答结束后显示参考文档
+        """
+        if seq != self.question_seq:
+            return
+        
+        self.last_timings = result.get('timings')
+        if not self.answer_started:
+            # 检索阶段即失败，没有收到任何流式内容
+            self.display_answer(result)
+        else:
+            if not self.answer_streamed:
+                self.answer_text.insert(tk.END, result['answer'], "answer")
+            self.answer_text.insert(tk.END, "\n\n", "answer")
+            self.display_references(result)
+        
+        self.status_label.config(text="就绪")
+    
     def display_answer(self, result):
         """
         显示回答结果
         """
+        self._configure_answer_tags()
         self.answer_text.delete(1.0, tk.END)
         
         # 显示问题
@@ -197,14 +274,24 @@ class KylinQAApp:
         self.answer_text.insert(tk.END, f"回答:\n{result['answer']}\n\n", "answer")
         
         # 显示相关文档信息
+        self.display_references(result)
+    
+    def display_references(self, result):
+        """
+        显示相关文档信息
+        """
         if result['relevant_docs']:
             self.answer_text.insert(tk.END, f"参考文档 ({len(result['relevant_docs'])} 个):\n", "info")
             for i, doc in enumerate(result['relevant_docs'][:3], 1):
                 similarity = doc.get('similarity', 0)
                 source = doc.get('source_file', '未知')
-                self.answer_text.insert(tk.END, f"{i}. {Path(source).name} (相似度: {similarity:.3f})\n", "info")
-        
-        # 配置文本标签样式
+                page = f" 第{doc['page_start']}页" if doc.get('page_start') else ""
+                self.answer_text.insert(tk.END, f"{i}. {Path(source).name}{page} (相似度: {similarity:.3f})\n", "info")
+    
+    def _configure_answer_tags(self):
+        """
+        配置文本标签样式
+        """
         self.answer_text.tag_config("question", font=(self.font[0], self.font[1], 'bold'))
         self.answer_text.tag_config("answer", font=self.font)
         self.answer_text.tag_config("info", font=(self.font[0], self.font[1] - 1), foreground="gray")
@@ -239,6 +326,96 @@ class KylinQAApp:
         except Exception as e:
             messagebox.showerror("错误", f"获取系统信息失败: {str(e)}")
     
+    def toggle_profiling(self):
+        """
+        开启或关闭性能剖析
+        """
+        enabled = self.profiling.get()
+        self.rag_engine.set_profiling(enabled)
+        if enabled:
+            self.status_label.config(text=f"性能剖析已开启，结果写入 {self.rag_engine.profiler.output_dir}")
+        else:
+            self.status_label.config(text="性能剖析已关闭")
+    
+    def show_diagnostics(self):
+        """
+        显示运行诊断：最近一次查询的各阶段耗时和进程级运行指标
+        """
+        diag_window = tk.Toplevel(self.root)
+        diag_window.title("运行诊断")
+        diag_window.geometry("700x550")
+        
+        text_widget = scrolledtext.ScrolledText(diag_window, font=self.font)
+        text_widget.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+        
+        def refresh():
+            text_widget.config(state=tk.NORMAL)
+            text_widget.delete(1.0, tk.END)
+            text_widget.insert(tk.END, self._format_diagnostics())
+            text_widget.config(state=tk.DISABLED)
+        
+        def export():
+            file_path = filedialog.asksaveasfilename(
+                title="导出运行指标",
+                defaultextension=".prom",
+                filetypes=[("Prometheus文本格式", "*.prom"), ("所有文件", "*.*")]
+            )
+            if file_path:
+                try:
+                    REGISTRY.write_prometheus(file_path)
+                    messagebox.showinfo("成功", f"运行指标已导出到 {file_path}", parent=diag_window)
+                except OSError as e:
+                    messagebox.showerror("错误", f"导出失败: {str(e)}", parent=diag_window)
+        
+        button_frame = ttk.Frame(diag_window)
+        button_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        ttk.Button(button_frame, text="刷新", command=refresh).pack(side=tk.LEFT)
+        ttk.Button(button_frame, text="导出Prometheus指标", command=export).pack(side=tk.LEFT, padx=(5, 0))
+        
+        refresh()
+    
+    def _format_diagnostics(self) -> str:
+        """
+        将运行指标格式化为诊断面板中显示的文本
+        """
+        snapshot = REGISTRY.snapshot()
+        lines = []
+        
+        def ms(seconds):
+            return f"{seconds * 1000:.1f} ms"
+        
+        lines.append("=== 最近一次查询各阶段耗时 ===")
+        if self.last_timings:
+            for stage, seconds in self.last_timings.items():
+                lines.append(f"{stage}: {ms(seconds)}")
+        else:
+            lines.append("暂无查询")
+        lines.append("")
+        
+        for name, title in [('kylin_qa_query_seconds', "查询总耗时"),
+                            ('kylin_qa_stage_seconds', "各阶段耗时"),
+                            ('kylin_qa_api_request_seconds', "API请求耗时")]:
+            lines.append(f"=== {title} (P50 / P95 / P99, 次数) ===")
+            for labels, entry in snapshot.get(name, {}).items():
+                lines.append(f"{labels or '全部'}: {ms(entry['p50'])} / {ms(entry['p95'])} / "
+                             f"{ms(entry['p99'])}, {entry['count']} 次")
+            lines.append("")
+        
+        lines.append("=== 计数 ===")
+        for name, values in snapshot.items():
+            if name.endswith('_total'):
+                for labels, value in values.items():
+                    lines.append(f"{name}{labels}: {value:g}")
+        lines.append("")
+        
+        lines.append("=== 知识库与内存 ===")
+        for name, unit in [('kylin_qa_index_documents', ''), ('kylin_qa_index_symbols', ''),
+                           ('kylin_qa_index_disk_bytes', 'MB'), ('process_resident_memory_bytes', 'MB')]:
+            for value in snapshot.get(name, {}).values():
+                lines.append(f"{name}: {value / 1024 / 1024:.1f} MB" if unit else f"{name}: {value:g}")
+        
+        return "\n".join(lines)
+    
     def clear_knowledge_base(self):
         """
         清空知识库
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+无界面批量问答模块 - 从JSONL文件或标准输入读取问题，流式输出JSONL结果
+
+输入每行一个问题，可以是JSON对象（question 必填，id、include_system_info、latency_budget 可选）、
+JSON字符串或纯文本；输出每行一个JSON对象，按完成顺序写出。
+本模块不依赖tkinter，可在无X环境的服务器和流水线中运行。
+"""
+
+import sys
+import json
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Optional, TextIO
+
+from rag_engine import RAGEngine
+from ai_models import is_error_answer
+from rate_limiter import PRIORITY_BATCH
+
+class HeadlessRunner:
+    """
+    无界面批量问答执行器
+    
+    读入与处理同时进行：同时处理的问题数不超过 concurrency，
+    结果在每个问题完成后立即写出。
+    """
+    
+    def __init__(self, concurrency: int = 16, include_system_info: bool = False,
+                 rag_engine: Optional[RAGEngine] = None):
+        self.concurrency = max(1, concurrency)
+        self.include_system_info = include_system_info
+        self.rag_engine = rag_engine or RAGEngine()
+        self.logger = logging.getLogger(__name__)
+        
+        self.completed = 0
+        self.failed = 0
+    
+    def run(self, input_stream: TextIO, output_stream: TextIO) -> Dict[str, Any]:
+        """
+        处理输入流中的全部问题
+        
+        Returns:
+            汇总信息：问题数、失败数、总耗时、吞吐量(问题/分钟)
+        """
+        return asyncio.run(self._run(input_stream, output_stream))
+    
+    async def _run(self, input_stream: TextIO, output_stream: TextIO) -> Dict[str, Any]:
+        loop = asyncio.get_event_loop()
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        start_time = time.perf_counter()
+        line_no = 0
+        
+        # API并发上限与批处理并发一致
+        self.rag_engine.async_model.max_concurrency = self.concurrency
+        
+        try:
+            while True:
+                line = await loop.run_in_executor(None, input_stream.readline)
+                if not line:
+                    break
+                line_no += 1
+                
+                item = self._parse_line(line, line_no)
+                if item is None:
+                    continue
+                
+                await slots.acquire()
+                task = asyncio.ensure_future(self._answer(item, output_stream))
+                task.add_done_callback(lambda _: slots.release())
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            await self.rag_engine.aclose()
+        
+        elapsed = time.perf_counter() - start_time
+        return {
+            'questions': self.completed,
+            'failed': self.failed,
+            'elapsed': elapsed,
+            'questions_per_minute': self.completed / elapsed * 60 if elapsed > 0 else 0.0
+        }
+    
+    def _parse_line(self, line: str, line_no: int) -> Optional[Dict[str, Any]]:
+        """
+        解析一行输入，空行返回None
+        """
+        line = line.strip()
+        if not line:
+            return None
+        
+        item = None
+        if line[0] in '{"':
+            try:
+                item = json.loads(line)
+            except ValueError:
+                self.logger.warning(f"第{line_no}行不是合法的JSON，按纯文本处理")
+        
+        if isinstance(item, dict):
+            item = dict(item)
+        elif isinstance(item, str):
+            item = {'question': item}
+        else:
+            item = {'question': line}
+        
+        item.setdefault('id', line_no)
+        return item
+    
+    async def _answer(self, item: Dict[str, Any], output_stream: TextIO):
+        """
+        回答一个问题并写出结果
+        """
+        question = str(item.get('question') or '').strip()
+        include_system_info = bool(item.get('include_system_info', self.include_system_info))
+        start_time = time.perf_counter()
+        
+        if question:
+            result = await self.rag_engine.aquery(question, include_system_info,
+                                                  item.get('latency_budget'), PRIORITY_BATCH)
+            error = 'error' in result or is_error_answer(result.get('answer', ''))
+        else:
+            result = {'question': question, 'answer': '', 'relevant_docs': [], 'timings': {}}
+            error = True
+        
+        timings = dict(result.get('timings', {}))
+        timings['total'] = time.perf_counter() - start_time
+        
+        record = {
+            'id': item['id'],
+            'question': question,
+            'answer': result.get('answer', ''),
+            'sources': [self._source(doc) for doc in result.get('relevant_docs', [])],
+            'context_tokens': result.get('context_tokens', 0),
+            'model': result.get('model'),
+            'timings': {stage: round(seconds, 4) for stage, seconds in timings.items()},
+            'cached': bool(result.get('cached')),
+            'degraded': bool(result.get('degraded')),
+            'ok': not error
+        }
+        
+        if error:
+            self.failed += 1
+        self.completed += 1
+        
+        output_stream.write(json.dumps(record, ensure_ascii=False, default=self._json_default) + '\n')
+        output_stream.flush()
+    
+    @staticmethod
+    def _source(doc: Dict[str, Any]) -> Dict[str, Any]:
+        source = {
+            'source_file': doc.get('source_file'),
+            'chunk_id': doc.get('chunk_id'),
+            'similarity': round(float(doc.get('similarity', 0)), 4)
+        }
+        if doc.get('page_start') is not None:
+            source['page'] = doc['page_start']
+        return source
+    
+    @staticmethod
+    def _json_default(value: Any) -> Any:
+        if hasattr(value, 'item'):
+            return value.item()
+        return str(value)
+
+def run_headless(input_path: str = '-', output_path: str = '-', concurrency: int = 16,
+                 include_system_info: bool = False) -> Dict[str, Any]:
+    """
+    运行无界面批量问答
+    
+    Args:
+        input_path: 问题文件路径，'-' 表示标准输入
+        output_path: 结果文件路径，'-' 表示标准输出
+        concurrency: 同时处理的问题数
+        include_system_info: 默认是否包含系统信息（可被输入行覆盖）
+    
+    Returns:
+        汇总信息
+    """
+    logger = logging.getLogger(__name__)
+    
+    input_stream = sys.stdin if input_path == '-' else open(input_path, 'r', encoding='utf-8')
+    output_stream = sys.stdout if output_path == '-' else open(output_path, 'w', encoding='utf-8')
+    
+    try:
+        runner = HeadlessRunner(concurrency, include_system_info)
+        summary = runner.run(input_stream, output_stream)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+    
+    logger.info(f"批量问答完成: {summary['questions']} 个问题，{summary['failed']} 个失败，"
+                f"耗时 {summary['elapsed']:.1f}s，吞吐量 {summary['questions_per_minute']:.1f} 问题/分钟")
+    return summary
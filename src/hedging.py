@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+对冲请求模块 - 请求迟迟没有响应时补发一个副本，取先返回的结果
+"""
+
+import logging
+import threading
+from collections import deque
+from typing import List, Dict, Any, Optional
+
+class HedgePolicy:
+    """
+    对冲策略
+    
+    按模型记录首字节延迟（非流式为整个响应，流式为第一个事件），取其分位数
+    （默认P90）作为对冲阈值：请求在阈值内仍没有响应时再发一个副本。
+    额外负载用信用额度限制：每个请求增加 max_extra_ratio 的额度，每次对冲消耗1，
+    因此长期来看对冲请求数不超过原请求数的 max_extra_ratio 倍。
+    """
+    
+    def __init__(self, config: Dict[str, Any]):
+        self.enabled = bool(config.get('enabled', False))
+        self.percentile = config.get('percentile', 90)
+        self.min_samples = config.get('min_samples', 20)
+        self.min_delay = config.get('min_delay', 0.5)
+        self.max_extra_ratio = config.get('max_extra_ratio', 0.1)
+        self.hedge_model = config.get('hedge_model')
+        self.logger = logging.getLogger(__name__)
+        
+        self._window = config.get('window', 200)
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, deque] = {}
+        # 初始给1次额度，突发时最多积攒 max_burst 次
+        self._credit = 1.0
+        self._max_credit = max(1.0, config.get('max_burst', 2))
+        
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.primary_wins = 0
+        self.budget_exhausted = 0
+    
+    def record(self, model: str, latency: float):
+        """
+        记录一次成功调用的首字节延迟
+        """
+        with self._lock:
+            if model not in self._latencies:
+                self._latencies[model] = deque(maxlen=self._window)
+            self._latencies[model].append(latency)
+    
+    def _quantile(self, model: str, pct: float) -> Optional[float]:
+        samples = self._latencies.get(model)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+    
+    def begin(self, model: str) -> Optional[float]:
+        """
+        开始一个请求，返回等待多久后对冲（秒）；样本不足时为None，不对冲
+        """
+        with self._lock:
+            self.requests += 1
+            self._credit = min(self._max_credit, self._credit + self.max_extra_ratio)
+            threshold = self._quantile(model, self.percentile)
+        return None if threshold is None else max(self.min_delay, threshold)
+    
+    def acquire(self, model: str, available_models: List[str]) -> Optional[str]:
+        """
+        申请发出一次对冲
+        
+        Returns:
+            对冲请求使用的模型；额外负载额度用尽时为None
+        """
+        with self._lock:
+            if self._credit < 1:
+                self.budget_exhausted += 1
+                return None
+            self._credit -= 1
+            self.hedges += 1
+            
+            if self.hedge_model != 'fastest':
+                return self.hedge_model or model
+            
+            # 选近期首字节延迟中位数最低的可用模型
+            best, best_latency = model, self._quantile(model, 50)
+            for candidate in available_models:
+                latency = self._quantile(candidate, 50)
+                if latency is not None and (best_latency is None or latency < best_latency):
+                    best, best_latency = candidate, latency
+            return best
+    
+    def finish(self, hedge_won: bool):
+        """
+        记录一次已对冲请求的胜出方
+        """
+        with self._lock:
+            if hedge_won:
+                self.hedge_wins += 1
+            else:
+                self.primary_wins += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取对冲统计信息
+        """
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'requests': self.requests,
+                'hedges': self.hedges,
+                'hedge_rate': self.hedges / self.requests if self.requests else 0.0,
+                'hedge_wins': self.hedge_wins,
+                'primary_wins': self.primary_wins,
+                'budget_exhausted': self.budget_exhausted,
+                'thresholds': {
+                    model: self._quantile(model, self.percentile) for model in self._latencies
+                }
+            }
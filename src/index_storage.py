@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+"""
+索引存储模块 - 版本化、可内存映射的向量索引磁盘格式
+
+目录结构（format_version = 1）:
+
+    vector_db/
+        manifest.json            清单文件，唯一的提交点
+        doc_freq_<gen>.npy       文档频率统计
+        documents.jsonl          文档块元数据，每行一个JSON，只追加
+        doc_ends.bin             documents.jsonl 中每行的结束偏移(int64)，只追加
+        symbols.jsonl            SDK符号索引记录 [符号, 文档序号, 级别]，只追加
+        segments/seg_<gen>/      CSR矩阵分段，每段为独立的 .npy 数组
+            vectors_data.npy / vectors_indices.npy / vectors_indptr.npy
+            counts_data.npy  / counts_indices.npy  / counts_indptr.npy
+
+所有写入先落到临时文件/目录再重命名，最后原子替换 manifest.json；
+manifest 未引用的数据（半截追加、孤立分段）在下次保存时被截断或清理。
+"""
+
+import os
+import json
+import mmap
+import shutil
+import logging
+import numpy as np
+import scipy.sparse as sp
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+INDEX_FORMAT_VERSION = 1
+
+MANIFEST_FILE = 'manifest.json'
+DOCUMENTS_FILE = 'documents.jsonl'
+DOC_ENDS_FILE = 'doc_ends.bin'
+SYMBOLS_FILE = 'symbols.jsonl'
+SEGMENTS_DIR = 'segments'
+
+class DocumentTable:
+    """
+    文档元数据表
+    
+    已持久化的文档通过内存映射按需解析，启动时不读取全部元数据；
+    新增但尚未保存的文档保存在内存中。
+    """
+    
+    def __init__(self, path: Optional[str] = None, count: int = 0):
+        self._mmap = None
+        self._ends = np.empty(0, dtype='<i8')
+        self._pending: List[Dict[str, Any]] = []
+        
+        if path and count > 0:
+            with open(path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            ends_path = os.path.join(os.path.dirname(path), DOC_ENDS_FILE)
+            self._ends = np.memmap(ends_path, dtype='<i8', mode='r', shape=(count,))
+    
+    @property
+    def persisted_count(self) -> int:
+        return len(self._ends)
+    
+    @property
+    def pending(self) -> List[Dict[str, Any]]:
+        return self._pending
+    
+    def __len__(self) -> int:
+        return len(self._ends) + len(self._pending)
+    
+    def __getitem__(self, idx: int) -> Dict[str, Any]:
+        if idx < 0:
+            idx += len(self)
+        if idx < 0 or idx >= len(self):
+            raise IndexError(idx)
+        
+        persisted = len(self._ends)
+        if idx >= persisted:
+            return self._pending[idx - persisted]
+        
+        start = int(self._ends[idx - 1]) if idx > 0 else 0
+        return json.loads(self._mmap[start:int(self._ends[idx])])
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for idx in range(len(self)):
+            yield self[idx]
+    
+    def extend(self, documents: List[Dict[str, Any]]):
+        self._pending.extend(documents)
+    
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+class IndexStorage:
+    """
+    向量索引的磁盘存储
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self.manifest: Optional[Dict[str, Any]] = None
+    
+    def _file(self, *parts: str) -> str:
+        return os.path.join(self.path, *parts)
+    
+    def exists(self) -> bool:
+        """
+        是否存在新格式的索引
+        """
+        return os.path.isfile(self._file(MANIFEST_FILE))
+    
+    def is_legacy(self) -> bool:
+        """
+        是否为旧版单文件pickle格式
+        """
+        return os.path.isfile(self.path)
+    
+    def load(self) -> Dict[str, Any]:
+        """
+        加载索引清单和元数据；各分段的矩阵由 load_segment 按需映射
+        
+        Returns:
+            包含 manifest、doc_freq、documents、symbols 的字典
+        """
+        with open(self._file(MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        
+        version = manifest.get('format_version')
+        if version != INDEX_FORMAT_VERSION:
+            raise ValueError(f"不支持的索引格式版本: {version}")
+        
+        self.manifest = manifest
+        
+        return {
+            'manifest': manifest,
+            'doc_freq': np.load(self._file(manifest['doc_freq_file'])),
+            'documents': DocumentTable(self._file(DOCUMENTS_FILE), manifest['document_count']),
+            'symbols': self._load_symbols(manifest.get('symbols_bytes', 0))
+        }
+    
+    def _load_symbols(self, committed_bytes: int) -> List[List[Any]]:
+        path = self._file(SYMBOLS_FILE)
+        if not committed_bytes or not os.path.exists(path):
+            return []
+        with open(path, 'rb') as f:
+            data = f.read(committed_bytes)
+        return [json.loads(line) for line in data.splitlines() if line]
+    
+    def load_segment(self, segment: Dict[str, Any]) -> Tuple[sp.csr_matrix, sp.csr_matrix]:
+        """
+        以 mmap_mode='r' 映射一个分段，返回 (词频矩阵, 权重矩阵)
+        
+        Args:
+            segment: manifest['segments'] 中的一项
+        """
+        n_features = self.manifest['n_features']
+        return (self._load_matrix(segment['name'], 'counts', segment['rows'], n_features),
+                self._load_matrix(segment['name'], 'vectors', segment['rows'], n_features))
+    
+    def _load_matrix(self, segment: str, name: str, rows: int, n_features: int) -> sp.csr_matrix:
+        arrays = [
+            np.load(self._file(SEGMENTS_DIR, segment, f"{name}_{part}.npy"), mmap_mode='r')
+            for part in ('data', 'indices', 'indptr')
+        ]
+        return sp.csr_matrix(tuple(arrays), shape=(rows, n_features), copy=False)
+    
+    @staticmethod
+    def _rows_from(matrices: List[Tuple[sp.csr_matrix, sp.csr_matrix]],
+                   start: int) -> Tuple[sp.csr_matrix, sp.csr_matrix]:
+        """
+        取出各分段中从第 start 行起的全部行，合并为一对矩阵
+        """
+        counts, vectors, offset = [], [], 0
+        for segment_counts, segment_vectors in matrices:
+            rows = segment_counts.shape[0]
+            if offset + rows > start:
+                skip = max(start - offset, 0)
+                counts.append(segment_counts[skip:] if skip else segment_counts)
+                vectors.append(segment_vectors[skip:] if skip else segment_vectors)
+            offset += rows
+        if len(counts) == 1:
+            return counts[0], vectors[0]
+        return sp.vstack(counts, format='csr'), sp.vstack(vectors, format='csr')
+    
+    def save(self, documents: DocumentTable, matrices: List[Tuple[sp.csr_matrix, sp.csr_matrix]],
+             doc_freq: np.ndarray, info: Dict[str, Any], compact: bool = False,
+             max_segments: int = 8, symbols: Optional[List[Any]] = None):
+        """
+        保存索引
+        
+        默认只追加新文档元数据和新增行组成的分段；compact=True（或分段数
+        超过 max_segments）时将全部行写成单个分段并删除旧分段。
+        
+        Args:
+            documents: 文档表，其 pending 部分会被追加写入
+            matrices: 按行顺序排列的各分段 (词频矩阵, 权重矩阵)
+            doc_freq: 文档频率数组
+            info: 额外写入manifest的字段（特征维度等）
+            compact: 是否强制合并分段
+            max_segments: 最大分段数
+            symbols: 新增的符号索引记录
+        """
+        os.makedirs(self._file(SEGMENTS_DIR), exist_ok=True)
+        
+        previous = self.manifest or self._empty_manifest()
+        generation = previous['generation'] + 1
+        persisted_rows = previous['document_count']
+        total_rows = len(documents)
+        
+        segments = list(previous['segments'])
+        if compact or len(segments) >= max_segments:
+            segments, start = [], 0
+        else:
+            start = persisted_rows
+        
+        # 1. 追加文档元数据（先截断到上次提交的位置，丢弃未提交的残留）
+        doc_bytes = self._append_documents(documents.pending, previous)
+        symbols_bytes = self._append_symbols(symbols or [], previous.get('symbols_bytes', 0))
+        
+        # 2. 写入新分段
+        if matrices and total_rows > start:
+            name = f"seg_{generation:06d}"
+            self._write_segment(name, *self._rows_from(matrices, start))
+            segments.append({'name': name, 'rows': total_rows - start})
+        
+        # 3. 写入文档频率
+        doc_freq_file = f"doc_freq_{generation:06d}.npy"
+        self._atomic_write(self._file(doc_freq_file), lambda f: np.save(f, doc_freq))
+        
+        # 4. 原子替换manifest，完成提交
+        manifest = dict(info)
+        manifest.update({
+            'format_version': INDEX_FORMAT_VERSION,
+            'generation': generation,
+            'document_count': total_rows,
+            'documents_bytes': doc_bytes,
+            'symbols_bytes': symbols_bytes,
+            'doc_freq_file': doc_freq_file,
+            'segments': segments
+        })
+        self._atomic_write(
+            self._file(MANIFEST_FILE),
+            lambda f: f.write(json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+        )
+        self.manifest = manifest
+        
+        self._remove_unreferenced(manifest)
+    
+    @staticmethod
+    def _empty_manifest() -> Dict[str, Any]:
+        return {'generation': 0, 'document_count': 0, 'documents_bytes': 0,
+                'symbols_bytes': 0, 'segments': []}
+    
+    def _append_documents(self, documents: List[Dict[str, Any]], previous: Dict[str, Any]) -> int:
+        """
+        追加文档元数据，返回追加后的文件长度
+        """
+        committed_bytes = previous['documents_bytes']
+        committed_docs = previous['document_count']
+        
+        with open(self._file(DOCUMENTS_FILE), 'ab') as docs_file, \
+             open(self._file(DOC_ENDS_FILE), 'ab') as ends_file:
+            docs_file.truncate(committed_bytes)
+            ends_file.truncate(committed_docs * 8)
+            
+            offset = committed_bytes
+            ends = np.empty(len(documents), dtype='<i8')
+            for i, doc in enumerate(documents):
+                line = json.dumps(doc, ensure_ascii=False).encode('utf-8') + b'\n'
+                docs_file.write(line)
+                offset += len(line)
+                ends[i] = offset
+            ends_file.write(ends.tobytes())
+            
+            docs_file.flush()
+            ends_file.flush()
+            os.fsync(docs_file.fileno())
+            os.fsync(ends_file.fileno())
+        
+        return offset
+    
+    def _append_symbols(self, entries: List[Any], committed_bytes: int) -> int:
+        """
+        追加符号索引记录，返回追加后的文件长度
+        """
+        with open(self._file(SYMBOLS_FILE), 'ab') as f:
+            f.truncate(committed_bytes)
+            data = b''.join(json.dumps(entry, ensure_ascii=False).encode('utf-8') + b'\n'
+                            for entry in entries)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        return committed_bytes + len(data)
+    
+    def _write_segment(self, name: str, counts: sp.csr_matrix, vectors: sp.csr_matrix):
+        """
+        写入分段：先写临时目录，再整体重命名
+        """
+        final_dir = self._file(SEGMENTS_DIR, name)
+        tmp_dir = final_dir + '.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        
+        for prefix, matrix in (('counts', counts), ('vectors', vectors)):
+            matrix = sp.csr_matrix(matrix)
+            for part in ('data', 'indices', 'indptr'):
+                np.save(os.path.join(tmp_dir, f"{prefix}_{part}.npy"), np.asarray(getattr(matrix, part)))
+        
+        shutil.rmtree(final_dir, ignore_errors=True)
+        os.rename(tmp_dir, final_dir)
+    
+    @staticmethod
+    def _atomic_write(path: str, writer):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            writer(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    
+    def _remove_unreferenced(self, manifest: Dict[str, Any]):
+        """
+        清理manifest未引用的分段和统计文件
+        """
+        referenced = {segment['name'] for segment in manifest['segments']}
+        for name in os.listdir(self._file(SEGMENTS_DIR)):
+            if name not in referenced:
+                shutil.rmtree(self._file(SEGMENTS_DIR, name), ignore_errors=True)
+        
+        for name in os.listdir(self.path):
+            if name.startswith('doc_freq_') and name != manifest['doc_freq_file']:
+                try:
+                    os.remove(self._file(name))
+                except OSError as e:
+                    self.logger.warning(f"清理旧统计文件失败: {str(e)}")
+    
+    def clear(self):
+        """
+        删除整个索引
+        """
+        self.manifest = None
+        if os.path.isdir(self.path):
+            shutil.rmtree(self.path)
+        elif os.path.isfile(self.path):
+            os.remove(self.path)
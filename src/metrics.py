@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+运行指标模块 - 进程级的计数器、仪表和延迟直方图，可导出为Prometheus文本格式
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Callable, Iterator, List, Tuple
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from config import METRICS_CONFIG
+
+# 延迟直方图报告的分位数
+QUANTILES = (0.5, 0.95, 0.99)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ''
+    pairs = []
+    for name, value in key:
+        value = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+def _format_value(value: float) -> str:
+    if value != value:
+        return 'NaN'
+    return repr(float(value))
+
+@contextmanager
+def stage_timer(timings: Optional[Dict[str, float]], stage: str) -> Iterator[None]:
+    """
+    将代码块的耗时(秒)累加到 timings[stage]；timings 为None时不计时
+    """
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+class Counter:
+    """
+    只增不减的计数器，可按标签区分
+    """
+    
+    kind = 'counter'
+    
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, float] = {}
+    
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+    
+    def samples(self) -> List[Tuple[str, LabelKey, float]]:
+        with self._lock:
+            return [(self.name, key, value) for key, value in sorted(self._values.items())]
+    
+    def snapshot(self) -> Dict[str, float]:
+        return {_format_labels(key): value for _, key, value in self.samples()}
+
+class Gauge:
+    """
+    可增可减的仪表；设置了 fn 时在读取时调用 fn 取值（返回None表示暂无数据）
+    """
+    
+    kind = 'gauge'
+    
+    def __init__(self, name: str, help_text: str, fn: Optional[Callable[[], Optional[float]]] = None):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, float] = {}
+    
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = float(value)
+    
+    def samples(self) -> List[Tuple[str, LabelKey, float]]:
+        if self.fn is not None:
+            try:
+                value = self.fn()
+            except Exception as e:
+                logging.getLogger(__name__).debug(f"读取指标 {self.name} 失败: {e}")
+                return []
+            return [] if value is None else [(self.name, (), float(value))]
+        with self._lock:
+            return [(self.name, key, value) for key, value in sorted(self._values.items())]
+    
+    def snapshot(self) -> Dict[str, float]:
+        return {_format_labels(key): value for _, key, value in self.samples()}
+
+class Histogram:
+    """
+    延迟直方图
+    
+    每组标签保留最近 window 个样本用于计算分位数，另累计总次数和总和；
+    以Prometheus summary 类型导出（quantile 标签 + _sum + _count）。
+    """
+    
+    kind = 'summary'
+    
+    def __init__(self, name: str, help_text: str, window: int = 1000):
+        self.name = name
+        self.help = help_text
+        self.window = window
+        self._lock = threading.Lock()
+        self._series: Dict[LabelKey, Tuple[deque, List[float]]] = {}
+    
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = (deque(maxlen=self.window), [0, 0.0])
+            series[0].append(value)
+            series[1][0] += 1
+            series[1][1] += value
+    
+    @staticmethod
+    def _quantiles(samples: deque) -> Dict[float, float]:
+        ordered = sorted(samples)
+        return {q: ordered[min(len(ordered) - 1, int(len(ordered) * q))] for q in QUANTILES}
+    
+    def quantiles(self, **labels) -> Dict[float, float]:
+        """
+        最近样本的各分位数，无样本时为空
+        """
+        with self._lock:
+            series = self._series.get(_label_key(labels))
+            return self._quantiles(series[0]) if series and series[0] else {}
+    
+    def samples(self) -> List[Tuple[str, LabelKey, float]]:
+        result = []
+        with self._lock:
+            for key, (recent, (count, total)) in sorted(self._series.items()):
+                for q, value in self._quantiles(recent).items():
+                    result.append((self.name, key + (('quantile', str(q)),), value))
+                result.append((self.name + '_sum', key, total))
+                result.append((self.name + '_count', key, count))
+        return result
+    
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            snapshot = {}
+            for key, (recent, (count, total)) in sorted(self._series.items()):
+                entry = {f'p{int(q * 100)}': value for q, value in self._quantiles(recent).items()}
+                entry['count'] = count
+                entry['mean'] = total / count if count else 0.0
+                snapshot[_format_labels(key)] = entry
+            return snapshot
+
+class MetricsRegistry:
+    """
+    指标注册表
+    
+    同名指标只创建一次，各模块可在导入时直接注册并共享同一对象。
+    """
+    
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Any] = {}
+        self._exporter: Optional[threading.Thread] = None
+    
+    def _register(self, name: str, factory: Callable[[], Any]):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+    
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(name, lambda: Counter(name, help_text))
+    
+    def gauge(self, name: str, help_text: str,
+              fn: Optional[Callable[[], Optional[float]]] = None) -> Gauge:
+        gauge = self._register(name, lambda: Gauge(name, help_text, fn))
+        if fn is not None:
+            # 重复注册时以最新的取值函数为准（如重新创建了引擎）
+            gauge.fn = fn
+        return gauge
+    
+    def histogram(self, name: str, help_text: str) -> Histogram:
+        return self._register(name, lambda: Histogram(name, help_text, self.window))
+    
+    def get(self, name: str) -> Optional[Any]:
+        with self._lock:
+            return self._metrics.get(name)
+    
+    def _sorted_metrics(self) -> List[Any]:
+        with self._lock:
+            return [self._metrics[name] for name in sorted(self._metrics)]
+    
+    def to_prometheus(self) -> str:
+        """
+        导出为Prometheus文本格式
+        """
+        lines = []
+        for metric in self._sorted_metrics():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, value in metric.samples():
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        以字典形式返回全部指标的当前值，供界面显示
+        """
+        return {metric.name: metric.snapshot() for metric in self._sorted_metrics()}
+    
+    def write_prometheus(self, path: str):
+        """
+        将指标写入文件（先写临时文件再替换，读取方不会看到写了一半的内容）
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+    
+    def start_exporter(self, path: str, interval: float = 15):
+        """
+        启动后台线程，每 interval 秒将指标写入文件（如供 node_exporter textfile collector 采集）
+        """
+        if self._exporter is not None:
+            return
+        
+        def run():
+            while True:
+                try:
+                    self.write_prometheus(path)
+                except OSError as e:
+                    self.logger.warning(f"写出指标文件失败: {e}")
+                time.sleep(interval)
+        
+        self._exporter = threading.Thread(target=run, name='metrics-exporter', daemon=True)
+        self._exporter.start()
+        self.logger.info(f"每 {interval} 秒将运行指标写入 {path}")
+
+def resident_memory() -> Optional[float]:
+    """
+    当前进程的常驻内存(字节)
+    """
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+# 进程级的指标注册表
+REGISTRY = MetricsRegistry(window=METRICS_CONFIG.get('window', 1000))
+
+REGISTRY.gauge('process_resident_memory_bytes', '进程常驻内存(字节)', resident_memory)
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+模型路由模块 - 按问题难度和各模型的实时延迟选择模型
+"""
+
+import re
+import time
+import logging
+import threading
+from collections import deque
+from typing import List, Dict, Any, Optional, Tuple
+
+# 需要推理、比较或生成代码的问题
+COMPLEX_PATTERN = re.compile(
+    r'为什么|区别|对比|比较|原理|分析|优缺点|如何实现|实现原理|步骤|编写|写一个|代码示例|示例代码|排查|调试|'
+    r'\bwhy\b|\bcompare\b|\bexplain\b|\bimplement\b|\bdebug\b|\bwrite\b',
+    re.IGNORECASE
+)
+
+class ModelRouter:
+    """
+    模型路由器
+    
+    由问题长度、是否含推理类关键词、检索置信度（最高相似度）和上下文大小计算
+    问题难度，映射到从小到大排列的模型梯队中的一级；若该级模型近期的P90延迟
+    超过SLO或错误率过高，则逐级降到更小的模型。
+    """
+    
+    def __init__(self, config: Dict[str, Any]):
+        self.models: List[str] = list(config.get('models', []))
+        self.enabled = bool(config.get('enabled', True)) and len(self.models) > 1
+        self.default_model = config.get('default_model') or (self.models[-1] if self.models else None)
+        self.latency_slo = config.get('latency_slo', 10.0)
+        self.max_error_rate = config.get('max_error_rate', 0.3)
+        self.min_samples = config.get('min_samples', 5)
+        self.history_seconds = config.get('history_seconds', 300)
+        self.confident_similarity = config.get('confident_similarity', 0.6)
+        self.long_question_tokens = config.get('long_question_tokens', 60)
+        self.large_context_tokens = config.get('large_context_tokens', 1500)
+        self.logger = logging.getLogger(__name__)
+        
+        window = config.get('window', 50)
+        self._lock = threading.Lock()
+        self._history: Dict[str, deque] = {model: deque(maxlen=window) for model in self.models}
+        self._routed: Dict[str, int] = {model: 0 for model in self.models}
+    
+    def difficulty(self, question: str, top_similarity: float, context_tokens: int,
+                   question_tokens: int) -> float:
+        """
+        计算问题难度，范围 [0, 1]
+        """
+        score = 0.0
+        if COMPLEX_PATTERN.search(question):
+            score += 0.45
+        score += 0.2 * min(1.0, question_tokens / self.long_question_tokens)
+        score += 0.2 * (1.0 - min(1.0, top_similarity / self.confident_similarity))
+        score += 0.15 * min(1.0, context_tokens / self.large_context_tokens)
+        return min(1.0, score)
+    
+    def route(self, question: str, relevant_docs: List[Dict[str, Any]], context_tokens: int,
+              question_tokens: int) -> Tuple[str, str]:
+        """
+        为一次查询选择模型
+        
+        Args:
+            question: 用户问题
+            relevant_docs: 检索到的文档块
+            context_tokens: 上下文token数
+            question_tokens: 问题token数
+        
+        Returns:
+            (模型名称, 选择原因)
+        """
+        if not self.enabled:
+            return self.default_model, 'default'
+        
+        top_similarity = max((float(doc.get('similarity', 0)) for doc in relevant_docs), default=0.0)
+        difficulty = self.difficulty(question, top_similarity, context_tokens, question_tokens)
+        tier = min(len(self.models) - 1, int(difficulty * len(self.models)))
+        reason = f"difficulty={difficulty:.2f}"
+        
+        with self._lock:
+            chosen = tier
+            while chosen > 0 and not self._healthy(self.models[chosen]):
+                chosen -= 1
+            if chosen != tier:
+                reason += f", {self.models[tier]} 超出延迟SLO或错误率过高"
+            elif not self._healthy(self.models[chosen]):
+                reason += ", 所有模型均不满足SLO"
+            self._routed[self.models[chosen]] += 1
+        
+        return self.models[chosen], reason
+    
+    def fallback(self, model: str) -> Optional[str]:
+        """
+        调用失败时可改用的下一级较小模型
+        """
+        if not self.enabled or model not in self.models:
+            return None
+        idx = self.models.index(model)
+        return self.models[idx - 1] if idx > 0 else None
+    
+    def record(self, model: str, latency: float, ok: bool):
+        """
+        记录一次调用的耗时和结果
+        """
+        with self._lock:
+            if model in self._history:
+                self._history[model].append((latency, ok, time.time()))
+    
+    def _recent(self, model: str) -> List[Tuple[float, bool, float]]:
+        """
+        最近 history_seconds 秒内的调用记录；旧记录过期后被降级的模型会重新得到机会
+        """
+        cutoff = time.time() - self.history_seconds
+        return [entry for entry in self._history[model] if entry[2] >= cutoff]
+    
+    @staticmethod
+    def _percentile(history: List[Tuple[float, bool, float]], pct: float) -> Optional[float]:
+        latencies = sorted(latency for latency, ok, _ in history if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100))]
+    
+    def _healthy(self, model: str) -> bool:
+        history = self._recent(model)
+        if len(history) < self.min_samples:
+            return True
+        
+        errors = sum(1 for _, ok, _ in history if not ok)
+        if errors / len(history) > self.max_error_rate:
+            return False
+        
+        p90 = self._percentile(history, 90)
+        return p90 is None or p90 <= self.latency_slo
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取各模型的路由次数、延迟和错误率
+        """
+        with self._lock:
+            stats = {}
+            for model in self.models:
+                history = self._recent(model)
+                errors = sum(1 for _, ok, _ in history if not ok)
+                stats[model] = {
+                    'routed': self._routed[model],
+                    'samples': len(history),
+                    'p50': self._percentile(history, 50),
+                    'p90': self._percentile(history, 90),
+                    'error_rate': errors / len(history) if history else 0.0,
+                    'healthy': self._healthy(model)
+                }
+            return {'enabled': self.enabled, 'latency_slo': self.latency_slo, 'models': stats}
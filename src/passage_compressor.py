@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+段落压缩模块 - 只保留文档块中与问题相关的句子
+"""
+
+import re
+import logging
+import numpy as np
+import scipy.sparse as sp
+from typing import List, Dict, Any, Callable
+
+# 句子边界：中文句末标点、英文句末标点后接空白、换行
+SENTENCE_PATTERN = re.compile(r'[^。！？；!?;\n]*(?:[。！？；!?;]+[ \t]*\n*|\n+|$)')
+ENGLISH_BOUNDARY = re.compile(r'(?<=[.])(?=\s+[A-Z])')
+
+GAP_MARKER = '……'
+
+def split_sentences(text: str) -> List[str]:
+    """
+    按中英文标点和换行切分句子
+    
+    句子保留原有的标点和空白，按顺序拼接即可还原原文（空白句除外）。
+    """
+    sentences = []
+    for piece in SENTENCE_PATTERN.findall(text):
+        for sentence in ENGLISH_BOUNDARY.split(piece):
+            if sentence.strip():
+                sentences.append(sentence)
+    return sentences
+
+class PassageCompressor:
+    """
+    抽取式段落压缩器
+    
+    将所有候选文档块切成句子，与问题一起做一次向量化，用一次稀疏矩阵乘法
+    得到每个句子与问题的相似度；每个文档块保留得分最高的若干句及其前后相邻句，
+    按原文顺序拼接，不相邻的片段之间用省略号连接。
+    """
+    
+    def __init__(self, vectorize: Callable[[List[str]], sp.csr_matrix],
+                 top_sentences: int = 3, neighbors: int = 1):
+        self.vectorize = vectorize
+        self.top_sentences = max(1, top_sentences)
+        self.neighbors = max(0, neighbors)
+        self.logger = logging.getLogger(__name__)
+    
+    def compress(self, question: str, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        压缩文档块
+        
+        Args:
+            question: 用户问题
+            documents: 检索到的文档块
+        
+        Returns:
+            文档块副本列表，content 为压缩后的内容，original_length 为原内容长度
+        """
+        doc_sentences = [split_sentences(doc.get('content', '')) for doc in documents]
+        all_sentences = [sentence for sentences in doc_sentences for sentence in sentences]
+        if not all_sentences:
+            return [dict(doc) for doc in documents]
+        
+        vectors = self.vectorize([question] + all_sentences)
+        scores = (vectors[1:] @ vectors[0].T).toarray().ravel()
+        
+        compressed = []
+        offset = 0
+        for doc, sentences in zip(documents, doc_sentences):
+            count = len(sentences)
+            doc_scores = scores[offset:offset + count]
+            offset += count
+            
+            doc = dict(doc)
+            doc['original_length'] = len(doc.get('content', ''))
+            if count > self.top_sentences * (1 + 2 * self.neighbors):
+                doc['content'] = self._extract(sentences, doc_scores)
+            compressed.append(doc)
+        
+        return compressed
+    
+    def _extract(self, sentences: List[str], scores: np.ndarray) -> str:
+        """
+        选出得分最高的句子及其相邻句，按原文顺序拼接
+        """
+        # 稳定排序：同分时靠前的句子优先
+        top = np.argsort(-scores, kind='stable')[:self.top_sentences]
+        
+        keep = np.zeros(len(sentences), dtype=bool)
+        for idx in top:
+            keep[max(0, idx - self.neighbors):idx + self.neighbors + 1] = True
+        
+        parts = []
+        previous = -1
+        for idx in np.flatnonzero(keep):
+            if parts and idx != previous + 1:
+                parts.append(GAP_MARKER)
+            parts.append(sentences[idx])
+            previous = idx
+        return ''.join(parts).strip()
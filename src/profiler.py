@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+性能剖析模块 - 用 cProfile 和 tracemalloc 记录文档导入和查询的热点与内存分配
+"""
+
+import io
+import os
+import time
+import pstats
+import cProfile
+import inspect
+import logging
+import itertools
+import threading
+import functools
+import tracemalloc
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Callable, List, Optional
+
+# 当前上下文（线程或协程任务）正在剖析的操作的报告说明，未在剖析时为None
+_ACTIVE_NOTES: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar('profiler_notes', default=None)
+
+class Profiler:
+    """
+    性能剖析器
+    
+    开启后通过 attach 在对象实例上用剖析包装替换指定方法，关闭时移除包装，
+    恢复为类上的原始方法，因此关闭状态下调用路径与未剖析时完全相同，没有额外开销。
+    
+    每次被剖析的操作写出两个文件到 output_dir：
+        <时间>-<操作>-<序号>.prof   cProfile 数据，可用 pstats / snakeviz 查看
+        <时间>-<操作>-<序号>.txt    按累计耗时排序的函数和操作期间仍存活的内存分配热点
+    
+    cProfile 只记录开启它的线程，同一时刻只剖析一个操作，其间并发的其他操作不剖析。
+    被剖析的操作可用 is_profiling 判断自己是否在剖析中，把原本交给线程池或子进程的
+    工作留在本线程执行，并用 note 在报告开头说明这类调整。
+    """
+    
+    def __init__(self, config: Dict[str, Any]):
+        self.enabled = False
+        self.output_dir = config.get('output_dir', './logs/profiles')
+        self.top_functions = config.get('top_functions', 40)
+        self.top_allocations = config.get('top_allocations', 25)
+        self.tracemalloc_frames = config.get('tracemalloc_frames', 1)
+        self.logger = logging.getLogger(__name__)
+        
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+        self.profiles = 0
+        self.skipped = 0
+    
+    def attach(self, obj: Any, methods: Dict[str, str]):
+        """
+        开启剖析：为 obj 的方法安装剖析包装
+        
+        Args:
+            obj: 被剖析的对象
+            methods: {方法名: 写入报告的操作名}
+        """
+        for name, operation in methods.items():
+            obj.__dict__[name] = self.wrap(getattr(obj, name), operation)
+        self.enabled = True
+        self.logger.info(f"性能剖析已开启，结果写入 {self.output_dir}")
+    
+    def detach(self, obj: Any, methods: Dict[str, str]):
+        """
+        关闭剖析：移除 attach 安装的包装
+        """
+        for name in methods:
+            obj.__dict__.pop(name, None)
+        self.enabled = False
+        self.logger.info("性能剖析已关闭")
+    
+    def is_profiling(self) -> bool:
+        """
+        当前线程或协程任务是否处于被剖析的操作中
+        """
+        return _ACTIVE_NOTES.get() is not None
+    
+    def note(self, text: str):
+        """
+        为当前正在剖析的操作在报告开头添加一条说明（未在剖析时忽略）
+        """
+        notes = _ACTIVE_NOTES.get()
+        if notes is not None and text not in notes:
+            notes.append(text)
+    
+    def wrap(self, fn: Callable, operation: str) -> Callable:
+        """
+        为函数、生成器函数或协程函数生成剖析包装
+        """
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                # 协程在事件循环线程中执行，剖析结果包含同一循环中其他任务的开销
+                with self.profile(operation):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+        
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                # 在消费生成器的线程中剖析整个迭代过程
+                with self.profile(operation):
+                    yield from fn(*args, **kwargs)
+            return generator_wrapper
+        
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with self.profile(operation):
+                return fn(*args, **kwargs)
+        return wrapper
+    
+    @contextmanager
+    def profile(self, operation: str) -> Iterator[None]:
+        """
+        剖析代码块并写出报告；已有操作正在剖析时直接执行，不剖析
+        """
+        if not self._lock.acquire(blocking=False):
+            self.skipped += 1
+            yield
+            return
+        
+        started_tracing = not tracemalloc.is_tracing()
+        try:
+            if started_tracing:
+                tracemalloc.start(self.tracemalloc_frames)
+            elif hasattr(tracemalloc, 'reset_peak'):
+                # Python 3.9+；已在跟踪时峰值从本次操作开始计算
+                tracemalloc.reset_peak()
+            notes = []
+            token = _ACTIVE_NOTES.set(notes)
+            thread = threading.current_thread().name
+            profile = cProfile.Profile()
+            start = time.perf_counter()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                duration = time.perf_counter() - start
+                _ACTIVE_NOTES.reset(token)
+                snapshot = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                if started_tracing:
+                    tracemalloc.stop()
+                self._write(operation, profile, snapshot, duration, peak, thread, notes)
+        finally:
+            self._lock.release()
+    
+    def _write(self, operation: str, profile: cProfile.Profile, snapshot: tracemalloc.Snapshot,
+               duration: float, peak: int, thread: str, notes: List[str]):
+        """
+        写出 .prof 文件和文本报告
+        """
+        base = os.path.join(self.output_dir,
+                            f"{time.strftime('%Y%m%d-%H%M%S')}-{operation}-{next(self._seq)}")
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            profile.dump_stats(base + '.prof')
+            
+            report = io.StringIO()
+            report.write(f"操作: {operation}\n")
+            report.write(f"耗时: {duration:.3f} s\n")
+            report.write(f"内存分配峰值: {peak / 1024 / 1024:.1f} MB\n")
+            report.write(f"剖析线程: {thread}（函数耗时只统计该线程，其他线程和子进程中的工作未计入）\n")
+            for note in notes:
+                report.write(f"说明: {note}\n")
+            report.write("\n")
+            
+            report.write(f"=== 函数耗时（按累计时间，前 {self.top_functions} 项）===\n")
+            stats = pstats.Stats(profile, stream=report)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_functions)
+            
+            report.write(f"=== 操作结束时仍存活的内存分配（按大小，前 {self.top_allocations} 项）===\n")
+            snapshot = snapshot.filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__)
+            ])
+            for stat in snapshot.statistics('lineno')[:self.top_allocations]:
+                report.write(f"{stat.size / 1024:10.1f} KiB {stat.count:8d} 块  {stat.traceback}\n")
+            
+            with open(base + '.txt', 'w', encoding='utf-8') as f:
+                f.write(report.getvalue())
+            self.profiles += 1
+            self.logger.info(f"{operation} 剖析完成({duration:.3f}s)，结果已写入 {base}.prof / .txt")
+        except OSError as e:
+            self.logger.warning(f"写出剖析结果失败: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取剖析统计信息
+        """
+        return {
+            'enabled': self.enabled,
+            'output_dir': self.output_dir,
+            'profiles': self.profiles,
+            'skipped': self.skipped
+        }
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+查询结果缓存模块 - 基于LRU+TTL的问答结果缓存
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    import zhconv
+except ImportError:
+    zhconv = None
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+TRAILING_PUNCTUATION = '?？!！.。~～ '
+
+def normalize_question(question: str) -> str:
+    """
+    规范化问题文本，使写法不同的同一问题得到相同的缓存键
+    
+    依次进行：全角转半角(NFKC)、繁体转简体、转小写、合并空白、去掉句末标点。
+    """
+    text = unicodedata.normalize('NFKC', question)
+    if zhconv is not None:
+        text = zhconv.convert(text, 'zh-cn')
+    text = WHITESPACE_PATTERN.sub(' ', text.lower()).strip()
+    return text.rstrip(TRAILING_PUNCTUATION)
+
+class QueryCache:
+    """
+    查询结果缓存
+    
+    缓存键为 (规范化问题, 是否包含系统信息, 知识库版本)，按最近使用顺序淘汰，
+    超过 ttl 秒的条目视为过期。知识库变化时由 RAGEngine 调用 invalidate 清空。
+    """
+    
+    def __init__(self, max_size: int = 100, ttl: float = 3600, path: Optional[str] = None):
+        self.max_size = max(0, max_size)
+        self.ttl = ttl
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        
+        self._entries: 'OrderedDict[Tuple[str, bool, int], Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        
+        if self.path:
+            self._load()
+    
+    @staticmethod
+    def make_key(question: str, include_system_info: bool, generation: int) -> Tuple[str, bool, int]:
+        return (normalize_question(question), bool(include_system_info), generation)
+    
+    def get(self, key: Tuple[str, bool, int]) -> Optional[Dict[str, Any]]:
+        """
+        查找缓存结果，未命中或已过期时返回None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+    
+    def put(self, key: Tuple[str, bool, int], result: Dict[str, Any]):
+        """
+        写入缓存结果
+        """
+        if self.max_size == 0:
+            return
+        
+        with self._lock:
+            self._entries[key] = (time.time(), dict(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            
+            if self.path:
+                self._save()
+    
+    def invalidate(self):
+        """
+        清空缓存（知识库内容变化时调用）
+        """
+        with self._lock:
+            self._entries.clear()
+            if self.path:
+                self._save()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+        """
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+    
+    def _load(self):
+        """
+        从磁盘加载未过期的缓存条目
+        """
+        if not os.path.exists(self.path):
+            return
+        
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+            
+            now = time.time()
+            for record in records[-self.max_size:] if self.max_size else []:
+                if now - record['time'] <= self.ttl:
+                    key = (record['question'], record['include_system_info'], record['generation'])
+                    self._entries[key] = (record['time'], record['result'])
+            
+            self.logger.info(f"加载查询缓存 {len(self._entries)} 条")
+        
+        except Exception as e:
+            self.logger.warning(f"加载查询缓存失败: {str(e)}")
+            self._entries.clear()
+    
+    def _save(self):
+        """
+        将缓存按最近使用顺序写入磁盘（先写临时文件再替换）
+        """
+        records = [
+            {'question': key[0], 'include_system_info': key[1], 'generation': key[2],
+             'time': stored_at, 'result': result}
+            for key, (stored_at, result) in self._entries.items()
+        ]
+        
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(records, f, ensure_ascii=False, default=self._json_default)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            self.logger.warning(f"保存查询缓存失败: {str(e)}")
+    
+    @staticmethod
+    def _json_default(value: Any) -> Any:
+        if hasattr(value, 'item'):
+            return value.item()
+        return str(value)
@@ -3,110 +3,947 @@
 RAG (检索增强生成) 引擎模块
 """
 
+import time
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
-from ai_models import DeepSeekAPI
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FutureTimeout
+from typing import List, Dict, Any, Optional, Callable, Iterator, Tuple
 from vector_store import VectorStore
 from document_processor import DocumentProcessor
 from system_info_helper import KylinSystemInfo
-from config import RAG_CONFIG
-from ai_models import SiliconFlowAPI
+from query_cache import QueryCache
+from semantic_cache import SemanticCache
+from context_packer import ContextPacker, estimate_tokens
+from passage_compressor import PassageCompressor
+from model_router import ModelRouter
+from extractive_answer import ExtractiveAnswerer
+from single_flight import SingleFlight
+from profiler import Profiler
+from metrics import REGISTRY, stage_timer
+from config import (RAG_CONFIG, PERFORMANCE_CONFIG, QUERY_CACHE_PATH, MODEL_ROUTER_CONFIG, METRICS_CONFIG,
+                    PROFILE_CONFIG)
+from ai_models import SiliconFlowAPI, AsyncSiliconFlowAPI, is_error_answer
+from rate_limiter import PRIORITY_INTERACTIVE, PRIORITY_BATCH
+
+NO_ANSWER = "抱歉，我无法回答这个问题。请检查API配置或稍后重试。"
+
+# 为本地抽取式回答预留的时间(秒)
+FALLBACK_RESERVE = 0.05
+
+# 查询路径的运行指标
+QUERIES = REGISTRY.counter('kylin_qa_queries_total', '查询次数（按调用方式）')
+QUERY_SECONDS = REGISTRY.histogram('kylin_qa_query_seconds', '查询总耗时(秒)')
+STAGE_SECONDS = REGISTRY.histogram('kylin_qa_stage_seconds', '查询各阶段耗时(秒)')
+CACHE_HITS = REGISTRY.counter('kylin_qa_cache_hits_total', '缓存命中次数（exact/semantic/coalesced）')
+API_ERRORS = REGISTRY.counter('kylin_qa_api_errors_total', '未能由模型生成回答的查询次数')
+QUERY_ERRORS = REGISTRY.counter('kylin_qa_query_errors_total', '处理失败的查询次数')
+DEGRADED = REGISTRY.counter('kylin_qa_degraded_total', '返回抽取式回答的查询次数（按原因）')
+TOKENS = REGISTRY.counter('kylin_qa_tokens_total', '发送和生成的估算token数（prompt/completion）')
+
+# 开启性能剖析时包装的方法及报告中的操作名；流式查询的生成在合并线程中执行，剖析其生成器
+PROFILED_METHODS = {
+    'add_documents': 'add_documents',
+    'query': 'query',
+    '_stream_uncached': 'query_stream',
+    'aquery': 'aquery'
+}
+
+def _run_inline(fn: Callable, *args, **kwargs) -> Future:
+    """
+    在当前线程执行函数，返回已完成的Future（与 Executor.submit 接口一致）
+    """
+    future = Future()
+    try:
+        future.set_result(fn(*args, **kwargs))
+    except Exception as e:
+        future.set_exception(e)
+    return future
 
 class RAGEngine:
     """
     RAG (检索增强生成) 引擎
+    
+    db_path 和 cache_path 分别覆盖向量存储目录(VECTOR_DB_PATH)和查询缓存持久化文件
+    (QUERY_CACHE_PATH)，供基准测试等使用独立的数据目录。
     """
     
-    def __init__(self):
-        self.vector_store = VectorStore()
+    def __init__(self, db_path: Optional[str] = None, cache_path: Optional[str] = None):
+        self.vector_store = VectorStore(db_path)
         self.document_processor = DocumentProcessor()
         self.ai_model = SiliconFlowAPI()
+        self._async_model = None
+        # 执行有延迟预算的生成任务，超时后任务在其中继续完成
+        self._generation_executor = ThreadPoolExecutor(
+            max_workers=PERFORMANCE_CONFIG.get('max_concurrent_requests', 16),
+            thread_name_prefix='generation'
+        )
         self.logger = logging.getLogger(__name__)
         
+        # 模型路由：按问题难度和各模型近期延迟选择模型
+        self.model_router = ModelRouter(MODEL_ROUTER_CONFIG)
+        
+        # 上下文打包：去重并在token预算内选择文档块
+        self.context_packer = ContextPacker(
+            lambda texts: self.vector_store.transform(texts),
+            dedupe_threshold=RAG_CONFIG.get('dedupe_threshold', 0.9)
+        )
+        
+        # 段落压缩：只保留与问题相关的句子
+        self.passage_compressor = PassageCompressor(
+            lambda texts: self.vector_store.transform(texts),
+            top_sentences=RAG_CONFIG.get('compress_top_sentences', 3),
+            neighbors=RAG_CONFIG.get('compress_neighbors', 1)
+        )
+        
+        # 请求合并：同时进行的相同问题只计算一次
+        self.single_flight = SingleFlight()
+        
+        # 抽取式回答：在延迟预算内未能生成回答时使用
+        self.extractive_answerer = ExtractiveAnswerer(
+            lambda texts: self.vector_store.transform(texts),
+            max_sentences=RAG_CONFIG.get('extractive_sentences', 5)
+        )
+        
+        # 查询结果缓存，知识库变化时清空
+        self.query_cache = QueryCache(
+            max_size=PERFORMANCE_CONFIG.get('cache_size', 100),
+            ttl=PERFORMANCE_CONFIG.get('cache_ttl', 3600),
+            path=(cache_path or QUERY_CACHE_PATH) if PERFORMANCE_CONFIG.get('cache_persist', False) else None
+        )
+        # 语义缓存：相近问题且检索到相同文档时复用回答
+        self.semantic_cache = SemanticCache(
+            lambda texts: self.vector_store.transform(texts),
+            max_size=PERFORMANCE_CONFIG.get('semantic_cache_size', 200),
+            threshold=PERFORMANCE_CONFIG.get('semantic_cache_threshold', 0.85),
+            generation=self.vector_store.generation
+        )
+        
         # 初始化系统信息助手
         try:
             self.system_helper = KylinSystemInfo()
         except Exception as e:
             self.logger.warning(f"系统信息助手初始化失败: {e}")
             self.system_helper = None
+        
+        # 知识库规模，在导出指标时读取
+        REGISTRY.gauge('kylin_qa_index_documents', '知识库文档块数', lambda: len(self.vector_store.documents))
+        REGISTRY.gauge('kylin_qa_index_symbols', '已索引的SDK符号数', lambda: len(self.vector_store.symbol_index))
+        REGISTRY.gauge('kylin_qa_index_disk_bytes', '索引占用的磁盘空间(字节)',
+                       lambda: self.vector_store.disk_usage())
+        
+        # 性能剖析，关闭时不包装任何方法
+        self.profiler = Profiler(PROFILE_CONFIG)
+        if PROFILE_CONFIG.get('enabled', False):
+            self.set_profiling(True)
     
-    def add_documents(self, file_paths: List[str]):
+    def set_profiling(self, enabled: bool):
+        """
+        开启或关闭性能剖析
+        
+        开启后 add_documents、query、query_stream 和 aquery 的每次调用都会写出
+        cProfile 数据和内存分配报告到 PROFILE_CONFIG['output_dir']。被剖析的调用中，
+        文档解析、有延迟预算的生成以及 aquery 的检索和上下文构建改在调用线程内执行，
+        以便计入剖析结果。
+        """
+        if enabled == self.profiler.enabled:
+            return
+        if enabled:
+            self.profiler.attach(self, PROFILED_METHODS)
+        else:
+            self.profiler.detach(self, PROFILED_METHODS)
+    
+    def add_documents(self, file_paths: List[str],
+                      progress_callback: Optional[Callable[[str, int, Optional[Exception]], None]] = None
+                      ) -> Dict[str, Any]:
         """
         添加文档到知识库
         
+        文件在进程池中并行解析，每个文件完成后立即写入索引，全部完成后统一保存。
+        
         Args:
             file_paths: 文档文件路径列表
+            progress_callback: 每个文件完成时的回调 (文件路径, 文档块数, 异常)
+            
+        Returns:
+            处理摘要，包含成功文件数、失败文件及原因、文档块总数
         """
-        all_chunks = []
+        summary = {'processed': 0, 'failed': {}, 'chunk_count': 0}
         
-        for file_path in file_paths:
-            try:
-                self.logger.info(f"处理文档: {file_path}")
-                chunks = self.doc_processor.process_file(file_path)
-                all_chunks.extend(chunks)
+        self.logger.info(f"开始处理 {len(file_paths)} 个文档")
+        
+        # cProfile 只记录当前线程，剖析时不使用进程池
+        max_workers = None
+        if self.profiler.is_profiling():
+            max_workers = 1
+            self.profiler.note('文档在本进程内逐个解析，未使用进程池，耗时高于正常导入')
+        
+        try:
+            for file_path, chunks, error in self.document_processor.iter_process_files(file_paths, max_workers):
+                if error is not None:
+                    self.logger.error(f"处理文档 {file_path} 失败: {str(error)}")
+                    summary['failed'][file_path] = str(error)
+                else:
+                    if chunks:
+                        self.vector_store.add_documents(chunks, save=False)
+                    summary['processed'] += 1
+                    summary['chunk_count'] += len(chunks)
                 
-            except Exception as e:
-                self.logger.error(f"处理文档 {file_path} 失败: {str(e)}")
+                if progress_callback:
+                    progress_callback(file_path, len(chunks or []), error)
+        finally:
+            if summary['chunk_count']:
+                self.vector_store.save()
+                self.query_cache.invalidate()
+                self.semantic_cache.invalidate(self.vector_store.generation)
+        
+        self.logger.info(f"成功添加 {summary['chunk_count']} 个文档块到知识库，"
+                         f"{summary['processed']} 个文件成功，{len(summary['failed'])} 个文件失败")
+        return summary
+    
+    def add_directory(self, directory: str, recursive: bool = True,
+                      progress_callback: Optional[Callable[[str, int, Optional[Exception]], None]] = None
+                      ) -> Dict[str, Any]:
+        """
+        批量导入目录下所有支持的文档
         
-        if all_chunks:
-            self.vector_store.add_documents(all_chunks)
-            self.logger.info(f"成功添加 {len(all_chunks)} 个文档块到知识库")
+        Args:
+            directory: 目录路径
+            recursive: 是否递归子目录
+            progress_callback: 每个文件完成时的回调
+            
+        Returns:
+            处理摘要
+        """
+        file_paths = self.document_processor.collect_files(directory, recursive)
+        return self.add_documents(file_paths, progress_callback)
     
-    def query(self, question: str, include_system_info: bool = False) -> Dict[str, Any]:
+    def query(self, question: str, include_system_info: bool = False,
+              latency_budget: Optional[float] = None) -> Dict[str, Any]:
         """
         处理用户查询
         
+        相同问题（规范化后）在知识库未变化时直接返回缓存结果，结果中 cached 为 True。
+        设置延迟预算时，若在预算内未能生成回答（超时或API调用失败），返回由检索结果
+        摘录的本地抽取式回答，结果中 degraded 为 True。同时进行的相同问题只检索和
+        生成一次，后到者共享先到者的结果，结果中 coalesced 为 True。
+        
         Args:
             question: 用户问题
             include_system_info: 是否包含系统信息
+            latency_budget: 延迟预算(秒)，默认 RAG_CONFIG['latency_budget']，None 表示不限
             
         Returns:
-            查询结果
+            查询结果，其中 timings 为各阶段耗时(秒)，见 _finish_query
         """
+        start_time = time.perf_counter()
+        timings = {}
+        if latency_budget is None:
+            latency_budget = RAG_CONFIG.get('latency_budget')
+        
         try:
             self.logger.info(f"处理查询: {question}")
             
-            # 检索相关文档
-            relevant_docs = self.vector_store.search(
-                question, 
+            with stage_timer(timings, 'cache'):
+                cache_key = self._cache_key(question, include_system_info)
+                cached = self._cached_result(cache_key, question)
+            if cached is not None:
+                return self._finish_query(cached, timings, start_time, 'sync')
+            
+            wait_start = time.perf_counter()
+            result, coalesced = self.single_flight.do(
+                (cache_key, latency_budget),
+                lambda: self._query_uncached(question, include_system_info, cache_key,
+                                             start_time, latency_budget, timings)
+            )
+            if coalesced:
+                result = self._coalesced_result(result, question)
+                timings['coalesced'] = time.perf_counter() - wait_start
+                self.profiler.note('与同时进行的相同问题合并，检索和生成在先到的请求中执行，未计入')
+            return self._finish_query(result, timings, start_time, 'sync')
+            
+        except Exception as e:
+            self.logger.error(f"查询处理失败: {str(e)}")
+            return self._finish_query(self._error_result(question, e), timings, start_time, 'sync')
+    
+    def _query_uncached(self, question: str, include_system_info: bool, cache_key,
+                        start_time: float, latency_budget: Optional[float],
+                        timings: Dict[str, float]) -> Dict[str, Any]:
+        """
+        未命中精确缓存时的查询：检索、查找语义缓存、生成回答
+        """
+        # 检索相关文档
+        relevant_docs = self._retrieve(question, timings)
+        
+        with stage_timer(timings, 'semantic_cache'):
+            cached = self._semantic_result(cache_key, question, include_system_info, relevant_docs)
+        if cached is not None:
+            return cached
+        
+        if latency_budget is None:
+            result = self._generate_result(question, relevant_docs, include_system_info, timings=timings)
+            self._store_result(cache_key, result)
+        else:
+            result = self._generate_within_budget(question, relevant_docs, include_system_info,
+                                                  cache_key, start_time + latency_budget, timings)
+        
+        self.logger.info(f"查询完成，找到 {len(relevant_docs)} 个相关文档")
+        return result
+    
+    def query_stream(self, question: str, include_system_info: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        流式处理用户查询
+        
+        先产出检索结果，再逐段产出回答文本，最后产出与 query 相同格式的完整结果。
+        同时进行的相同问题共享同一次生成，后到者先重放已产出的事件再继续接收。
+        
+        Args:
+            question: 用户问题
+            include_system_info: 是否包含系统信息
+            
+        Yields:
+            {'type': 'retrieval', 'relevant_docs', 'context_length'}
+            {'type': 'token', 'text'}
+            {'type': 'done', 'result'}
+        """
+        start_time = time.perf_counter()
+        timings = {}
+        
+        try:
+            self.logger.info(f"处理流式查询: {question}")
+            
+            with stage_timer(timings, 'cache'):
+                cache_key = self._cache_key(question, include_system_info)
+                cached = self._cached_result(cache_key, question)
+        except Exception as e:
+            self.logger.error(f"查询处理失败: {str(e)}")
+            yield {'type': 'done',
+                   'result': self._finish_query(self._error_result(question, e), timings, start_time, 'stream')}
+            return
+            
+        if cached is not None:
+            events, coalesced = self._cached_events(cached, start_time), False
+        else:
+            events, coalesced = self.single_flight.stream(
+                cache_key, lambda: self._stream_uncached(question, include_system_info, cache_key,
+                                                         start_time, timings)
+            )
+        
+        wait_start = time.perf_counter()
+        for event in events:
+            if event['type'] == 'done':
+                result = event['result']
+                if coalesced:
+                    result = self._coalesced_result(result, question)
+                    timings['coalesced'] = time.perf_counter() - wait_start
+                event = {'type': 'done', 'result': self._finish_query(result, timings, start_time, 'stream')}
+            yield event
+    
+    def _cached_events(self, cached: Dict[str, Any], start_time: float) -> Iterator[Dict[str, Any]]:
+        """
+        以流式事件的形式产出缓存结果
+        """
+        cached['first_token_latency'] = time.perf_counter() - start_time
+        yield {'type': 'retrieval', 'relevant_docs': cached['relevant_docs'],
+               'context_length': cached['context_length']}
+        yield {'type': 'token', 'text': cached['answer']}
+        yield {'type': 'done', 'result': cached}
+    
+    def _stream_uncached(self, question: str, include_system_info: bool, cache_key,
+                         start_time: float, timings: Dict[str, float]) -> Iterator[Dict[str, Any]]:
+        """
+        未命中精确缓存时的流式查询：检索、查找语义缓存、流式生成回答
+        """
+        try:
+            relevant_docs = self._retrieve(question, timings)
+            with stage_timer(timings, 'semantic_cache'):
+                cached = self._semantic_result(cache_key, question, include_system_info, relevant_docs)
+            if cached is not None:
+                yield from self._cached_events(cached, start_time)
+                return
+            
+            context = self._build_context(relevant_docs, include_system_info, question, timings)
+            
+        except Exception as e:
+            self.logger.error(f"查询处理失败: {str(e)}")
+            yield {'type': 'done', 'result': self._error_result(question, e)}
+            return
+        
+        yield {'type': 'retrieval', 'relevant_docs': relevant_docs, 'context_length': len(context)}
+        
+        stage_start = time.perf_counter()
+        model, route_reason = self._route(question, relevant_docs, context)
+        route = {'model': model}
+        answer_parts = []
+        first_token_latency = None
+        error = None
+        try:
+            for text in self._stream_answer(question, context, route):
+                if first_token_latency is None:
+                    first_token_latency = time.perf_counter() - start_time
+                answer_parts.append(text)
+                yield {'type': 'token', 'text': text}
+        except Exception as e:
+            self.logger.error(f"流式生成回答失败: {str(e)}")
+            error = e
+            text = f"处理查询时出现错误: {str(e)}"
+            answer_parts.append(text)
+            yield {'type': 'token', 'text': text}
+        timings['generation'] = time.perf_counter() - stage_start
+        
+        result = {
+            'question': question,
+            'answer': "".join(answer_parts) or NO_ANSWER,
+            'relevant_docs': relevant_docs,
+            'context_length': len(context),
+            'context_tokens': estimate_tokens(context),
+            'system_info_included': include_system_info,
+            'model': route['model'],
+            'route_reason': route_reason,
+            'first_token_latency': first_token_latency
+        }
+        if error is not None:
+            result['error'] = str(error)
+        else:
+            self._store_result(cache_key, result)
+        
+        self.logger.info(f"流式查询完成，找到 {len(relevant_docs)} 个相关文档，"
+                         f"首字延迟 {first_token_latency or 0:.3f}s")
+        yield {'type': 'done', 'result': result}
+    
+    def query_batch(self, questions: List[str], 
+                    include_system_info: bool = False) -> List[Dict[str, Any]]:
+        """
+        批量处理用户查询
+        
+        检索阶段通过 VectorStore.search_batch 一次完成，随后逐个生成回答。
+        
+        Args:
+            questions: 问题列表
+            include_system_info: 是否包含系统信息
+            
+        Returns:
+            与questions一一对应的查询结果列表
+        """
+        self.logger.info(f"批量处理 {len(questions)} 个查询")
+        
+        start_time = time.perf_counter()
+        try:
+            all_docs = self.vector_store.search_batch(
+                questions,
                 top_k=RAG_CONFIG.get('top_k', 5)
             )
+        except Exception as e:
+            self.logger.error(f"批量检索失败: {str(e)}")
+            return [self._finish_query(self._error_result(question, e), {}, start_time, 'batch')
+                    for question in questions]
+        # 一次完成的检索耗时平摊到每个问题
+        search_time = (time.perf_counter() - start_time) / max(1, len(questions))
+        
+        results = []
+        for question, relevant_docs in zip(questions, all_docs):
+            timings = {'search': search_time}
+            item_start = time.perf_counter() - search_time
+            try:
+                with stage_timer(timings, 'symbol_lookup'):
+                    relevant_docs = self._merge_symbol_hits(question, relevant_docs)
+                result = self._generate_result(question, relevant_docs, include_system_info,
+                                               priority=PRIORITY_BATCH, timings=timings)
+            except Exception as e:
+                self.logger.error(f"查询处理失败: {str(e)}")
+                result = self._error_result(question, e)
+            results.append(self._finish_query(result, timings, item_start, 'batch'))
+        
+        self.logger.info(f"批量查询完成，共 {len(results)} 个结果")
+        return results
+    
+    @property
+    def async_model(self) -> AsyncSiliconFlowAPI:
+        """
+        异步API客户端，首次使用时创建
+        """
+        if self._async_model is None:
+            self._async_model = AsyncSiliconFlowAPI(self.ai_model.api_key,
+                                                     hedge_policy=self.ai_model.hedge_policy,
+                                                     rate_limiter=self.ai_model.rate_limiter)
+        return self._async_model
+    
+    async def aquery(self, question: str, include_system_info: bool = False,
+                     latency_budget: Optional[float] = None,
+                     priority: int = PRIORITY_INTERACTIVE) -> Dict[str, Any]:
+        """
+        异步处理用户查询
+        
+        检索和上下文构建在线程池中执行，回答生成通过 AsyncSiliconFlowAPI 进行，
+        同时进行的API请求数受其信号量限制。可用 asyncio.gather 同时处理大量问题。
+        
+        Args:
+            question: 用户问题
+            include_system_info: 是否包含系统信息
+            latency_budget: 延迟预算(秒)，含义与 query 相同
+            priority: API限流排队优先级，批量任务使用 PRIORITY_BATCH
             
-            # 构建上下文
-            context = self._build_context(relevant_docs, include_system_info)
+        Returns:
+            与 query 格式相同的查询结果
+        """
+        start_time = time.perf_counter()
+        timings = {}
+        if latency_budget is None:
+            latency_budget = RAG_CONFIG.get('latency_budget')
+        
+        try:
+            self.logger.info(f"异步处理查询: {question}")
             
-            # 生成回答
-            answer = self.ai_model.answer_question(question, context)
+            with stage_timer(timings, 'cache'):
+                cache_key = self._cache_key(question, include_system_info)
+                cached = self._cached_result(cache_key, question)
+            if cached is not None:
+                return self._finish_query(cached, timings, start_time, 'async')
             
-            result = {
-                'question': question,
-                'answer': answer or "抱歉，我无法回答这个问题。请检查API配置或稍后重试。",
-                'relevant_docs': relevant_docs,
-                'context_length': len(context),
-                'system_info_included': include_system_info
-            }
+        except Exception as e:
+            self.logger.error(f"查询处理失败: {str(e)}")
+            return self._finish_query(self._error_result(question, e), timings, start_time, 'async')
+        
+        deadline = None if latency_budget is None else start_time + latency_budget
+        wait_start = time.perf_counter()
+        result, coalesced = await self.single_flight.ado(
+            (cache_key, latency_budget),
+            lambda: self._aquery_uncached(question, include_system_info, cache_key, deadline,
+                                          priority, timings)
+        )
+        if coalesced:
+            result = self._coalesced_result(result, question)
+            timings['coalesced'] = time.perf_counter() - wait_start
+            self.profiler.note('与同时进行的相同问题合并，检索和生成在先到的请求中执行，未计入')
+        return self._finish_query(result, timings, start_time, 'async')
+    
+    async def _run_blocking(self, loop: asyncio.AbstractEventLoop, fn: Callable, *args) -> Any:
+        """
+        在线程池中执行阻塞操作；被剖析时在事件循环线程内直接执行，使其计入剖析结果
+        """
+        if self.profiler.is_profiling():
+            self.profiler.note('检索和上下文构建在事件循环线程内执行，期间其他请求被阻塞')
+            return fn(*args)
+        return await loop.run_in_executor(None, fn, *args)
+    
+    async def _aquery_uncached(self, question: str, include_system_info: bool, cache_key,
+                               deadline: Optional[float], priority: int,
+                               timings: Dict[str, float]) -> Dict[str, Any]:
+        """
+        未命中精确缓存时的异步查询，各阶段耗时累加到 timings
+        """
+        loop = asyncio.get_event_loop()
+        
+        try:
+            relevant_docs = await self._run_blocking(loop, self._retrieve, question, timings)
+            
+            with stage_timer(timings, 'semantic_cache'):
+                cached = self._semantic_result(cache_key, question, include_system_info, relevant_docs)
+            if cached is not None:
+                return cached
             
-            self.logger.info(f"查询完成，找到 {len(relevant_docs)} 个相关文档")
-            return result
+            context = await self._run_blocking(loop, self._build_context, relevant_docs,
+                                                 include_system_info, question, timings)
+            
+            stage_start = time.perf_counter()
+            model, route_reason = self._route(question, relevant_docs, context)
+            generation = asyncio.ensure_future(self._agenerate_answer(question, context, model, priority))
+            degraded_reason = None
+            if deadline is None:
+                answer, model = await generation
+            else:
+                remaining = deadline - time.perf_counter() - FALLBACK_RESERVE
+                try:
+                    answer, model = await asyncio.wait_for(asyncio.shield(generation), max(0.0, remaining))
+                    if not answer or is_error_answer(answer):
+                        degraded_reason = 'error'
+                except asyncio.TimeoutError:
+                    degraded_reason = 'timeout'
+                    # 生成在后台继续，成功后写入缓存
+                    generation.add_done_callback(
+                        lambda task: task.cancelled() or task.exception() or self._store_result(
+                            cache_key, self._answer_result(question, relevant_docs, context,
+                                                           include_system_info, *task.result(),
+                                                           route_reason)
+                        )
+                    )
+            timings['generation'] = time.perf_counter() - stage_start
             
         except Exception as e:
             self.logger.error(f"查询处理失败: {str(e)}")
-            return {
-                'question': question,
-                'answer': f"处理查询时出现错误: {str(e)}",
-                'relevant_docs': [],
-                'context_length': 0,
-                'system_info_included': False
-            }
+            return self._error_result(question, e)
+        
+        if degraded_reason is not None:
+            with stage_timer(timings, 'fallback'):
+                return self._degraded_result(question, relevant_docs, include_system_info, degraded_reason)
+        
+        self.logger.info(f"异步查询完成，找到 {len(relevant_docs)} 个相关文档")
+        result = self._answer_result(question, relevant_docs, context, include_system_info,
+                                     answer, model, route_reason)
+        self._store_result(cache_key, result)
+        return result
+    
+    async def aclose(self):
+        """
+        关闭异步API客户端的连接池
+        """
+        if self._async_model is not None:
+            await self._async_model.aclose()
+            self._async_model = None
+    
+    def _retrieve(self, question: str, timings: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+        """
+        检索相关文档：SDK符号精确命中优先，其余由向量检索补足
+        """
+        relevant_docs = self.vector_store.search(
+            question, 
+            top_k=RAG_CONFIG.get('top_k', 5),
+            timings=timings
+        )
+        with stage_timer(timings, 'symbol_lookup'):
+            return self._merge_symbol_hits(question, relevant_docs)
+    
+    def _merge_symbol_hits(self, question: str, relevant_docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        将问题中SDK符号的精确命中结果置于向量检索结果之前并去重
+        """
+        if not RAG_CONFIG.get('symbol_lookup', True):
+            return relevant_docs
+        
+        top_k = RAG_CONFIG.get('top_k', 5)
+        symbol_docs = self.vector_store.search_symbols(question, limit=top_k)
+        if not symbol_docs:
+            return relevant_docs
+        
+        self.logger.info(f"SDK符号精确命中: {', '.join(sorted({d['matched_symbol'] for d in symbol_docs}))}")
+        
+        seen = {(doc.get('source_file'), doc.get('chunk_id')) for doc in symbol_docs}
+        merged = list(symbol_docs)
+        for doc in relevant_docs:
+            if (doc.get('source_file'), doc.get('chunk_id')) not in seen:
+                merged.append(doc)
+        return merged[:top_k]
+    
+    def _cache_key(self, question: str, include_system_info: bool):
+        return QueryCache.make_key(question, include_system_info, self.vector_store.generation)
+    
+    def _cached_result(self, cache_key, question: str) -> Optional[Dict[str, Any]]:
+        """
+        查找缓存结果，命中时标记 cached 并使用本次的问题原文
+        """
+        result = self.query_cache.get(cache_key)
+        if result is None:
+            return None
+        
+        self.logger.info(f"查询缓存命中: {question}")
+        result['question'] = question
+        result['cached'] = True
+        return result
+    
+    def _semantic_result(self, cache_key, question: str, include_system_info: bool,
+                         relevant_docs: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        查找相近问题的缓存回答，命中时同时写入精确缓存
+        """
+        # 精确缓存键中含查询开始时的知识库版本
+        result = self.semantic_cache.lookup(question, include_system_info, relevant_docs, cache_key[2])
+        if result is None:
+            return None
+        
+        self.logger.info(f"语义缓存命中: {question} ≈ {result['cached_question']} "
+                         f"(相似度 {result['semantic_similarity']:.3f})")
+        result['question'] = question
+        self.query_cache.put(cache_key, result)
+        result['cached'] = True
+        return result
+    
+    def _coalesced_result(self, result: Dict[str, Any], question: str) -> Dict[str, Any]:
+        """
+        为共享其他请求结果的调用者构建结果副本
+        """
+        result = dict(result)
+        result['question'] = question
+        result['coalesced'] = True
+        return result
+    
+    def _store_result(self, cache_key, result: Dict[str, Any]):
+        """
+        缓存成功生成的结果，API调用失败的提示语不缓存
+        """
+        answer = result.get('answer', '')
+        if answer == NO_ANSWER or is_error_answer(answer):
+            return
+        self.query_cache.put(cache_key, result)
+        self.semantic_cache.add(result['question'], result.get('system_info_included', False), result,
+                                cache_key[2])
+    
+    def _finish_query(self, result: Dict[str, Any], timings: Dict[str, float],
+                      start_time: float, mode: str) -> Dict[str, Any]:
+        """
+        记录总耗时并写入运行指标
+        
+        result['timings'] 为本次调用各阶段的耗时(秒)，只包含实际经过的阶段：
+        cache（精确缓存查找）、tokenize（查询向量化）、search（向量打分排序）、
+        symbol_lookup（SDK符号查找）、semantic_cache、system_info（系统信息采集）、
+        context（上下文去重、压缩和打包）、generation（模型调用）、fallback（抽取式回答）、
+        coalesced（等待合并的请求）以及 total。
+        """
+        timings['total'] = time.perf_counter() - start_time
+        result['timings'] = timings
+        if METRICS_CONFIG.get('enabled', True):
+            self._record_metrics(result, mode)
+        return result
+    
+    def _record_metrics(self, result: Dict[str, Any], mode: str):
+        """
+        将一次查询的结果计入进程级的运行指标
+        """
+        timings = result['timings']
+        QUERIES.inc(mode=mode)
+        QUERY_SECONDS.observe(timings['total'], mode=mode)
+        for stage, seconds in timings.items():
+            if stage != 'total':
+                STAGE_SECONDS.observe(seconds, stage=stage)
+        
+        if result.get('coalesced'):
+            CACHE_HITS.inc(cache='coalesced')
+        elif result.get('cached'):
+            CACHE_HITS.inc(cache='semantic' if 'semantic_cache' in timings else 'exact')
+        elif 'error' in result:
+            QUERY_ERRORS.inc()
+        elif result.get('degraded'):
+            DEGRADED.inc(reason=result['degraded_reason'])
+            if result['degraded_reason'] == 'error':
+                API_ERRORS.inc()
+        elif is_error_answer(result['answer']):
+            API_ERRORS.inc()
+        else:
+            TOKENS.inc(result.get('context_tokens', 0) + estimate_tokens(result['question']), kind='prompt')
+            TOKENS.inc(estimate_tokens(result['answer']), kind='completion')
+    
+    def _generate_result(self, question: str, relevant_docs: List[Dict[str, Any]],
+                         include_system_info: bool,
+                         priority: int = PRIORITY_INTERACTIVE,
+                         timings: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """
+        根据检索结果构建上下文并生成回答
+        """
+        # 构建上下文
+        context = self._build_context(relevant_docs, include_system_info, question, timings)
+        
+        # 选择模型并生成回答
+        with stage_timer(timings, 'generation'):
+            model, route_reason = self._route(question, relevant_docs, context)
+            answer, model = self._generate_answer(question, context, model, priority)
+        
+        return self._answer_result(question, relevant_docs, context, include_system_info,
+                                   answer, model, route_reason)
+    
+    def _answer_result(self, question: str, relevant_docs: List[Dict[str, Any]], context: str,
+                       include_system_info: bool, answer: str, model: str,
+                       route_reason: str) -> Dict[str, Any]:
+        """
+        构建模型生成回答后的查询结果
+        """
+        return {
+            'question': question,
+            'answer': answer or NO_ANSWER,
+            'relevant_docs': relevant_docs,
+            'context_length': len(context),
+            'context_tokens': estimate_tokens(context),
+            'system_info_included': include_system_info,
+            'model': model,
+            'route_reason': route_reason
+        }
+    
+    def _generate_within_budget(self, question: str, relevant_docs: List[Dict[str, Any]],
+                                include_system_info: bool, cache_key, deadline: float,
+                                timings: Dict[str, float]) -> Dict[str, Any]:
+        """
+        在截止时间前生成回答，超时或API调用失败时返回本地抽取式回答
+        
+        超时后生成在后台继续，成功的结果写入缓存，再次提问时可直接命中。
+        
+        Args:
+            deadline: 截止时间（time.perf_counter() 时刻）
+            timings: 累加各阶段耗时；超时时只计入截至返回时已完成的阶段
+        """
+        remaining = deadline - time.perf_counter() - FALLBACK_RESERVE
+        reason = 'timeout'
+        if remaining > 0:
+            # 后台任务使用独立的 timings，超时返回后不再修改本次结果
+            generation_timings = {}
+            stage_start = time.perf_counter()
+            submit = self._generation_executor.submit
+            if self.profiler.is_profiling():
+                # cProfile 只记录当前线程，剖析时在本线程内生成
+                submit = _run_inline
+                self.profiler.note('有延迟预算的生成在本线程内执行，不会因超时返回抽取式回答')
+            future = submit(
+                self._generate_result, question, relevant_docs, include_system_info,
+                timings=generation_timings
+            )
+            try:
+                result = future.result(timeout=remaining)
+                timings.update(generation_timings)
+                if result['answer'] != NO_ANSWER and not is_error_answer(result['answer']):
+                    self._store_result(cache_key, result)
+                    return result
+                reason = 'error'
+            except FutureTimeout:
+                # 生成阶段计为等待模型的时间，不含已完成的上下文构建
+                finished = dict(generation_timings)
+                timings.update(finished)
+                timings['generation'] = time.perf_counter() - stage_start - sum(finished.values())
+                future.add_done_callback(
+                    lambda f: f.exception() or self._store_result(cache_key, f.result())
+                )
+            except Exception as e:
+                self.logger.error(f"生成回答失败: {str(e)}")
+                reason = 'error'
+        
+        with stage_timer(timings, 'fallback'):
+            return self._degraded_result(question, relevant_docs, include_system_info, reason)
+    
+    def _degraded_result(self, question: str, relevant_docs: List[Dict[str, Any]],
+                         include_system_info: bool, reason: str) -> Dict[str, Any]:
+        """
+        构建降级结果：回答为从检索结果摘录的句子，不写入缓存
+        """
+        self.logger.warning(f"未能在延迟预算内生成回答({reason})，返回抽取式回答")
+        return {
+            'question': question,
+            'answer': self.extractive_answerer.answer(question, relevant_docs, reason),
+            'relevant_docs': relevant_docs,
+            'context_length': 0,
+            'context_tokens': 0,
+            'system_info_included': include_system_info,
+            'model': None,
+            'degraded': True,
+            'degraded_reason': reason
+        }
+    
+    def _route(self, question: str, relevant_docs: List[Dict[str, Any]], context: str) -> Tuple[str, str]:
+        """
+        为本次查询选择模型
+        """
+        model, reason = self.model_router.route(
+            question, relevant_docs, estimate_tokens(context), estimate_tokens(question)
+        )
+        self.logger.info(f"选择模型 {model} ({reason})")
+        return model, reason
+    
+    def _generate_answer(self, question: str, context: str, model: str,
+                         priority: int = PRIORITY_INTERACTIVE) -> Tuple[str, str]:
+        """
+        调用模型生成回答，失败时改用下一级较小的模型重试一次
+        
+        Returns:
+            (回答, 实际使用的模型)
+        """
+        start = time.perf_counter()
+        answer = self.ai_model.generate_answer(question, context, model=model, priority=priority)
+        ok = not is_error_answer(answer)
+        self.model_router.record(model, time.perf_counter() - start, ok)
+        
+        fallback = None if ok else self.model_router.fallback(model)
+        if fallback is None:
+            return answer, model
+        
+        self.logger.warning(f"模型 {model} 调用失败，改用 {fallback}")
+        start = time.perf_counter()
+        answer = self.ai_model.generate_answer(question, context, model=fallback, priority=priority)
+        self.model_router.record(fallback, time.perf_counter() - start, not is_error_answer(answer))
+        return answer, fallback
+    
+    async def _agenerate_answer(self, question: str, context: str, model: str,
+                                priority: int = PRIORITY_INTERACTIVE) -> Tuple[str, str]:
+        """
+        _generate_answer 的异步版本
+        """
+        start = time.perf_counter()
+        answer = await self.async_model.agenerate_answer(question, context, model=model, priority=priority)
+        ok = not is_error_answer(answer)
+        self.model_router.record(model, time.perf_counter() - start, ok)
+        
+        fallback = None if ok else self.model_router.fallback(model)
+        if fallback is None:
+            return answer, model
+        
+        self.logger.warning(f"模型 {model} 调用失败，改用 {fallback}")
+        start = time.perf_counter()
+        answer = await self.async_model.agenerate_answer(question, context, model=fallback,
+                                                          priority=priority)
+        self.model_router.record(fallback, time.perf_counter() - start, not is_error_answer(answer))
+        return answer, fallback
+    
+    def _stream_answer(self, question: str, context: str, route: Dict[str, Any]) -> Iterator[str]:
+        """
+        流式生成回答；尚未输出任何内容就失败时改用下一级较小的模型重试一次
+        
+        Args:
+            route: {'model': 模型名称}，结束时更新为实际使用的模型
+        """
+        model = route['model']
+        fallback_used = False
+        while True:
+            start = time.perf_counter()
+            ok = True
+            emitted = False
+            pending_error = None
+            
+            for text in self.ai_model.generate_answer_stream(question, context, model=model):
+                if is_error_answer(text):
+                    ok = False
+                    if not emitted:
+                        pending_error = text
+                        break
+                emitted = True
+                yield text
+            
+            self.model_router.record(model, time.perf_counter() - start, ok)
+            route['model'] = model
+            
+            if pending_error is None:
+                return
+            
+            fallback = None if fallback_used else self.model_router.fallback(model)
+            if fallback is None:
+                yield pending_error
+                return
+            
+            self.logger.warning(f"模型 {model} 调用失败，改用 {fallback}")
+            model = fallback
+            fallback_used = True
+    
+    def _error_result(self, question: str, error: Exception) -> Dict[str, Any]:
+        """
+        构建查询失败时的结果
+        """
+        return {
+            'question': question,
+            'answer': f"处理查询时出现错误: {str(error)}",
+            'relevant_docs': [],
+            'context_length': 0,
+            'context_tokens': 0,
+            'system_info_included': False,
+            'error': str(error)
+        }
     
     def _build_context(self, relevant_docs: List[Dict[str, Any]], 
-                      include_system_info: bool = False) -> str:
+                      include_system_info: bool = False, question: str = "",
+                      timings: Optional[Dict[str, float]] = None) -> str:
         """
         构建上下文信息
         
+        RAG_CONFIG['compress_context'] 开启时先将文档块压缩为与问题相关的句子；
+        文档块经去重后在 RAG_CONFIG['max_context_tokens'] 的token预算内按相关度打包，
+        预算扣除系统信息占用的部分。
+        
         Args:
             relevant_docs: 相关文档列表
             include_system_info: 是否包含系统信息
+            question: 用户问题，用于段落压缩
+            timings: 若提供，累加系统信息采集('system_info')和文档打包('context')的耗时(秒)
             
         Returns:
             上下文字符串
@@ -114,9 +951,10 @@ class RAGEngine:
         context_parts = []
         
         # 添加系统信息
-        if include_system_info:
+        if include_system_info and self.system_helper:
             try:
-                sys_info = self.system_info.get_system_info()
+                with stage_timer(timings, 'system_info'):
+                    sys_info = self.system_helper.get_system_info()
                 context_parts.append("=== 当前系统信息 ===")
                 for key, value in sys_info.items():
                     context_parts.append(f"{key}: {value}")
@@ -125,20 +963,27 @@ class RAGEngine:
                 self.logger.warning(f"获取系统信息失败: {str(e)}")
         
         # 添加相关文档
-        if relevant_docs:
-            context_parts.append("=== 相关文档内容 ===")
+        with stage_timer(timings, 'context'):
+            if relevant_docs and question and RAG_CONFIG.get('compress_context', False):
+                # 先按原文去重，压缩后的片段彼此差异变大，不再能识别重复
+                kept = self.context_packer.dedupe([doc['content'] for doc in relevant_docs])
+                relevant_docs = self.passage_compressor.compress(question, [relevant_docs[i] for i in kept])
             
-            max_length = RAG_CONFIG.get('max_context_length', 2000)
-            current_length = len("\n".join(context_parts))
+            if relevant_docs:
+                context_parts.append("=== 相关文档内容 ===")
             
-            for i, doc in enumerate(relevant_docs):
-                doc_text = f"文档{i+1} (相似度: {doc.get('similarity', 0):.3f}):\n{doc['content']}\n"
-                
-                if current_length + len(doc_text) > max_length:
-                    break
-                
-                context_parts.append(doc_text)
-                current_length += len(doc_text)
+                budget = RAG_CONFIG.get('max_context_tokens', 2000) - estimate_tokens("\n".join(context_parts))
+                header_tokens = estimate_tokens("文档1 (相似度: 0.000):\n\n")
+                selected = self.context_packer.pack(
+                    [doc['content'] for doc in relevant_docs],
+                    [doc.get('similarity', 0) for doc in relevant_docs],
+                    budget,
+                    overhead=[header_tokens] * len(relevant_docs)
+                )
+            
+                for i, idx in enumerate(selected):
+                    doc = relevant_docs[idx]
+                    context_parts.append(f"文档{i+1} (相似度: {doc.get('similarity', 0):.3f}):\n{doc['content']}\n")
         
         return "\n".join(context_parts)
     
@@ -146,11 +991,21 @@ class RAGEngine:
         """
         获取知识库统计信息
         """
-        return self.vector_store.get_stats()
+        stats = self.vector_store.get_stats()
+        stats['query_cache'] = self.query_cache.get_stats()
+        stats['semantic_cache'] = self.semantic_cache.get_stats()
+        stats['model_router'] = self.model_router.get_stats()
+        stats['hedging'] = self.ai_model.hedge_policy.get_stats()
+        stats['single_flight'] = self.single_flight.get_stats()
+        stats['rate_limiter'] = self.ai_model.rate_limiter.get_stats()
+        stats['profiler'] = self.profiler.get_stats()
+        return stats
     
     def clear_knowledge_base(self):
         """
         清空知识库
         """
         self.vector_store.clear()
+        self.query_cache.invalidate()
+        self.semantic_cache.invalidate(self.vector_store.generation)
         self.logger.info("知识库已清空")
\ No newline at end of file
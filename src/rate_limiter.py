@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""
+客户端限流模块 - 令牌桶 + AIMD自适应并发，按优先级排队
+"""
+
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+import threading
+from typing import Dict, Any, Optional, Callable
+
+# 请求优先级，数值小的先获得许可
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+# 请求结果：成功、过载（429/503/超时，触发退避）、其他错误
+OUTCOME_OK = 'ok'
+OUTCOME_OVERLOAD = 'overload'
+OUTCOME_ERROR = 'error'
+
+class RateLimitExceeded(RuntimeError):
+    """
+    排队已满或等待超时
+    """
+
+class TokenBucket:
+    """
+    令牌桶，限制请求速率；不加锁，由 AdaptiveLimiter 在锁内调用
+    """
+    
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.capacity = max(1.0, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+    
+    def _refill(self, now: float):
+        if self.rate > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def wait_time(self, now: float) -> float:
+        """
+        距离可取得一个令牌的秒数，0 表示现在即可取得
+        """
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+    
+    def take(self, now: float):
+        if self.rate > 0:
+            self._refill(now)
+            self.tokens -= 1
+    
+    def pause(self, until: float):
+        """
+        暂停发放令牌（服务端给出 Retry-After 时）
+        """
+        self.paused_until = max(self.paused_until, until)
+
+class _Waiter:
+    __slots__ = ('priority', 'seq', 'notify', 'granted', 'cancelled')
+    
+    def __init__(self, priority: int, seq: int, notify: Callable[[], None]):
+        self.priority = priority
+        self.seq = seq
+        self.notify = notify
+        self.granted = False
+        self.cancelled = False
+    
+    def __lt__(self, other: '_Waiter') -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+class AdaptiveLimiter:
+    """
+    自适应限流器
+    
+    每个请求需要同时取得一个令牌（速率上限）和一个并发名额。并发上限按AIMD调整：
+    窗口被占满且延迟不超过目标时每个成功请求加 1/上限（约每轮加1），遇到429、503
+    或超时则乘以 backoff_ratio（每 decrease_interval 秒至多一次），服务端给出
+    Retry-After 时令牌桶暂停到该时刻。取不到许可的请求按优先级排队（交互请求
+    先于批量请求），队列长度和等待时间都有上限。关闭时 acquire/release 直接返回。
+    """
+    
+    def __init__(self, config: Dict[str, Any]):
+        self.enabled = bool(config.get('enabled', True))
+        self.min_limit = max(1, config.get('min_concurrency', 1))
+        self.max_limit = max(self.min_limit, config.get('max_concurrency', 32))
+        self.limit = float(min(self.max_limit, max(self.min_limit, config.get('initial_concurrency', 4))))
+        self.latency_target = config.get('latency_target', 10.0)
+        self.backoff_ratio = config.get('backoff_ratio', 0.5)
+        self.decrease_interval = config.get('decrease_interval', 1.0)
+        self.max_queue = config.get('max_queue', 100)
+        self.max_wait = config.get('max_wait', 30.0)
+        self.bucket = TokenBucket(config.get('requests_per_second', 0), config.get('burst', 10))
+        self.logger = logging.getLogger(__name__)
+        
+        self._lock = threading.Lock()
+        self._queue = []
+        self._waiting = 0
+        self._seq = itertools.count()
+        self._last_decrease = 0.0
+        self._timer: Optional[threading.Timer] = None
+        self.in_flight = 0
+        
+        self.granted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.overloads = 0
+        self.errors = 0
+    
+    def _enqueue(self, priority: int, notify: Callable[[], None]) -> _Waiter:
+        with self._lock:
+            if self._waiting >= self.max_queue:
+                self.rejected += 1
+                raise RateLimitExceeded(f"本地限流：排队请求已达上限({self.max_queue})")
+            waiter = _Waiter(priority, next(self._seq), notify)
+            heapq.heappush(self._queue, waiter)
+            self._waiting += 1
+            self._dispatch(time.monotonic())
+            return waiter
+    
+    def _dispatch(self, now: float):
+        """
+        按优先级向排队的请求发放许可（在锁内调用）
+        
+        因令牌不足而停止时，设定定时器在下一个令牌可用时再次发放。
+        """
+        while self._queue:
+            head = self._queue[0]
+            if head.cancelled:
+                heapq.heappop(self._queue)
+                continue
+            if self.in_flight >= int(self.limit):
+                return
+            wait = self.bucket.wait_time(now)
+            if wait > 0:
+                self._schedule(wait)
+                return
+            self.bucket.take(now)
+            heapq.heappop(self._queue)
+            self._waiting -= 1
+            self.in_flight += 1
+            self.granted += 1
+            head.granted = True
+            head.notify()
+    
+    def _schedule(self, wait: float):
+        if self._timer is not None:
+            return
+        self._timer = threading.Timer(wait, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+    
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+            self._dispatch(time.monotonic())
+    
+    def _poll(self, waiter: _Waiter, deadline: float) -> Optional[float]:
+        """
+        检查许可是否已发放，返回还需等待的秒数；已发放时返回None，超时则抛出异常
+        """
+        with self._lock:
+            now = time.monotonic()
+            if waiter.granted:
+                return None
+            remaining = deadline - now
+            if remaining <= 0:
+                waiter.cancelled = True
+                self._waiting -= 1
+                self.timed_out += 1
+                raise RateLimitExceeded("本地限流：排队等待超时")
+            return remaining
+    
+    def _deadline(self, timeout: Optional[float]) -> float:
+        wait = self.max_wait if timeout is None else min(timeout, self.max_wait)
+        return time.monotonic() + wait
+    
+    def acquire(self, priority: int = PRIORITY_INTERACTIVE, timeout: Optional[float] = None):
+        """
+        取得一个许可，必要时排队等待
+        
+        Args:
+            priority: 优先级，PRIORITY_INTERACTIVE 或 PRIORITY_BATCH
+            timeout: 最长等待时间(秒)，不超过 max_wait
+        
+        Raises:
+            RateLimitExceeded: 排队已满或等待超时
+        """
+        if not self.enabled:
+            return
+        event = threading.Event()
+        waiter = self._enqueue(priority, event.set)
+        deadline = self._deadline(timeout)
+        while True:
+            wait = self._poll(waiter, deadline)
+            if wait is None:
+                return
+            event.wait(wait)
+    
+    async def aacquire(self, priority: int = PRIORITY_INTERACTIVE, timeout: Optional[float] = None):
+        """
+        acquire 的异步版本
+        """
+        if not self.enabled:
+            return
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        waiter = self._enqueue(priority, lambda: loop.call_soon_threadsafe(event.set))
+        deadline = self._deadline(timeout)
+        try:
+            while True:
+                wait = self._poll(waiter, deadline)
+                if wait is None:
+                    return
+                try:
+                    await asyncio.wait_for(event.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            # 已取得的许可归还，未取得的从队列中撤销
+            with self._lock:
+                if waiter.granted:
+                    self.in_flight -= 1
+                    self._dispatch(time.monotonic())
+                elif not waiter.cancelled:
+                    waiter.cancelled = True
+                    self._waiting -= 1
+            raise
+    
+    def release(self, latency: float, outcome: Optional[str], retry_after: Optional[float] = None):
+        """
+        归还许可并根据请求结果调整并发上限
+        
+        Args:
+            latency: 请求耗时(秒)
+            outcome: OUTCOME_OK、OUTCOME_OVERLOAD、OUTCOME_ERROR，None 表示请求被取消，不调整
+            retry_after: 服务端给出的 Retry-After(秒)
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            now = time.monotonic()
+            saturated = self._waiting > 0 or self.in_flight >= int(self.limit)
+            self.in_flight -= 1
+            
+            if outcome == OUTCOME_OK:
+                # 只在窗口被占满时增长，避免空闲时上限无限增大
+                if latency <= self.latency_target and saturated:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            elif outcome == OUTCOME_OVERLOAD:
+                self.overloads += 1
+                if now - self._last_decrease >= self.decrease_interval:
+                    self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                    self._last_decrease = now
+                    self.logger.warning(f"API过载，并发上限降至 {int(self.limit)}")
+                if retry_after:
+                    self.bucket.pause(now + retry_after)
+            elif outcome == OUTCOME_ERROR:
+                self.errors += 1
+            
+            self._dispatch(now)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取限流统计信息
+        """
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'concurrency_limit': int(self.limit),
+                'in_flight': self.in_flight,
+                'queued': self._waiting,
+                'granted': self.granted,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                'overloads': self.overloads,
+                'errors': self.errors
+            }
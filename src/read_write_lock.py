@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+读写锁模块 - 多个读者可同时持有，写者独占
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+class ReadWriteLock:
+    """
+    写者优先的读写锁
+    
+    有写者等待时新的读者排在其后，持续的查询不会让索引写入一直等不到锁。
+    不可重入：持有读锁时不能再申请读锁或写锁。
+    """
+    
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+    
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """
+        持有读锁执行代码块
+        """
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+    
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """
+        持有写锁执行代码块
+        """
+        with self._cond:
+            self._waiting_writers += 1
+            try:
+                while self._writer or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+语义缓存模块 - 复用相近问题的回答
+"""
+
+import logging
+import threading
+import numpy as np
+import scipy.sparse as sp
+from typing import List, Dict, Any, Optional, Tuple, Callable, FrozenSet
+
+import jieba
+
+from query_cache import normalize_question
+
+# 不影响问题含义的疑问词和语气词
+FILLER_WORDS = {
+    '怎么', '怎样', '怎么样', '如何', '请问', '请', '一下', '能', '能否', '可以', '我', '我们',
+    '想', '要', '需要', '该', '应该', '吗', '呢', '啊', '吧', '的', '了', '呀', '方法', '办法'
+}
+
+# 同义词归一
+SYNONYMS = {
+    '查询': '查看', '查': '查看', '看': '查看', '看看': '查看', '显示': '查看',
+    '获取': '查看', '获得': '查看', '得到': '查看',
+    '版本号': '版本', '装': '安装', '卸掉': '卸载'
+}
+
+# 含义相反的操作词：两个问题分别使用同一组中的不同词时，相似度再高也不复用回答
+OPPOSITES = [
+    ('开启', '关闭'), ('打开', '关闭'), ('启用', '禁用'), ('启动', '停止'),
+    ('安装', '卸载'), ('挂载', '卸载'), ('允许', '禁止'), ('添加', '删除'),
+    ('加密', '解密'), ('连接', '断开')
+]
+
+# 否定词：只有一个问题含否定词时不复用回答
+NEGATIONS = {'不', '没', '没有', '未', '无法', '不能', '不要', '别'}
+NEGATION_MARK = '<否定>'
+
+def _canonical_words(question: str) -> List[str]:
+    words = []
+    for word in jieba.cut(normalize_question(question)):
+        word = word.strip()
+        if not word or word in FILLER_WORDS:
+            continue
+        words.append(SYNONYMS.get(word, word))
+    return words
+
+def canonical_question(question: str) -> str:
+    """
+    将问题改写为去掉疑问词、统一同义词并按词排序后的形式，用于语义缓存的向量化
+    
+    排序使"系统版本怎么看"与"怎么查看系统版本"得到相同的词序和二元词组。
+    """
+    return ''.join(sorted(_canonical_words(question)))
+
+def polarity(words: List[str]) -> FrozenSet[str]:
+    """
+    提取问题（_canonical_words 的结果）中的相反操作词和否定标记，用于排除
+    "开启防火墙"与"关闭防火墙"这类字面相近、含义相反的问题
+    """
+    words = set(words)
+    marks = {word for pair in OPPOSITES for word in pair if word in words}
+    if words & NEGATIONS:
+        marks.add(NEGATION_MARK)
+    return frozenset(marks)
+
+def is_opposite(first: FrozenSet[str], second: FrozenSet[str]) -> bool:
+    """
+    两个问题的 polarity 是否表明含义相反
+    """
+    if (NEGATION_MARK in first) != (NEGATION_MARK in second):
+        return True
+    for pair in OPPOSITES:
+        left, right = first.intersection(pair), second.intersection(pair)
+        if left and right and left != right:
+            return True
+    return False
+
+class SemanticCache:
+    """
+    语义缓存
+    
+    保存已回答问题的TF-IDF向量（由 vectorize，即 VectorStore.vectorizer 生成）组成的小型稀疏矩阵，
+    新问题与其中某个问题的余弦相似度达到阈值、且检索到的首个文档块相同时，
+    直接复用该问题的回答，不再调用API。两个问题使用了相反的操作词（开启/关闭、
+    安装/卸载等）或只有一个含否定词时不复用。条目数不超过 max_size，满时淘汰最早的条目。
+    
+    每个条目记录生成回答时的知识库版本（VectorStore.generation）：只命中与本次查询
+    版本相同的条目，知识库变化后 invalidate 之前开始的查询也不会再写入旧版本的回答。
+    """
+    
+    def __init__(self, vectorize: Callable[[List[str]], sp.csr_matrix],
+                 max_size: int = 200, threshold: float = 0.85, generation: int = 0):
+        self.vectorize = vectorize
+        self.max_size = max(0, max_size)
+        self.threshold = threshold
+        self.generation = generation
+        self.logger = logging.getLogger(__name__)
+        
+        self._lock = threading.Lock()
+        self._vectors: List[sp.csr_matrix] = []
+        self._entries: List[Dict[str, Any]] = []
+        self._matrix: Optional[sp.csr_matrix] = None
+        
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _top_doc(relevant_docs: List[Dict[str, Any]]) -> Optional[Tuple[Any, Any]]:
+        if not relevant_docs:
+            return None
+        return (relevant_docs[0].get('source_file'), relevant_docs[0].get('chunk_id'))
+    
+    def _vectorize(self, question: str) -> Tuple[Optional[sp.csr_matrix], FrozenSet[str]]:
+        words = _canonical_words(question)
+        if not words:
+            return None, frozenset()
+        vector = self.vectorize([''.join(sorted(words))])
+        return (vector if vector.nnz else None), polarity(words)
+    
+    def lookup(self, question: str, include_system_info: bool,
+               relevant_docs: List[Dict[str, Any]], generation: int) -> Optional[Dict[str, Any]]:
+        """
+        查找相近问题的缓存回答
+        
+        Args:
+            question: 用户问题
+            include_system_info: 是否包含系统信息
+            relevant_docs: 本次检索到的文档块
+            generation: 本次查询开始时的知识库版本
+        
+        Returns:
+            缓存结果的副本（含 semantic_similarity 和 cached_question），未命中时为None
+        """
+        if self.max_size == 0:
+            return None
+        
+        vector, marks = self._vectorize(question)
+        top_doc = self._top_doc(relevant_docs)
+        
+        with self._lock:
+            if vector is None or not self._entries:
+                self.misses += 1
+                return None
+            
+            if self._matrix is None:
+                self._matrix = sp.vstack(self._vectors, format='csr')
+            
+            # 向量均已L2归一化，点积即余弦相似度
+            scores = (self._matrix @ vector.T).toarray().ravel()
+            for idx in np.argsort(-scores):
+                if scores[idx] < self.threshold:
+                    break
+                entry = self._entries[idx]
+                if (entry['generation'] == generation
+                        and entry['include_system_info'] == include_system_info and entry['top_doc'] == top_doc
+                        and not is_opposite(entry['polarity'], marks)):
+                    self.hits += 1
+                    result = dict(entry['result'])
+                    result['semantic_similarity'] = float(scores[idx])
+                    result['cached_question'] = entry['question']
+                    return result
+            
+            self.misses += 1
+            return None
+    
+    def add(self, question: str, include_system_info: bool, result: Dict[str, Any], generation: int):
+        """
+        缓存一个问题的回答
+        
+        Args:
+            generation: 生成该回答的查询开始时的知识库版本，与当前版本不同时不缓存
+        """
+        if self.max_size == 0:
+            return
+        
+        vector, marks = self._vectorize(question)
+        if vector is None:
+            return
+        
+        with self._lock:
+            if generation != self.generation:
+                return
+            if len(self._entries) >= self.max_size:
+                del self._entries[0]
+                del self._vectors[0]
+            self._vectors.append(vector)
+            self._entries.append({
+                'question': question,
+                'include_system_info': include_system_info,
+                'top_doc': self._top_doc(result.get('relevant_docs', [])),
+                'polarity': marks,
+                'generation': generation,
+                'result': dict(result)
+            })
+            self._matrix = None
+    
+    def invalidate(self, generation: int):
+        """
+        清空缓存（知识库内容变化时调用）
+        
+        Args:
+            generation: 变化后的知识库版本，此后只接受该版本的回答
+        """
+        with self._lock:
+            self.generation = generation
+            self._vectors = []
+            self._entries = []
+            self._matrix = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+        """
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'threshold': self.threshold,
+            'hits': self.hits,
+            'misses': self.misses,
+            'api_calls_saved': self.hits
+        }
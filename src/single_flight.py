@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+请求合并模块 - 同时进行的相同查询只计算一次，所有等待者共享结果
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Dict, Any, Callable, Hashable, Iterator, Awaitable, Tuple, List, Optional
+
+class _Call:
+    """
+    一次进行中的计算
+    """
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+class _Stream:
+    """
+    一次进行中的流式计算，已产出的事件保存在 events 中供后加入的等待者重放
+    """
+    
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.events: List[Any] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+
+class _AsyncCall:
+    """
+    一次进行中的异步计算，waiters 为仍在等待结果的调用者数
+    """
+    
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    请求合并（single-flight）
+    
+    以键标识一次计算：同一键的计算进行中时，后到的调用者不再重复计算，
+    而是等待并共享先到者的结果。计算完成后键即被移除，之后的调用重新计算
+    （通常已能命中结果缓存）。同步调用、流式调用和异步调用各自独立合并。
+    """
+    
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._streams: Dict[Hashable, _Stream] = {}
+        self._async_calls: Dict[Hashable, _AsyncCall] = {}
+        
+        self.leaders = 0
+        self.coalesced = 0
+    
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        执行计算，相同键的计算进行中时等待其结果
+        
+        Returns:
+            (结果, 是否为合并得到的结果)；计算抛出的异常会传给所有等待者
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+    
+    def stream(self, key: Hashable, fn: Callable[[], Iterator[Any]]) -> Tuple[Iterator[Any], bool]:
+        """
+        执行流式计算，相同键的计算进行中时从头重放其事件并继续接收后续事件
+        
+        生成器在独立线程中运行到结束，任何一个等待者提前停止读取都不影响其他等待者。
+        
+        Returns:
+            (事件迭代器, 是否为合并得到的结果)
+        """
+        with self._lock:
+            flight = self._streams.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._streams[key] = _Stream()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+        
+        if leader:
+            threading.Thread(target=self._produce, args=(key, flight, fn),
+                             name='single-flight', daemon=True).start()
+        return self._replay(flight), not leader
+    
+    def _produce(self, key: Hashable, flight: _Stream, fn: Callable[[], Iterator[Any]]):
+        try:
+            for event in fn():
+                with flight.cond:
+                    flight.events.append(event)
+                    flight.cond.notify_all()
+        except BaseException as e:
+            self.logger.error(f"流式计算失败: {e}")
+            flight.error = e
+        finally:
+            with self._lock:
+                del self._streams[key]
+            with flight.cond:
+                flight.finished = True
+                flight.cond.notify_all()
+    
+    @staticmethod
+    def _replay(flight: _Stream) -> Iterator[Any]:
+        position = 0
+        while True:
+            with flight.cond:
+                while position >= len(flight.events) and not flight.finished:
+                    flight.cond.wait()
+                if position < len(flight.events):
+                    event = flight.events[position]
+                    position += 1
+                elif flight.error is not None:
+                    raise flight.error
+                else:
+                    return
+            yield event
+    
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        do 的异步版本，在同一事件循环内合并
+        
+        计算作为独立任务运行，先到者和后到者都通过 shield 等待它：任何一个调用者
+        被取消都不影响其他调用者，所有调用者都取消后才取消计算。
+        """
+        call = self._async_calls.get(key)
+        leader = call is None
+        if leader:
+            call = self._async_calls[key] = _AsyncCall(asyncio.ensure_future(fn()))
+            call.task.add_done_callback(lambda task: self._async_done(key, call))
+        with self._lock:
+            if leader:
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+        
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task), not leader
+        finally:
+            call.waiters -= 1
+            if not call.waiters and not call.task.done():
+                # 没有调用者在等待结果，之后的相同请求重新计算
+                self._forget(key, call)
+                call.task.cancel()
+    
+    def _async_done(self, key: Hashable, call: _AsyncCall):
+        self._forget(key, call)
+        # 没有等待者时也读取异常，避免"exception was never retrieved"警告
+        if not call.task.cancelled():
+            call.task.exception()
+    
+    def _forget(self, key: Hashable, call: _AsyncCall):
+        if self._async_calls.get(key) is call:
+            del self._async_calls[key]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取合并统计信息
+        """
+        with self._lock:
+            return {
+                'leaders': self.leaders,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls) + len(self._streams) + len(self._async_calls)
+            }
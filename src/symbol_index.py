@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+SDK符号索引模块 - 符号名到文档块的精确映射
+"""
+
+import re
+from typing import List, Dict, Tuple
+
+# 定义类符号优先于调用处
+RANK_DEFINITION = 0
+RANK_USAGE = 1
+
+DEFINITION_CATEGORIES = ('c_interfaces', 'dbus_interfaces', 'python_interfaces', 'data_structures')
+USAGE_CATEGORIES = ('api_calls',)
+
+IDENTIFIER_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*')
+CAMEL_CASE_PATTERN = re.compile(r'[a-z0-9][A-Z]')
+
+def is_sdk_symbol(token: str) -> bool:
+    """
+    判断是否为SDK风格的标识符
+    
+    只收录含下划线、点号或驼峰的ASCII标识符（如 kdk_system_get_version、
+    com.kylin.SystemInfo、GetHostName），避免 free、int 等普通单词误命中。
+    """
+    if len(token) < 3 or not IDENTIFIER_PATTERN.fullmatch(token):
+        return False
+    return '_' in token or '.' in token or bool(CAMEL_CASE_PATTERN.search(token))
+
+class SymbolIndex:
+    """
+    SDK符号索引
+    
+    入库时从文档块的 sdk_interfaces 元数据建立 符号 -> 文档序号 的映射，
+    查询时对问题中的标识符做字典查找，开销与问题长度成正比。
+    """
+    
+    def __init__(self):
+        self.postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        self.pending: List[Tuple[str, int, int]] = []
+    
+    def __len__(self) -> int:
+        return len(self.postings)
+    
+    def add(self, symbol: str, doc_id: int, rank: int):
+        """
+        添加一条符号记录
+        """
+        entry = self.postings.setdefault(symbol, ([], []))
+        doc_ids = entry[rank]
+        if doc_ids and doc_ids[-1] == doc_id:
+            return
+        doc_ids.append(doc_id)
+        self.pending.append((symbol, doc_id, rank))
+    
+    def add_document(self, doc_id: int, sdk_interfaces: Dict[str, List[str]]):
+        """
+        索引一个文档块的SDK接口信息
+        """
+        if not sdk_interfaces:
+            return
+        for categories, rank in ((DEFINITION_CATEGORIES, RANK_DEFINITION), (USAGE_CATEGORIES, RANK_USAGE)):
+            for category in categories:
+                for symbol in sdk_interfaces.get(category, ()):
+                    if is_sdk_symbol(symbol):
+                        self.add(symbol, doc_id, rank)
+    
+    def load_entries(self, entries: List[Tuple[str, int, int]]):
+        """
+        从持久化记录恢复索引（不计入待保存记录）
+        """
+        for symbol, doc_id, rank in entries:
+            self.postings.setdefault(symbol, ([], []))[rank].append(doc_id)
+    
+    def mark_saved(self):
+        """
+        待保存记录已写入磁盘
+        """
+        self.pending = []
+    
+    def extract_symbols(self, text: str) -> List[str]:
+        """
+        提取文本中已被索引的SDK符号，保持出现顺序
+        """
+        symbols = []
+        for token in IDENTIFIER_PATTERN.findall(text):
+            if token in self.postings and token not in symbols:
+                symbols.append(token)
+        return symbols
+    
+    def lookup(self, text: str, limit: int = 5) -> List[Tuple[str, int]]:
+        """
+        查找文本中提到的符号所对应的文档块
+        
+        Returns:
+            (符号, 文档序号) 列表：先按符号出现顺序列出定义处，再列出调用处
+        """
+        symbols = self.extract_symbols(text)
+        results = []
+        seen = set()
+        for rank in (RANK_DEFINITION, RANK_USAGE):
+            for symbol in symbols:
+                for doc_id in self.postings[symbol][rank]:
+                    if doc_id in seen:
+                        continue
+                    seen.add(doc_id)
+                    results.append((symbol, doc_id))
+                    if len(results) >= limit:
+                        return results
+        return results
+    
+    def clear(self):
+        self.postings = {}
+        self.pending = []
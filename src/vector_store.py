@@ -6,33 +6,184 @@
 import os
 import pickle
 import logging
+import threading
 import numpy as np
-from typing import List, Dict, Any, Tuple
-from sklearn.feature_extraction.text import TfidfVectorizer
+import scipy.sparse as sp
+from typing import List, Dict, Any, Tuple, Optional
+from sklearn.feature_extraction.text import HashingVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
 import jieba
-from config import VECTOR_CONFIG, VECTOR_DB_PATH
+from config import VECTOR_CONFIG, VECTOR_DB_PATH, PERFORMANCE_CONFIG
+from index_storage import IndexStorage, DocumentTable
+from read_write_lock import ReadWriteLock
+from symbol_index import SymbolIndex
+from metrics import stage_timer
+
+def tokenize_chinese(text: str) -> List[str]:
+    """
+    中文分词（模块级函数，便于向量化器序列化）
+    """
+    return list(jieba.cut(text))
+
+class IncrementalTfidfVectorizer:
+    """
+    增量TF-IDF向量化器
+    
+    使用哈希特征空间代替需要全量拟合的词表，新文档只需分词一次即可得到
+    稳定的特征列；文档频率(DF)随每批文档增量累加，IDF按需由DF计算，
+    公式与sklearn的TfidfVectorizer(smooth_idf=True)一致。
+    """
+    
+    def __init__(self, n_features: int = 2 ** 18, ngram_range: Tuple[int, int] = (1, 2)):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        self.hasher = HashingVectorizer(
+            n_features=n_features,
+            ngram_range=ngram_range,
+            tokenizer=tokenize_chinese,
+            token_pattern=None,
+            alternate_sign=False,
+            norm=None
+        )
+        self.doc_freq = np.zeros(n_features, dtype=np.int64)
+        self.n_docs = 0
+    
+    @property
+    def idf_(self) -> np.ndarray:
+        """
+        当前IDF向量
+        """
+        return np.log((1.0 + self.n_docs) / (1.0 + self.doc_freq)) + 1.0
+    
+    def count(self, texts: List[str]) -> sp.csr_matrix:
+        """
+        计算原始词频矩阵（不更新统计信息）
+        """
+        return self.hasher.transform(texts).tocsr()
+    
+    def partial_fit(self, texts: List[str]) -> sp.csr_matrix:
+        """
+        增量更新文档频率统计
+        
+        Returns:
+            新文档的原始词频矩阵
+        """
+        counts = self.count(texts)
+        self.add_counts(counts)
+        return counts
+    
+    def add_counts(self, counts: sp.csr_matrix):
+        """
+        用已计算好的新文档词频矩阵增量更新文档频率统计
+        """
+        self.doc_freq += np.bincount(counts.indices, minlength=self.n_features)
+        self.n_docs += counts.shape[0]
+    
+    def weight(self, counts: sp.csr_matrix) -> sp.csr_matrix:
+        """
+        将词频矩阵按当前IDF加权并做L2归一化
+        """
+        return normalize(counts @ sp.diags(self.idf_), norm='l2', copy=False).tocsr()
+    
+    def transform(self, texts: List[str]) -> sp.csr_matrix:
+        """
+        向量化文本（查询等），不更新统计信息
+        """
+        return self.weight(self.count(texts))
+    
+    def fit_transform(self, texts: List[str]) -> sp.csr_matrix:
+        """
+        重置统计信息并全量拟合
+        """
+        self.doc_freq = np.zeros(self.n_features, dtype=np.int64)
+        self.n_docs = 0
+        return self.weight(self.partial_fit(texts))
+    
+    def refit_counts(self, counts: List[sp.csr_matrix]):
+        """
+        根据已保存的各分段词频矩阵重新计算文档频率（无需重新分词）
+        """
+        self.doc_freq = np.zeros(self.n_features, dtype=np.int64)
+        self.n_docs = 0
+        for part in counts:
+            self.doc_freq += np.bincount(part.indices, minlength=self.n_features)
+            self.n_docs += part.shape[0]
+
+class IndexSegment:
+    """
+    索引的一个行分段
+    
+    counts/vectors 为分段内文档的词频和权重矩阵，已保存的分段直接内存映射磁盘文件；
+    offset 为分段第一行的文档序号，name 为磁盘上的分段名（尚未保存时为None）。
+    倒排表在首次检索该分段时构建。
+    """
+    
+    def __init__(self, counts: sp.csr_matrix, vectors: sp.csr_matrix, offset: int,
+                 name: Optional[str] = None):
+        self.counts = counts
+        self.vectors = vectors
+        self.offset = offset
+        self.name = name
+        self._postings = None
+    
+    @property
+    def rows(self) -> int:
+        return self.vectors.shape[0]
+    
+    def postings(self) -> sp.csc_matrix:
+        """
+        分段的倒排索引（词项 -> 分段内文档及权重）
+        
+        CSC格式下每一列即一个词项的倒排表：indices为分段内的文档号，data为权重。
+        """
+        if self._postings is None:
+            postings = self.vectors.tocsc()
+            postings.sort_indices()
+            self._postings = postings
+        return self._postings
 
 class VectorStore:
     """
     向量存储类
+    
+    可被多个线程同时检索，并允许在检索的同时导入文档：检索持有读锁；写入操作
+    之间用互斥锁串行，耗时的分词、加权和写盘在锁外或只持有互斥锁时进行，
+    只在修改共享状态的片刻持有写锁。
     """
     
     def __init__(self, db_path: str = None):
         self.db_path = db_path or VECTOR_DB_PATH
         self.logger = logging.getLogger(__name__)
         
-        # 初始化TF-IDF向量化器
-        self.vectorizer = TfidfVectorizer(
-            max_features=5000,
-            stop_words=None,
-            ngram_range=(1, 2),
-            tokenizer=self._tokenize_chinese
-        )
+        # 初始化增量TF-IDF向量化器
+        self.vectorizer = self._create_vectorizer()
+        self.rebalance_growth = VECTOR_CONFIG.get('rebalance_growth', 2.0)
         
-        self.documents = []
-        self.vectors = None
+        self.documents = DocumentTable()
+        # 按行分段的词频/权重矩阵，逐段打分，已保存的分段不合并到内存
+        self.segments: List[IndexSegment] = []
         self.is_fitted = False
+        self.rebalanced_at = 0
+        
+        # 尚未并入分段的新增行块 (词频, 权重)，检索、保存或重平衡前一次性合并为一个新分段
+        self._pending_blocks: List[Tuple[sp.csr_matrix, sp.csr_matrix]] = []
+        
+        # SDK符号 -> 文档块 精确索引
+        self.symbol_index = SymbolIndex()
+        
+        # 磁盘存储；重平衡/重建改写了全部向量，下次保存需合并分段
+        self.storage = IndexStorage(self.db_path)
+        self._needs_compaction = False
+        
+        # 检索方式：inverted(倒排索引) 或 dense(全量扫描)
+        self.search_mode = VECTOR_CONFIG.get('search_mode', 'inverted')
+        
+        # 检索持有读锁，修改索引状态持有写锁；写入操作之间由 _write_mutex 串行，
+        # 检索中合并缓存行块由 _merge_lock 保护
+        self._lock = ReadWriteLock()
+        self._write_mutex = threading.RLock()
+        self._merge_lock = threading.Lock()
         
         # 创建存储目录
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
@@ -44,136 +195,512 @@ class VectorStore:
         """
         中文分词
         """
-        return list(jieba.cut(text))
+        return tokenize_chinese(text)
+    
+    def _create_vectorizer(self) -> IncrementalTfidfVectorizer:
+        """
+        创建增量向量化器
+        """
+        return IncrementalTfidfVectorizer(
+            n_features=VECTOR_CONFIG.get('hash_features', 2 ** 18),
+            ngram_range=(1, 2)
+        )
     
-    def add_documents(self, documents: List[Dict[str, Any]]):
+    def add_documents(self, documents: List[Dict[str, Any]], save: bool = True):
         """
         添加文档到向量存储
         
+        新文档只做一次分词和哈希，DF统计增量更新；已有文档的向量沿用
+        写入时的IDF权重，直到文档总量增长到上次重平衡时的 rebalance_growth
+        倍才整体重新加权。新增的行块先缓存起来，到下一次检索、保存或重平衡时
+        才一次性合并为一个新分段，已有分段不会被复制，因此连续添加多批（如
+        逐文件导入）时每批的开销只与该批文档数成正比。
+        
         Args:
             documents: 文档列表
+            save: 是否立即保存到磁盘（连续添加多批时可最后统一保存）
         """
+        if not documents:
+            return
+        
         try:
-            self.documents.extend(documents)
+            # 分词和哈希不涉及共享状态，在锁外进行
+            counts = self.vectorizer.count([doc['content'] for doc in documents])
             
-            # 提取文档内容
-            texts = [doc['content'] for doc in self.documents]
+            with self._write_mutex:
+                with self._lock.write():
+                    # 增量更新统计
+                    self.vectorizer.add_counts(counts)
+                    self._pending_blocks.append((counts, self.vectorizer.weight(counts)))
+                    
+                    # 建立SDK符号索引
+                    for offset, doc in enumerate(documents):
+                        self.symbol_index.add_document(len(self.documents) + offset, doc.get('sdk_interfaces'))
+                    
+                    self.documents.extend(documents)
+                    self.is_fitted = True
+                
+                self.logger.info(f"添加了 {len(documents)} 个文档，总计 {len(self.documents)} 个文档")
+                
+                # 定期重平衡：文档量成倍增长后统一刷新IDF权重
+                if len(self.documents) >= self.rebalance_growth * max(self.rebalanced_at, 1):
+                    self.rebalance(save=False)
+                
+                # 保存到磁盘
+                if save:
+                    self.save()
+        
+        except Exception as e:
+            self.logger.error(f"添加文档失败: {str(e)}")
+            raise
+    
+    def rebalance(self, save: bool = True):
+        """
+        重平衡索引：由保存的词频矩阵重新统计DF并按最新IDF重新加权全部向量
+        
+        只做稀疏矩阵运算，不重新分词。新的统计和向量在副本上计算，完成后一次性替换。
+        
+        Args:
+            save: 是否在完成后保存到磁盘
+        """
+        with self._write_mutex:
+            self._merge_pending()
+            segments = self.segments
+            if not segments:
+                return
             
-            # 重新训练向量化器
-            self.vectors = self.vectorizer.fit_transform(texts)
-            self.is_fitted = True
+            vectorizer = IncrementalTfidfVectorizer(self.vectorizer.n_features, self.vectorizer.ngram_range)
+            vectorizer.refit_counts([segment.counts for segment in segments])
+            segments = [
+                IndexSegment(segment.counts, vectorizer.weight(segment.counts), segment.offset)
+                for segment in segments
+            ]
             
-            self.logger.info(f"添加了 {len(documents)} 个文档，总计 {len(self.documents)} 个文档")
+            with self._lock.write():
+                self.vectorizer = vectorizer
+                self.segments = segments
+                self.rebalanced_at = len(self.documents)
+                self._needs_compaction = True
             
-            # 保存到磁盘
-            self.save()
+            self.logger.info(f"索引重平衡完成，共 {len(self.documents)} 个文档")
             
-        except Exception as e:
-            self.logger.error(f"添加文档失败: {str(e)}")
-            raise
+            if save:
+                self.save()
     
-    def search(self, query: str, top_k: int = None) -> List[Dict[str, Any]]:
+    def rebuild(self):
+        """
+        全量重建索引：重新分词所有文档（分词规则或特征维度变化后使用）
+        """
+        with self._write_mutex:
+            vectorizer = self._create_vectorizer()
+            segments = []
+            if self.documents:
+                counts = vectorizer.partial_fit([doc['content'] for doc in self.documents])
+                segments = [IndexSegment(counts, vectorizer.weight(counts), 0)]
+            
+            with self._lock.write():
+                self.vectorizer = vectorizer
+                self.segments = segments
+                self._pending_blocks = []
+                self.is_fitted = bool(segments)
+                self.rebalanced_at = len(self.documents)
+                self._needs_compaction = bool(segments)
+            
+            if segments:
+                self.logger.info(f"索引全量重建完成，共 {len(self.documents)} 个文档")
+            
+            self.save()
+    
+    def search(self, query: str, top_k: int = None,
+               timings: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
         """
         搜索相关文档
         
         Args:
             query: 查询文本
             top_k: 返回结果数量
-            
+            timings: 若提供，累加查询向量化('tokenize')和打分排序('search')的耗时(秒)
+        
         Returns:
             相关文档列表
         """
-        if not self.is_fitted or len(self.documents) == 0:
-            self.logger.warning("向量存储为空或未训练")
+        with self._lock.read():
+            if not self.is_fitted or len(self.documents) == 0:
+                self.logger.warning("向量存储为空或未训练")
+                return []
+            
+            try:
+                top_k = top_k or VECTOR_CONFIG.get('max_results', 10)
+                threshold = VECTOR_CONFIG.get('similarity_threshold', 0.1)
+                self._merge_pending()
+                
+                # 向量化查询
+                with stage_timer(timings, 'tokenize'):
+                    query_vector = self.vectorizer.transform([query])
+                
+                # 计算相似度：倒排索引只对与查询共享词项的文档打分
+                with stage_timer(timings, 'search'):
+                    if self.search_mode == 'dense':
+                        indices, scores = self._score_dense(query_vector)
+                    else:
+                        indices, scores = self._score_inverted(query_vector)
+                    
+                    results = []
+                    for idx, similarity in self._select_top_k(indices, scores, top_k, threshold):
+                        doc = self.documents[idx].copy()
+                        doc['similarity'] = similarity
+                        results.append(doc)
+                
+                self.logger.info(f"查询 '{query}' 返回 {len(results)} 个结果")
+                return results
+            
+            except Exception as e:
+                self.logger.error(f"搜索失败: {str(e)}")
+                return []
+    
+    def transform(self, texts: List[str]) -> sp.csr_matrix:
+        """
+        按当前IDF向量化文本（供语义缓存、上下文打包等与索引共用特征空间的组件使用）
+        """
+        with self._lock.read():
+            return self.vectorizer.transform(texts)
+    
+    def search_symbols(self, text: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        按SDK符号精确查找文档块
+        
+        从文本中提取已索引的标识符（如 kdk_system_get_version），通过符号索引
+        直接定位定义该符号的文档块，不经过分词和向量计算。
+        
+        Args:
+            text: 查询文本
+            limit: 最多返回的文档块数
+        
+        Returns:
+            文档列表，similarity 固定为1.0，matched_symbol 为命中的符号
+        """
+        results = []
+        with self._lock.read():
+            for symbol, doc_id in self.symbol_index.lookup(text, limit):
+                doc = self.documents[doc_id].copy()
+                doc['similarity'] = 1.0
+                doc['matched_symbol'] = symbol
+                results.append(doc)
+        return results
+    
+    def search_batch(self, queries: List[str], top_k: int = None) -> List[List[Dict[str, Any]]]:
+        """
+        批量搜索相关文档
+        
+        所有查询一次向量化，按 batch_size 分块做一次稀疏矩阵乘法，
+        并按行向量化地选出top_k。
+        
+        Args:
+            queries: 查询文本列表
+            top_k: 每个查询返回结果数量
+        
+        Returns:
+            与queries一一对应的结果列表，格式与search相同
+        """
+        if not queries:
             return []
         
-        try:
-            top_k = top_k or VECTOR_CONFIG.get('max_results', 10)
-            threshold = VECTOR_CONFIG.get('similarity_threshold', 0.1)
-            
-            # 向量化查询
-            query_vector = self.vectorizer.transform([query])
+        with self._lock.read():
+            if not self.is_fitted or len(self.documents) == 0:
+                self.logger.warning("向量存储为空或未训练")
+                return [[] for _ in queries]
             
-            # 计算相似度
-            similarities = cosine_similarity(query_vector, self.vectors).flatten()
+            try:
+                top_k = top_k or VECTOR_CONFIG.get('max_results', 10)
+                threshold = VECTOR_CONFIG.get('similarity_threshold', 0.1)
+                block_size = PERFORMANCE_CONFIG.get('batch_size', 32)
+                self._merge_pending()
+                
+                # 一次性向量化全部查询
+                query_vectors = self.vectorizer.transform(queries)
+                doc_terms = [segment.postings().T for segment in self.segments]  # 各分段的 词项 x 文档 (CSR)
+                
+                all_results = []
+                for start in range(0, len(queries), block_size):
+                    # 分块计算相似度矩阵，限制稠密中间结果的内存占用；各分段的列按文档序号依次拼接
+                    block = query_vectors[start:start + block_size]
+                    similarities = np.hstack([(block @ doc_term).toarray() for doc_term in doc_terms])
+                    
+                    for row_indices, row_scores in zip(*self._select_top_k_rows(similarities, top_k)):
+                        results = []
+                        for idx, similarity in zip(row_indices, row_scores):
+                            if similarity < threshold:
+                                break
+                            doc = self.documents[idx].copy()
+                            doc['similarity'] = float(similarity)
+                            results.append(doc)
+                        all_results.append(results)
+                
+                self.logger.info(f"批量查询 {len(queries)} 个问题，"
+                                 f"共返回 {sum(len(r) for r in all_results)} 个结果")
+                return all_results
             
-            # 获取最相似的文档索引
-            top_indices = np.argsort(similarities)[::-1][:top_k]
+            except Exception as e:
+                self.logger.error(f"批量搜索失败: {str(e)}")
+                return [[] for _ in queries]
+    
+    def _merge_pending(self):
+        """
+        将缓存的新增行块一次性合并为一个新分段（只复制新增行）
+        
+        检索时也会调用：在 _merge_lock 内以新列表替换 segments，
+        同时进行的其他检索继续使用旧列表。
+        """
+        with self._merge_lock:
+            if not self._pending_blocks:
+                return
             
-            results = []
-            for idx in top_indices:
-                similarity = similarities[idx]
-                if similarity >= threshold:
-                    doc = self.documents[idx].copy()
-                    doc['similarity'] = float(similarity)
-                    results.append(doc)
+            counts = [block[0] for block in self._pending_blocks]
+            vectors = [block[1] for block in self._pending_blocks]
+            if len(counts) > 1:
+                counts = [sp.vstack(counts, format='csr')]
+                vectors = [sp.vstack(vectors, format='csr')]
             
-            self.logger.info(f"查询 '{query}' 返回 {len(results)} 个结果")
-            return results
+            last = self.segments[-1] if self.segments else None
+            offset = last.offset + last.rows if last else 0
+            self.segments = self.segments + [IndexSegment(counts[0], vectors[0], offset)]
+            self._pending_blocks = []
+    
+    def _map_segments(self, current: List[IndexSegment]) -> List[IndexSegment]:
+        """
+        按 manifest 内存映射已保存的分段；未变化的分段沿用 current 中的对象及其倒排表
+        """
+        existing = {segment.name: segment for segment in current if segment.name}
+        segments, offset = [], 0
+        for info in self.storage.manifest['segments']:
+            segment = existing.get(info['name'])
+            if segment is None:
+                counts, vectors = self.storage.load_segment(info)
+                segment = IndexSegment(counts, vectors, offset, info['name'])
+            segments.append(segment)
+            offset += segment.rows
+        return segments
+    
+    def _score_inverted(self, query_vector: sp.csr_matrix) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        基于各分段的倒排索引计算相似度，开销与命中的倒排项数量成正比
+        
+        Returns:
+            (文档索引数组, 相似度数组)，只包含与查询有公共词项的文档
+        """
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+        if query_vector.nnz == 0:
+            return empty
+        
+        all_ids, all_scores = [], []
+        for segment in self.segments:
+            postings = segment.postings()[:, query_vector.indices]
+            if postings.nnz == 0:
+                continue
             
-        except Exception as e:
-            self.logger.error(f"搜索失败: {str(e)}")
-            return []
+            # 每条倒排项的贡献 = 文档权重 * 查询权重（向量已L2归一化，点积即余弦相似度）
+            contributions = postings.data * np.repeat(query_vector.data, np.diff(postings.indptr))
+            doc_ids, inverse = np.unique(postings.indices, return_inverse=True)
+            all_ids.append(doc_ids.astype(np.int64) + segment.offset)
+            all_scores.append(np.bincount(inverse, weights=contributions))
+        
+        if not all_ids:
+            return empty
+        return np.concatenate(all_ids), np.concatenate(all_scores)
+    
+    def _score_dense(self, query_vector: sp.csr_matrix) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        对全部文档计算余弦相似度（全量扫描路径，用于对比和回退）
+        """
+        similarities = np.concatenate([
+            cosine_similarity(query_vector, segment.vectors).ravel() for segment in self.segments
+        ])
+        return np.arange(len(similarities)), similarities
+    
+    @staticmethod
+    def _select_top_k(indices: np.ndarray, scores: np.ndarray, top_k: int,
+                      threshold: float) -> List[Tuple[int, float]]:
+        """
+        使用argpartition部分排序选出前top_k个结果，O(n + k log k)
+        
+        Returns:
+            按相似度降序排列的 (文档索引, 相似度) 列表
+        """
+        mask = scores >= threshold
+        indices, scores = indices[mask], scores[mask]
+        
+        if len(scores) > top_k:
+            part = np.argpartition(-scores, top_k - 1)[:top_k]
+            indices, scores = indices[part], scores[part]
+        
+        order = np.argsort(-scores, kind='stable')
+        return [(int(indices[i]), float(scores[i])) for i in order]
+    
+    @staticmethod
+    def _select_top_k_rows(similarities: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        对相似度矩阵逐行选出前top_k个结果（整体向量化，无Python级逐行排序）
+        
+        Returns:
+            (索引矩阵, 相似度矩阵)，每行按相似度降序排列
+        """
+        k = min(top_k, similarities.shape[1])
+        part = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        part_scores = np.take_along_axis(similarities, part, axis=1)
+        order = np.argsort(-part_scores, axis=1, kind='stable')
+        return (np.take_along_axis(part, order, axis=1),
+                np.take_along_axis(part_scores, order, axis=1))
     
     def save(self):
         """
         保存向量存储到磁盘
+        
+        只追加新增文档和新增向量分段；重平衡后合并为单个分段。保存后各分段和
+        文档元数据改为内存映射磁盘文件，释放内存中的副本。写盘期间检索照常进行。
         """
-        try:
-            data = {
-                'documents': self.documents,
-                'vectorizer': self.vectorizer,
-                'vectors': self.vectors,
-                'is_fitted': self.is_fitted
-            }
-            
-            with open(self.db_path, 'wb') as f:
-                pickle.dump(data, f)
-            
-            self.logger.info(f"向量存储已保存到 {self.db_path}")
+        with self._write_mutex:
+            try:
+                self._merge_pending()
+                segments = self.segments
+                self.storage.save(
+                    documents=self.documents,
+                    matrices=[(segment.counts, segment.vectors) for segment in segments],
+                    doc_freq=self.vectorizer.doc_freq,
+                    info={
+                        'n_features': self.vectorizer.n_features,
+                        'ngram_range': list(self.vectorizer.ngram_range),
+                        'n_docs': self.vectorizer.n_docs,
+                        'rebalanced_at': self.rebalanced_at
+                    },
+                    compact=self._needs_compaction,
+                    max_segments=VECTOR_CONFIG.get('max_segments', 8),
+                    symbols=self.symbol_index.pending
+                )
+                
+                # 已保存的分段和文档改为从磁盘按需读取
+                segments = self._map_segments(segments)
+                documents = DocumentTable(
+                    os.path.join(self.db_path, 'documents.jsonl'), len(self.documents)
+                )
+                with self._lock.write():
+                    self.documents.close()
+                    self.documents = documents
+                    self.segments = segments
+                    self._needs_compaction = False
+                    self.symbol_index.mark_saved()
+                
+                self.logger.info(f"向量存储已保存到 {self.db_path}")
             
-        except Exception as e:
-            self.logger.error(f"保存向量存储失败: {str(e)}")
+            except Exception as e:
+                self.logger.error(f"保存向量存储失败: {str(e)}")
     
     def load(self):
         """
         从磁盘加载向量存储
         """
         try:
-            if os.path.exists(self.db_path):
-                with open(self.db_path, 'rb') as f:
-                    data = pickle.load(f)
-                
-                self.documents = data.get('documents', [])
-                self.vectorizer = data.get('vectorizer', self.vectorizer)
-                self.vectors = data.get('vectors')
-                self.is_fitted = data.get('is_fitted', False)
-                
-                self.logger.info(f"从 {self.db_path} 加载了 {len(self.documents)} 个文档")
+            if self.storage.is_legacy():
+                self._migrate_legacy()
+                return
+            
+            if not self.storage.exists():
+                return
+            
+            data = self.storage.load()
+            manifest = data['manifest']
+            
+            vectorizer = IncrementalTfidfVectorizer(
+                n_features=manifest['n_features'],
+                ngram_range=tuple(manifest['ngram_range'])
+            )
+            vectorizer.doc_freq = data['doc_freq']
+            vectorizer.n_docs = manifest['n_docs']
+            segments = self._map_segments([])
+            
+            with self._write_mutex, self._lock.write():
+                self.vectorizer = vectorizer
+                self.documents = data['documents']
+                self.symbol_index.load_entries(data['symbols'])
+                self.segments = segments
+                self._pending_blocks = []
+                self.is_fitted = bool(segments)
+                self.rebalanced_at = manifest.get('rebalanced_at', len(self.documents))
             
+            self.logger.info(f"从 {self.db_path} 加载了 {len(self.documents)} 个文档")
+        
         except Exception as e:
             self.logger.warning(f"加载向量存储失败: {str(e)}")
     
+    def _migrate_legacy(self):
+        """
+        将旧版单文件pickle格式迁移为新的索引目录格式
+        """
+        with open(self.db_path, 'rb') as f:
+            data = pickle.load(f)
+        
+        documents = data.get('documents', [])
+        backup_path = self.db_path + '.legacy.pkl'
+        os.replace(self.db_path, backup_path)
+        self.logger.info(f"检测到旧版向量存储格式，已备份到 {backup_path}，正在迁移")
+        
+        self.documents = DocumentTable()
+        self.documents.extend(documents)
+        for doc_id, doc in enumerate(documents):
+            self.symbol_index.add_document(doc_id, doc.get('sdk_interfaces'))
+        self.rebuild()
+    
     def clear(self):
         """
         清空向量存储
         """
-        self.documents = []
-        self.vectors = None
-        self.is_fitted = False
-        
-        if os.path.exists(self.db_path):
-            os.remove(self.db_path)
+        with self._write_mutex, self._lock.write():
+            self.documents.close()
+            self.documents = DocumentTable()
+            self.vectorizer = self._create_vectorizer()
+            self.segments = []
+            self._pending_blocks = []
+            self.is_fitted = False
+            self.rebalanced_at = 0
+            self._needs_compaction = False
+            self.symbol_index.clear()
+            
+            self.storage.clear()
         
         self.logger.info("向量存储已清空")
     
+    @property
+    def generation(self) -> int:
+        """
+        已保存索引的版本号，每次保存递增，清空后归零
+        """
+        return self.storage.manifest['generation'] if self.storage.manifest else 0
+    
+    def disk_usage(self) -> int:
+        """
+        索引在磁盘上占用的字节数
+        """
+        if os.path.isfile(self.db_path):
+            return os.path.getsize(self.db_path)
+        total = 0
+        for root, _, files in os.walk(self.db_path):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total
+    
     def get_stats(self) -> Dict[str, Any]:
         """
         获取存储统计信息
         """
-        return {
-            'document_count': len(self.documents),
-            'is_fitted': self.is_fitted,
-            'db_path': self.db_path,
-            'vector_shape': self.vectors.shape if self.vectors is not None else None
-        }
\ No newline at end of file
+        with self._lock.read():
+            return {
+                'document_count': len(self.documents),
+                'is_fitted': self.is_fitted,
+                'rebalanced_at': self.rebalanced_at,
+                'symbol_count': len(self.symbol_index),
+                'segment_count': len(self.storage.manifest['segments']) if self.storage.manifest else 0,
+                'db_path': self.db_path,
+                'vector_shape': (len(self.documents), self.vectorizer.n_features) if self.is_fitted else None
+            }
\ No newline at end of file